@@ -0,0 +1,45 @@
+"""Add pod_samples table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'pod_samples',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('cluster_id', sa.Integer(), nullable=False),
+        sa.Column('namespace', sa.String(255), nullable=False),
+        sa.Column('pod', sa.String(255), nullable=False),
+        sa.Column('ts', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(50), nullable=True),
+        sa.Column('node_name', sa.String(255), nullable=True),
+        sa.Column('restart_count', sa.Integer(), default=0),
+        sa.Column('cpu_request', sa.Float(), default=0.0),
+        sa.Column('memory_request', sa.Float(), default=0.0),
+        sa.Column('cpu_limit', sa.Float(), default=0.0),
+        sa.Column('memory_limit', sa.Float(), default=0.0),
+        sa.Column('cpu_actual', sa.Float(), nullable=True),
+        sa.Column('memory_actual_gib', sa.Float(), nullable=True),
+        sa.Column('cpu_efficiency_pct', sa.Float(), nullable=True),
+        sa.Column('memory_efficiency_pct', sa.Float(), nullable=True),
+        sa.Column('ephemeral_storage_gib', sa.Float(), nullable=True),
+        sa.Column('age_hours', sa.Float(), default=0.0),
+        sa.Column('pod_created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_pod_samples_cluster_ns_pod_ts', 'pod_samples',
+                    ['cluster_id', 'namespace', 'pod', 'ts'])
+    op.create_index('ix_pod_samples_ts', 'pod_samples', ['ts'])
+
+
+def downgrade():
+    op.drop_table('pod_samples')
@@ -0,0 +1,44 @@
+"""Add current_namespace_state table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'current_namespace_state',
+        sa.Column('cluster_id', sa.Integer(), primary_key=True),
+        sa.Column('namespace', sa.String(255), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('pod_data', sa.JSON()),
+        sa.Column('pod_count', sa.Integer(), default=0),
+        sa.Column('total_cpu', sa.Float(), default=0.0),
+        sa.Column('total_memory', sa.Float(), default=0.0),
+        sa.Column('total_restarts', sa.Integer(), default=0),
+    )
+    # Mevcut geçmişten doldur — her namespace'in son satırı
+    op.execute("""
+        INSERT INTO current_namespace_state
+            (cluster_id, namespace, timestamp, pod_data, pod_count,
+             total_cpu, total_memory, total_restarts)
+        SELECT DISTINCT ON (cluster_id, namespace)
+               cluster_id, namespace, timestamp, pod_data,
+               json_array_length(pod_data),
+               total_cpu, total_memory, total_restarts
+        FROM metrics
+        WHERE timestamp IS NOT NULL
+        ORDER BY cluster_id, namespace, timestamp DESC
+    """)
+
+
+def downgrade():
+    op.drop_table('current_namespace_state')
@@ -0,0 +1,45 @@
+"""Add composite and partial indexes for hot queries
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # metrics — cluster/namespace filtreli zaman aralığı sorguları ve retention
+    op.create_index('ix_metrics_cluster_ns_ts', 'metrics',
+                    ['cluster_id', 'namespace', 'timestamp'])
+    op.create_index('ix_metrics_cluster_ts', 'metrics',
+                    ['cluster_id', 'timestamp'])
+
+    # alerts — sadece çözülmemiş alert'ler (partial)
+    op.create_index('ix_alerts_cluster_unresolved', 'alerts',
+                    ['cluster_id', 'created_at'],
+                    postgresql_where=sa.text('resolved = false'))
+
+    # statistics — namespace + metric_type için en son hesap
+    op.create_index('ix_statistics_lookup', 'statistics',
+                    ['cluster_id', 'namespace', 'metric_type', 'calculated_at'])
+
+    # kube_events — cluster filtreli zaman aralığı ve collector dedup araması
+    op.create_index('ix_kube_events_cluster_created', 'kube_events',
+                    ['cluster_id', 'created_at'])
+    op.create_index('ix_kube_events_dedup', 'kube_events',
+                    ['namespace', 'pod_name', 'event_type', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_kube_events_dedup', table_name='kube_events')
+    op.drop_index('ix_kube_events_cluster_created', table_name='kube_events')
+    op.drop_index('ix_statistics_lookup', table_name='statistics')
+    op.drop_index('ix_alerts_cluster_unresolved', table_name='alerts')
+    op.drop_index('ix_metrics_cluster_ts', table_name='metrics')
+    op.drop_index('ix_metrics_cluster_ns_ts', table_name='metrics')
@@ -0,0 +1,130 @@
+"""Range-partition metrics and kube_events by day
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+
+metrics (timestamp) and kube_events (created_at) become RANGE-partitioned
+parents with one partition per UTC day plus a DEFAULT partition. Existing
+rows are copied into daily partitions; the primary key becomes
+(id, <partition column>) because PostgreSQL requires the partition key in
+every unique constraint. Retention then drops whole partitions
+(db/partitions.py) instead of deleting rows.
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from db import partitions
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+METRICS_COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('metrics_id_seq'),
+    cluster_id integer NOT NULL,
+    namespace varchar(255) NOT NULL,
+    timestamp timestamp without time zone NOT NULL,
+    pod_data json,
+    total_cpu double precision,
+    total_memory double precision,
+    total_restarts integer
+"""
+
+KUBE_EVENTS_COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('kube_events_id_seq'),
+    cluster_id integer,
+    namespace varchar(255) NOT NULL,
+    pod_name varchar(255) NOT NULL,
+    event_type varchar(100) NOT NULL,
+    reason varchar(255),
+    message text,
+    count integer,
+    first_seen timestamp without time zone,
+    last_seen timestamp without time zone,
+    created_at timestamp without time zone NOT NULL
+"""
+
+# Tablo → (kolonlar, partition kolonu, kopyalama SELECT'i, index'ler)
+TABLES = {
+    'metrics': (
+        METRICS_COLUMNS, 'timestamp',
+        """SELECT id, cluster_id, namespace, COALESCE(timestamp, now()),
+                  pod_data, total_cpu, total_memory, total_restarts
+           FROM metrics_legacy""",
+        {
+            'ix_metrics_timestamp': ['timestamp'],
+            'ix_metrics_cluster_ns_ts': ['cluster_id', 'namespace', 'timestamp'],
+            'ix_metrics_cluster_ts': ['cluster_id', 'timestamp'],
+        },
+    ),
+    'kube_events': (
+        KUBE_EVENTS_COLUMNS, 'created_at',
+        """SELECT id, cluster_id, namespace, pod_name, event_type, reason,
+                  message, count, first_seen, last_seen,
+                  COALESCE(created_at, last_seen, now())
+           FROM kube_events_legacy""",
+        {
+            'ix_kube_events_namespace': ['namespace'],
+            'ix_kube_events_pod_name': ['pod_name'],
+            'ix_kube_events_event_type': ['event_type'],
+            'ix_kube_events_last_seen': ['last_seen'],
+            'ix_kube_events_created_at': ['created_at'],
+            'ix_kube_events_cluster_created': ['cluster_id', 'created_at'],
+            'ix_kube_events_dedup': ['namespace', 'pod_name', 'event_type', 'created_at'],
+        },
+    ),
+}
+
+
+def _partition_table(bind, table, columns, key, copy_select, indexes):
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    # Sequence eski tabloyla birlikte silinmesin
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+    op.execute(f"CREATE TABLE {table} ({columns}) PARTITION BY RANGE ({key})")
+    partitions.create_default_partition(bind, table)
+
+    # Mevcut verinin gün aralığı + önümüzdeki günler
+    today = datetime.utcnow().date()
+    first = bind.execute(sa.text(
+        f"SELECT min({key}) FROM {table}_legacy")).scalar()
+    start = first.date() if first else today
+    partitions.ensure_range(bind, table, min(start, today - timedelta(days=1)),
+                            today + timedelta(days=partitions.PRECREATE_DAYS))
+
+    op.execute(f"INSERT INTO {table} {copy_select}")
+    op.execute(f"DROP TABLE {table}_legacy")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+    for name, cols in indexes.items():
+        op.create_index(name, table, cols)
+
+
+def _unpartition_table(table, columns, key, indexes):
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    for name in indexes:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute(f"CREATE TABLE {table} ({columns})")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+    op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+    for name, cols in indexes.items():
+        op.create_index(name, table, cols)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, (columns, key, copy_select, indexes) in TABLES.items():
+        _partition_table(bind, table, columns, key, copy_select, indexes)
+
+
+def downgrade():
+    for table, (columns, key, _, indexes) in TABLES.items():
+        _unpartition_table(table, columns, key, indexes)
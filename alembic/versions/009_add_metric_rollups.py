@@ -0,0 +1,47 @@
+"""Add hourly/daily metric rollup tables
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def _rollup_columns():
+    columns = [
+        sa.Column('cluster_id', sa.Integer(), primary_key=True),
+        sa.Column('namespace', sa.String(255), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+    ]
+    for metric in ('cpu', 'memory', 'restarts'):
+        for agg in ('avg', 'min', 'max', 'last'):
+            columns.append(sa.Column(f'{metric}_{agg}', sa.Float()))
+    columns.append(sa.Column('last_ts', sa.DateTime()))
+    return columns
+
+
+def upgrade():
+    op.create_table('metric_rollup_hourly', *_rollup_columns())
+    op.create_index('ix_metric_rollup_hourly_bucket', 'metric_rollup_hourly', ['bucket'])
+
+    op.create_table('metric_rollup_daily', *_rollup_columns())
+    op.create_index('ix_metric_rollup_daily_bucket', 'metric_rollup_daily', ['bucket'])
+
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('tier', sa.String(20), primary_key=True),
+        sa.Column('processed_until', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+    op.drop_table('metric_rollup_daily')
+    op.drop_table('metric_rollup_hourly')
@@ -0,0 +1,48 @@
+"""Add delta-encoded pod_snapshots and snapshot_dictionaries
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'pod_snapshots',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('cluster_id', sa.Integer(), nullable=False),
+        sa.Column('namespace', sa.String(255), nullable=False),
+        sa.Column('ts', sa.DateTime(), nullable=False),
+        sa.Column('kind', sa.String(5), nullable=False),
+        sa.Column('keyframe_id', sa.BigInteger(), nullable=True),
+        sa.Column('digest', sa.String(40), nullable=False),
+        sa.Column('dict_id', sa.Integer(), nullable=True),
+        sa.Column('pod_count', sa.Integer(), default=0),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+    )
+    op.create_index('ix_pod_snapshots_cluster_ns_ts', 'pod_snapshots',
+                    ['cluster_id', 'namespace', 'ts'])
+    op.create_index('ix_pod_snapshots_ts', 'pod_snapshots', ['ts'])
+
+    op.create_table(
+        'snapshot_dictionaries',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('cluster_id', sa.Integer(), nullable=False),
+        sa.Column('codec', sa.String(10), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_snapshot_dictionaries_cluster_id',
+                    'snapshot_dictionaries', ['cluster_id'])
+
+
+def downgrade():
+    op.drop_table('snapshot_dictionaries')
+    op.drop_table('pod_snapshots')
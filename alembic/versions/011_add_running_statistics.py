@@ -0,0 +1,37 @@
+"""Add running_statistics (ingest-time Welford state)
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'running_statistics',
+        sa.Column('cluster_id', sa.Integer(), primary_key=True),
+        sa.Column('namespace', sa.String(255), primary_key=True),
+        sa.Column('metric_type', sa.String(50), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('m2', sa.Float(), nullable=False),
+        sa.Column('min_value', sa.Float()),
+        sa.Column('max_value', sa.Float()),
+        sa.Column('sum_t', sa.Float(), nullable=False),
+        sa.Column('sum_tt', sa.Float(), nullable=False),
+        sa.Column('sum_ty', sa.Float(), nullable=False),
+        sa.Column('last_ts', sa.DateTime()),
+    )
+    op.create_index('ix_running_statistics_bucket', 'running_statistics', ['bucket'])
+
+
+def downgrade():
+    op.drop_table('running_statistics')
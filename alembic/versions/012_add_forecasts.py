@@ -0,0 +1,35 @@
+"""Add precomputed forecasts table
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'forecasts',
+        sa.Column('cluster_id', sa.Integer(), primary_key=True),
+        sa.Column('namespace', sa.String(255), primary_key=True),
+        sa.Column('metric_type', sa.String(50), primary_key=True),
+        sa.Column('horizon_days', sa.Integer(), primary_key=True),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('lower', sa.Float()),
+        sa.Column('upper', sa.Float()),
+        sa.Column('trend', sa.Float()),
+        sa.Column('confidence', sa.Float()),
+        sa.Column('history_days', sa.Integer()),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_forecasts_computed_at', 'forecasts', ['computed_at'])
+
+
+def downgrade():
+    op.drop_table('forecasts')
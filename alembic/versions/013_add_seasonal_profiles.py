@@ -0,0 +1,37 @@
+"""Add seasonal_profiles and forecasts.method
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'seasonal_profiles',
+        sa.Column('cluster_id', sa.Integer(), primary_key=True),
+        sa.Column('namespace', sa.String(255), primary_key=True),
+        sa.Column('metric_type', sa.String(50), primary_key=True),
+        sa.Column('level', sa.Float(), nullable=False),
+        sa.Column('trend', sa.Float(), nullable=False),
+        sa.Column('season', sa.LargeBinary(), nullable=False),
+        sa.Column('variance', sa.LargeBinary(), nullable=False),
+        sa.Column('counts', sa.LargeBinary(), nullable=False),
+        sa.Column('observations', sa.Integer(), nullable=False),
+        sa.Column('last_bucket', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_seasonal_profiles_last_bucket', 'seasonal_profiles',
+                    ['last_bucket'])
+    op.add_column('forecasts', sa.Column('method', sa.String(20), nullable=True))
+
+
+def downgrade():
+    op.drop_column('forecasts', 'method')
+    op.drop_table('seasonal_profiles')
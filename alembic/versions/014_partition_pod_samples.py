@@ -0,0 +1,94 @@
+"""Range-partition pod_samples by day
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+
+pod_samples (one row per pod per cycle, the largest table) becomes a
+RANGE-partitioned parent on ts with one partition per UTC day plus a
+DEFAULT partition, like metrics and kube_events in 008. Existing rows are
+copied into daily partitions and the primary key becomes (id, ts).
+Retention then drops whole days through db/partitions.py.
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from db import partitions
+
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+TABLE = 'pod_samples'
+KEY = 'ts'
+
+COLUMNS = """
+    id bigint NOT NULL DEFAULT nextval('pod_samples_id_seq'),
+    cluster_id integer NOT NULL,
+    namespace varchar(255) NOT NULL,
+    pod varchar(255) NOT NULL,
+    ts timestamp without time zone NOT NULL,
+    status varchar(50),
+    node_name varchar(255),
+    restart_count integer,
+    cpu_request double precision,
+    memory_request double precision,
+    cpu_limit double precision,
+    memory_limit double precision,
+    cpu_actual double precision,
+    memory_actual_gib double precision,
+    cpu_efficiency_pct double precision,
+    memory_efficiency_pct double precision,
+    ephemeral_storage_gib double precision,
+    age_hours double precision,
+    pod_created_at timestamp without time zone
+"""
+
+INDEXES = {
+    'ix_pod_samples_cluster_ns_pod_ts': ['cluster_id', 'namespace', 'pod', 'ts'],
+    'ix_pod_samples_ts': ['ts'],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy")
+    # Sequence eski tabloyla birlikte silinmesin
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+
+    op.execute(f"CREATE TABLE {TABLE} ({COLUMNS}) PARTITION BY RANGE ({KEY})")
+    partitions.create_default_partition(bind, TABLE)
+
+    # Mevcut verinin gün aralığı + önümüzdeki günler
+    today = datetime.utcnow().date()
+    first = bind.execute(sa.text(f"SELECT min({KEY}) FROM {TABLE}_legacy")).scalar()
+    start = first.date() if first else today
+    partitions.ensure_range(bind, TABLE, min(start, today - timedelta(days=1)),
+                            today + timedelta(days=partitions.PRECREATE_DAYS))
+
+    op.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_legacy")
+    op.execute(f"DROP TABLE {TABLE}_legacy")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+
+    op.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, {KEY})")
+    for name, cols in INDEXES.items():
+        op.create_index(name, TABLE, cols)
+
+
+def downgrade():
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute(f"CREATE TABLE {TABLE} ({COLUMNS})")
+    op.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned")
+    op.execute(f"DROP TABLE {TABLE}_partitioned CASCADE")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    op.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+    for name, cols in INDEXES.items():
+        op.create_index(name, TABLE, cols)
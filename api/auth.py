@@ -5,9 +5,11 @@ import os
 from datetime import datetime
 from fastapi import Security, HTTPException, Depends
 from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db.dependencies import get_db
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_db
 from db.models import ApiKey
 
 # Header adı: istek yaparken "X-API-Key: kp_xxx..." şeklinde gönderilir
@@ -36,25 +38,44 @@ def generate_api_key() -> str:
     return f"kp_{secrets.token_hex(32)}"
 
 
-def create_api_key(db: Session, name: str, expires_at: datetime = None) -> str:
-    """
-    Yeni API key oluştur, hash'ini DB'ye kaydet.
-    Ham key'i döndürür — sadece bu anda görünür, bir daha gösterilmez!
-    """
+def _new_api_key(name: str, expires_at: datetime = None):
+    """Ham key ve hash'ini taşıyan (henüz eklenmemiş) ApiKey kaydı."""
     raw_key = generate_api_key()
     key_record = ApiKey(
         name=name,
         key_hash=hash_key(raw_key),
         expires_at=expires_at
     )
+    return raw_key, key_record
+
+
+def create_api_key(db: Session, name: str, expires_at: datetime = None) -> str:
+    """
+    Yeni API key oluştur, hash'ini DB'ye kaydet.
+    Ham key'i döndürür — sadece bu anda görünür, bir daha gösterilmez!
+    """
+    raw_key, key_record = _new_api_key(name, expires_at)
     db.add(key_record)
     db.commit()
     return raw_key
 
 
-def get_current_key(
+async def create_api_key_async(db: AsyncSession, name: str,
+                               expires_at: datetime = None):
+    """
+    create_api_key()'in async karşılığı (API route'ları için).
+    (ham key, kayıt) döndürür — ham key sadece bu anda görünür.
+    """
+    raw_key, key_record = _new_api_key(name, expires_at)
+    db.add(key_record)
+    await db.commit()
+    await db.refresh(key_record)
+    return raw_key, key_record
+
+
+async def get_current_key(
     raw_key: str = Security(API_KEY_HEADER),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> ApiKey:
     """
     FastAPI dependency — korumalı her endpoint'e eklenir.
@@ -77,10 +98,7 @@ def get_current_key(
         )
 
     # Hash'i DB'de ara
-    key_record = db.query(ApiKey).filter(
-        ApiKey.key_hash == hash_key(raw_key),
-        ApiKey.is_active == True
-    ).first()
+    key_record = await AsyncMetricRepository(db).get_active_api_key(hash_key(raw_key))
 
     # Key bulunamadı
     if not key_record:
@@ -100,6 +118,6 @@ def get_current_key(
 
     # Son kullanım zamanını güncelle (kim, ne zaman kullandı takibi)
     key_record.last_used_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     return key_record
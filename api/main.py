@@ -1,8 +1,10 @@
 # api/main.py
-from api.routes import metrics, alerts, clusters, apikeys, cost, events, nodes, storage, license as license_route
-from api.auth import create_api_key
-from db.models import init_db, SessionLocal
-from fastapi import FastAPI
+from api.routes import metrics, alerts, clusters, apikeys, cost, events, forecast, nodes, storage, license as license_route
+from api.auth import create_api_key, get_current_key
+from db.models import init_db, SessionLocal, ApiKey
+from db.async_session import async_engines, async_replica_set, dispose_async_engine
+from db.routing import pool_stats, replica_status
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import sys
@@ -72,6 +74,8 @@ app.include_router(apikeys.router,       prefix="/api/keys",
 app.include_router(cost.router,          prefix="/api/cost",     tags=["cost"])
 app.include_router(events.router,
                    prefix="/api/events",   tags=["events"])
+app.include_router(forecast.router,
+                   prefix="/api/forecast", tags=["forecast"])
 app.include_router(
     nodes.router,         prefix="/api/nodes",    tags=["nodes"])
 app.include_router(storage.router,
@@ -80,6 +84,11 @@ app.include_router(license_route.router,
                    prefix="/api/license",  tags=["license"])
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await dispose_async_engine()
+
+
 @app.get("/")
 async def root():
     return {
@@ -95,6 +104,15 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+async def health_db(_auth: ApiKey = Depends(get_current_key)):
+    """API sürecinin engine pool durumu ve replica gecikmeleri."""
+    return {
+        "pools": pool_stats(async_engines()),
+        "replicas": replica_status(async_replica_set()),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -2,10 +2,10 @@
 from pydantic import BaseModel
 from api.auth import get_current_key
 from db.models import Alert, ApiKey
-from db.repository import MetricRepository
-from db.dependencies import get_db
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_db, get_async_read_db
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List, Optional
 import sys
@@ -30,29 +30,26 @@ class AlertResponse(BaseModel):
 async def get_alerts(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    repo = MetricRepository(db)
+    repo = AsyncMetricRepository(db)
 
     # Resolve cluster_id
     cluster_id = None
     if cluster:
-        c = repo.get_cluster_by_name(cluster)
+        c = await repo.get_cluster_by_name(cluster)
         if not c:
             return []
         cluster_id = c.id
 
     if active_only:
-        alerts = repo.get_active_alerts(cluster_id=cluster_id)
+        alerts = await repo.get_active_alerts(cluster_id=cluster_id)
     else:
-        query = db.query(Alert)
-        if cluster_id:
-            query = query.filter(Alert.cluster_id == cluster_id)
-        alerts = query.all()
+        alerts = await repo.get_alerts(cluster_id=cluster_id)
 
     # Build cluster id→name map
-    all_clusters = {cl.id: cl.name for cl in repo.get_all_clusters()}
+    all_clusters = await repo.get_cluster_names()
 
     return [
         AlertResponse(
@@ -70,15 +67,15 @@ async def get_alerts(
 @router.post("/{alert_id}/resolve")
 async def resolve_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = await db.get(Alert, alert_id)
 
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
 
     alert.resolved = True
-    db.commit()
+    await db.commit()
 
     return {"status": "resolved", "id": alert_id}
@@ -1,10 +1,11 @@
 # api/routes/apikeys.py
 from pydantic import BaseModel
-from api.auth import create_api_key, get_current_key
+from api.auth import create_api_key_async, get_current_key
 from db.models import ApiKey
-from db.dependencies import get_db
+from db.dependencies import get_async_db
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List, Optional
 import sys
@@ -44,24 +45,17 @@ class KeyInfoResponse(BaseModel):
 # --- Endpoints ---
 
 @router.post("/", response_model=CreateKeyResponse)
-def create_key(
+async def create_key(
     request: CreateKeyRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _auth: ApiKey = Depends(get_current_key)  # Bu endpoint de korumalı
 ):
     """
     Yeni API key oluştur.
     UYARI: Dönen 'key' alanını hemen kaydet — bir daha gösterilmez!
     """
-    raw_key = create_api_key(db, name=request.name,
-                             expires_at=request.expires_at)
-
-    # Yeni oluşturulan kaydı bul (id için)
-    from db.models import ApiKey as ApiKeyModel
-    from api.auth import hash_key
-    record = db.query(ApiKeyModel).filter(
-        ApiKeyModel.key_hash == hash_key(raw_key)
-    ).first()
+    raw_key, record = await create_api_key_async(
+        db, name=request.name, expires_at=request.expires_at)
 
     return CreateKeyResponse(
         id=record.id,
@@ -73,12 +67,13 @@ def create_key(
 
 
 @router.get("/", response_model=List[KeyInfoResponse])
-def list_keys(
-    db: Session = Depends(get_db),
+async def list_keys(
+    db: AsyncSession = Depends(get_async_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Tüm API key'leri listele (hash gösterilmez)"""
-    keys = db.query(ApiKey).order_by(ApiKey.created_at.desc()).all()
+    keys = (await db.scalars(
+        select(ApiKey).order_by(ApiKey.created_at.desc()))).all()
     return [
         KeyInfoResponse(
             id=k.id,
@@ -93,18 +88,18 @@ def list_keys(
 
 
 @router.delete("/{key_id}")
-def revoke_key(
+async def revoke_key(
     key_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """API key'i deaktif et (sil değil — audit trail için)"""
-    key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
+    key = await db.get(ApiKey, key_id)
 
     if not key:
         raise HTTPException(status_code=404, detail="Key bulunamadı")
 
     key.is_active = False
-    db.commit()
+    await db.commit()
 
     return {"status": "revoked", "id": key_id, "name": key.name}
@@ -1,10 +1,11 @@
 # api/routes/clusters.py
 from pydantic import BaseModel
 from api.auth import get_current_key
-from db.models import Cluster, Metric, ApiKey
-from db.dependencies import get_db
+from db.models import ApiKey
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_read_db
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List, Optional
 import sys
@@ -26,25 +27,20 @@ class ClusterResponse(BaseModel):
 
 @router.get("/", response_model=List[ClusterResponse])
 async def get_clusters(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    clusters = db.query(Cluster).all()
+    repo = AsyncMetricRepository(db)
+    clusters = await repo.get_all_clusters()
 
     result = []
     for c in clusters:
-        last_metric = (
-            db.query(Metric)
-            .filter(Metric.cluster_id == c.id)
-            .order_by(Metric.timestamp.desc())
-            .first()
-        )
         result.append(ClusterResponse(
             id=c.id,
             name=c.name,
             context=c.context,
             created_at=c.created_at,
-            last_seen=last_metric.timestamp if last_metric else None
+            last_seen=await repo.get_last_seen(c.id)
         ))
 
     return result
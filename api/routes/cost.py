@@ -2,10 +2,11 @@
 from collector.cost import calculate_relative_cost, detect_waste
 from api.auth import get_current_key
 from db.models import ApiKey
-from db.repository import MetricRepository
-from db.dependencies import get_db
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_read_db
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import sys
 import os
@@ -16,51 +17,49 @@ sys.path.append(os.path.dirname(os.path.dirname(
 router = APIRouter()
 
 
-def _get_metrics(db, cluster: Optional[str], repo: MetricRepository):
+async def _get_metrics(cluster: Optional[str], repo: AsyncMetricRepository):
     if not cluster:
-        return repo.get_latest_per_namespace()
-    c = repo.get_cluster_by_name(cluster)
+        return await repo.get_latest_per_namespace()
+    c = await repo.get_cluster_by_name(cluster)
     if not c:
         return []
-    return repo.get_latest_per_namespace(cluster_id=c.id)
+    return await repo.get_latest_per_namespace(cluster_id=c.id)
 
 
 @router.get("/relative")
 async def get_relative_cost(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Relative cost share per namespace as a percentage of cluster total."""
-    repo = MetricRepository(db)
-    metrics = _get_metrics(db, cluster, repo)
+    metrics = await _get_metrics(cluster, AsyncMetricRepository(db))
     return calculate_relative_cost(metrics)
 
 
 @router.get("/waste")
 async def get_waste(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Detect resource waste per pod with waste_score (0-100) and recommendation."""
-    repo = MetricRepository(db)
-    metrics = _get_metrics(db, cluster, repo)
-    return detect_waste(metrics)
+    metrics = await _get_metrics(cluster, AsyncMetricRepository(db))
+    # Pod sayısıyla büyüyen CPU işi — event loop'u bekletmesin
+    return await run_in_threadpool(detect_waste, metrics)
 
 
 @router.get("/summary")
 async def get_cost_summary(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Relative cost + waste detection in a single response."""
-    repo = MetricRepository(db)
-    metrics = _get_metrics(db, cluster, repo)
+    metrics = await _get_metrics(cluster, AsyncMetricRepository(db))
     return {
         'relative_cost': calculate_relative_cost(metrics),
-        'waste':         detect_waste(metrics),
+        'waste':         await run_in_threadpool(detect_waste, metrics),
     }
 
 
@@ -68,38 +67,43 @@ async def get_cost_summary(
 async def get_efficiency(
     cluster:   Optional[str] = Query(None, description="Filter by cluster name"),
     namespace: Optional[str] = Query(None, description="Filter by namespace"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Actual usage vs requested resources (requires Metrics Server)."""
-    repo = MetricRepository(db)
-    metrics = _get_metrics(db, cluster, repo)
+    repo = AsyncMetricRepository(db)
+    cluster_id = None
+    if cluster:
+        c = await repo.get_cluster_by_name(cluster)
+        if not c:
+            return {'pods': [], 'summary': {'total_pods_with_data': 0,
+                                            'avg_cpu_efficiency_pct': 0.0,
+                                            'avg_memory_efficiency_pct': 0.0}}
+        cluster_id = c.id
+
+    # Pod satırları pod_samples'tan — JSON blob parse edilmez
+    samples = await repo.get_latest_pod_samples(
+        cluster_id=cluster_id, namespace=namespace, with_usage=True)
 
     results = []
-    for m in metrics:
-        if namespace and m.namespace != namespace:
-            continue
-        for pod in m.pod_data:
-            cpu_req = pod.get('cpu_request', 0)
-            mem_req = pod.get('memory_request', 0)
-            cpu_act = pod.get('cpu_actual')
-            mem_act = pod.get('memory_actual_gib')
-
-            if cpu_act is None and mem_act is None:
-                continue
-
-            results.append({
-                'pod':                    pod.get('name'),
-                'namespace':              pod.get('namespace', m.namespace),
-                'cpu_request':            round(cpu_req, 4),
-                'cpu_actual':             cpu_act,
-                'cpu_efficiency_pct':     pod.get('cpu_efficiency_pct'),
-                'cpu_wasted_cores':       round(cpu_req - cpu_act, 4) if cpu_act is not None else None,
-                'memory_request_gib':     round(mem_req, 4),
-                'memory_actual_gib':      mem_act,
-                'memory_efficiency_pct':  pod.get('memory_efficiency_pct'),
-                'memory_wasted_gib':      round(mem_req - mem_act, 4) if mem_act is not None else None,
-            })
+    for s in samples:
+        cpu_req = s.cpu_request or 0
+        mem_req = s.memory_request or 0
+        cpu_act = s.cpu_actual
+        mem_act = s.memory_actual_gib
+
+        results.append({
+            'pod':                    s.pod,
+            'namespace':              s.namespace,
+            'cpu_request':            round(cpu_req, 4),
+            'cpu_actual':             cpu_act,
+            'cpu_efficiency_pct':     s.cpu_efficiency_pct,
+            'cpu_wasted_cores':       round(cpu_req - cpu_act, 4) if cpu_act is not None else None,
+            'memory_request_gib':     round(mem_req, 4),
+            'memory_actual_gib':      mem_act,
+            'memory_efficiency_pct':  s.memory_efficiency_pct,
+            'memory_wasted_gib':      round(mem_req - mem_act, 4) if mem_act is not None else None,
+        })
 
     results.sort(key=lambda x: (x.get('cpu_efficiency_pct') or 100))
 
@@ -2,10 +2,11 @@
 from datetime import datetime, timedelta
 from api.auth import get_current_key
 from db.models import ApiKey, KubeEvent
-from db.repository import MetricRepository
-from db.dependencies import get_db
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_read_db
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import sys
 import os
@@ -24,33 +25,34 @@ async def get_events(
     pod:        Optional[str] = None,
     hours: int  = Query(24, description="Last N hours"),
     limit: int  = Query(100, description="Max results"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """List Kubernetes events. Filter by cluster, namespace, event_type, pod."""
-    repo = MetricRepository(db)
+    repo = AsyncMetricRepository(db)
 
     # Resolve cluster_id
     cluster_id = None
     if cluster:
-        c = repo.get_cluster_by_name(cluster)
+        c = await repo.get_cluster_by_name(cluster)
         if not c:
             return []
         cluster_id = c.id
 
     since = datetime.utcnow() - timedelta(hours=hours)
-    query = db.query(KubeEvent).filter(KubeEvent.created_at >= since)
+    query = select(KubeEvent).where(KubeEvent.created_at >= since)
 
     if cluster_id:
-        query = query.filter(KubeEvent.cluster_id == cluster_id)
+        query = query.where(KubeEvent.cluster_id == cluster_id)
     if namespace:
-        query = query.filter(KubeEvent.namespace == namespace)
+        query = query.where(KubeEvent.namespace == namespace)
     if event_type:
-        query = query.filter(KubeEvent.event_type == event_type)
+        query = query.where(KubeEvent.event_type == event_type)
     if pod:
-        query = query.filter(KubeEvent.pod_name.ilike(f'%{pod}%'))
+        query = query.where(KubeEvent.pod_name.ilike(f'%{pod}%'))
 
-    events = query.order_by(KubeEvent.last_seen.desc()).limit(limit).all()
+    events = (await db.scalars(
+        query.order_by(KubeEvent.last_seen.desc()).limit(limit))).all()
 
     return [
         {
@@ -73,50 +75,49 @@ async def get_events(
 async def get_event_summary(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
     hours: int = Query(24, description="Last N hours"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
     """Event count statistics grouped by type, namespace, and top pods."""
-    from sqlalchemy import func
-    repo = MetricRepository(db)
+    repo = AsyncMetricRepository(db)
 
     cluster_id = None
     if cluster:
-        c = repo.get_cluster_by_name(cluster)
+        c = await repo.get_cluster_by_name(cluster)
         if not c:
             return {'period_hours': hours, 'by_type': [], 'by_namespace': [], 'top_pods': []}
         cluster_id = c.id
 
     since = datetime.utcnow() - timedelta(hours=hours)
 
-    base = db.query(KubeEvent).filter(KubeEvent.created_at >= since)
+    filters = [KubeEvent.created_at >= since]
     if cluster_id:
-        base = base.filter(KubeEvent.cluster_id == cluster_id)
+        filters.append(KubeEvent.cluster_id == cluster_id)
 
-    by_type = (
-        base.with_entities(KubeEvent.event_type, func.count(KubeEvent.id).label('count'))
+    by_type = (await db.execute(
+        select(KubeEvent.event_type, func.count(KubeEvent.id).label('count'))
+        .where(*filters)
         .group_by(KubeEvent.event_type)
         .order_by(func.count(KubeEvent.id).desc())
-        .all()
-    )
+    )).all()
 
-    by_namespace = (
-        base.with_entities(KubeEvent.namespace, func.count(KubeEvent.id).label('count'))
+    by_namespace = (await db.execute(
+        select(KubeEvent.namespace, func.count(KubeEvent.id).label('count'))
+        .where(*filters)
         .group_by(KubeEvent.namespace)
         .order_by(func.count(KubeEvent.id).desc())
-        .all()
-    )
+    )).all()
 
-    top_pods = (
-        base.with_entities(
+    top_pods = (await db.execute(
+        select(
             KubeEvent.pod_name, KubeEvent.namespace,
             func.sum(KubeEvent.count).label('total')
         )
+        .where(*filters)
         .group_by(KubeEvent.pod_name, KubeEvent.namespace)
         .order_by(func.sum(KubeEvent.count).desc())
         .limit(10)
-        .all()
-    )
+    )).all()
 
     return {
         'period_hours': hours,
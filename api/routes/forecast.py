@@ -0,0 +1,74 @@
+# api/routes/forecast.py
+from pydantic import BaseModel
+from api.auth import get_current_key
+from db.models import CLUSTER_SCOPE, ApiKey
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_read_db
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+
+router = APIRouter()
+
+
+class ForecastResponse(BaseModel):
+    cluster: Optional[str] = None
+    namespace: Optional[str] = None     # None = cluster toplamı
+    metric_type: str
+    horizon_days: int
+    value: float
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    trend_per_day: Optional[float] = None
+    confidence: Optional[float] = None
+    history_days: Optional[int] = None
+    method: Optional[str] = None        # 'linear' | 'seasonal'
+    computed_at: datetime
+
+
+@router.get("/", response_model=List[ForecastResponse])
+async def get_forecasts(
+    cluster: Optional[str] = Query(None, description="Filter by cluster name"),
+    namespace: Optional[str] = Query(None, description="Namespace; omit for all, '*' for cluster totals"),
+    metric: Optional[str] = Query(None, description="cpu or memory"),
+    horizon: Optional[int] = Query(None, description="Horizon in days (e.g. 1, 7, 30)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    _auth: ApiKey = Depends(get_current_key)
+):
+    """Precomputed forecasts (seasonal or linear), refreshed hourly by the stats daemon."""
+    repo = AsyncMetricRepository(db)
+
+    cluster_id = None
+    if cluster:
+        c = await repo.get_cluster_by_name(cluster)
+        if not c:
+            return []
+        cluster_id = c.id
+
+    forecasts = await repo.get_forecasts(cluster_id=cluster_id, namespace=namespace,
+                                         metric_type=metric, horizon_days=horizon)
+    all_clusters = await repo.get_cluster_names()
+
+    return [
+        ForecastResponse(
+            cluster=all_clusters.get(f.cluster_id),
+            namespace=None if f.namespace == CLUSTER_SCOPE else f.namespace,
+            metric_type=f.metric_type,
+            horizon_days=f.horizon_days,
+            value=round(f.value, 3),
+            lower=round(f.lower, 3) if f.lower is not None else None,
+            upper=round(f.upper, 3) if f.upper is not None else None,
+            trend_per_day=f.trend,
+            confidence=f.confidence,
+            history_days=f.history_days,
+            method=f.method,
+            computed_at=f.computed_at,
+        )
+        for f in forecasts
+    ]
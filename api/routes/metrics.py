@@ -2,11 +2,12 @@
 from pydantic import BaseModel
 from api.auth import get_current_key
 from db.models import ApiKey
-from db.repository import MetricRepository
-from db.dependencies import get_db
+from db.async_repository import AsyncMetricRepository
+from db.dependencies import get_async_read_db
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime, timedelta
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(
@@ -49,28 +50,30 @@ class SummaryMetric(BaseModel):
     active_alerts: int
 
 
-def _resolve_cluster_id(db, cluster: Optional[str], repo: MetricRepository) -> Optional[int]:
+async def _resolve_cluster_id(cluster: Optional[str], repo: AsyncMetricRepository) -> Optional[int]:
     """Returns cluster_id for a given cluster name, or None if not specified."""
     if not cluster:
         return None
-    c = repo.get_cluster_by_name(cluster)
+    c = await repo.get_cluster_by_name(cluster)
     return c.id if c else -1  # -1 = cluster name given but not found → return empty
 
 
 @router.get("/summary", response_model=SummaryMetric)
 async def get_summary(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    repo = MetricRepository(db)
-    cluster_id = _resolve_cluster_id(db, cluster, repo)
+    repo = AsyncMetricRepository(db)
+    cluster_id = await _resolve_cluster_id(cluster, repo)
 
     if cluster_id == -1:
         return SummaryMetric(clusters=[], total_namespaces=0, total_pods=0,
                              total_cpu=0, total_memory=0, total_restarts=0, active_alerts=0)
 
-    metrics = repo.get_latest_metrics(cluster_id=cluster_id, hours=1)
+    # Namespace başına son döngü (current_namespace_state); son 1 saatte
+    # yazmamış (collector'ı durmuş) cluster'lar sayılmaz
+    metrics = await repo.get_latest_per_namespace(cluster_id=cluster_id, hours=1)
 
     if not metrics:
         return SummaryMetric(clusters=[], total_namespaces=0, total_pods=0,
@@ -79,20 +82,18 @@ async def get_summary(
     namespaces  = set()
     cluster_set = set()
     total_pods = total_cpu = total_memory = total_restarts = 0
+    cluster_names = await repo.get_cluster_names()
 
     for m in metrics:
         namespaces.add(m.namespace)
-        total_pods     += len(m.pod_data)
+        total_pods     += len(m.pod_data or [])
         total_cpu      += m.total_cpu
         total_memory   += m.total_memory
         total_restarts += m.total_restarts
-        # Resolve cluster name from id
-        c = repo.get_all_clusters()
-        for cl in c:
-            if cl.id == m.cluster_id:
-                cluster_set.add(cl.name)
+        if m.cluster_id in cluster_names:
+            cluster_set.add(cluster_names[m.cluster_id])
 
-    active_alerts = repo.get_active_alerts(cluster_id=cluster_id)
+    active_alerts = await repo.get_active_alerts(cluster_id=cluster_id)
 
     return SummaryMetric(
         clusters=sorted(cluster_set),
@@ -109,22 +110,22 @@ async def get_summary(
 async def get_namespace_metrics(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
     hours: int = Query(1, description="Last N hours of data"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    repo = MetricRepository(db)
-    cluster_id = _resolve_cluster_id(db, cluster, repo)
+    repo = AsyncMetricRepository(db)
+    cluster_id = await _resolve_cluster_id(cluster, repo)
 
     if cluster_id == -1:
         return []
 
-    metrics = repo.get_latest_metrics(cluster_id=cluster_id, hours=hours)
+    metrics = await repo.get_latest_metrics(cluster_id=cluster_id, hours=hours)
 
     if not metrics:
         return []
 
     # Build cluster id→name map
-    all_clusters = {cl.id: cl.name for cl in repo.get_all_clusters()}
+    all_clusters = await repo.get_cluster_names()
 
     namespace_data = {}
 
@@ -144,7 +145,9 @@ async def get_namespace_metrics(
         data['total_memory']    += m.total_memory
         data['total_restarts']  += m.total_restarts
 
-        if not data['pods']:
+        # Pod listesi en yeni satırdan (gerekirse pod_snapshots'tan kurulur)
+        if data['sample_count'] == 1:
+            await repo.hydrate_pod_data([m])
             for pod in m.pod_data:
                 data['pods'].append(PodMetric(
                     name=pod['name'],
@@ -182,16 +185,29 @@ async def get_namespace_metrics(
 async def get_trend(
     cluster: Optional[str] = Query(None, description="Filter by cluster name"),
     days: int = 7,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _auth: ApiKey = Depends(get_current_key)
 ):
-    repo = MetricRepository(db)
-    cluster_id = _resolve_cluster_id(db, cluster, repo)
+    repo = AsyncMetricRepository(db)
+    cluster_id = await _resolve_cluster_id(cluster, repo)
 
     if cluster_id == -1:
         return {'labels': [], 'cpu': [], 'memory': []}
 
-    metrics = repo.get_latest_metrics(cluster_id=cluster_id, hours=days * 24)
+    # Günlük rollup'lar: gün başına birkaç satır, pod_data yüklenmez
+    since = datetime.utcnow() - timedelta(days=days)
+    cpu_series = await repo.daily_series('cpu', since, cluster_id=cluster_id)
+    if cpu_series:
+        memory_series = dict(await repo.daily_series(
+            'memory', since, cluster_id=cluster_id))
+        return {
+            'labels': [day.strftime('%m-%d') for day, _ in cpu_series],
+            'cpu':    [round(value, 2) for _, value in cpu_series],
+            'memory': [round(memory_series.get(day, 0.0), 2) for day, _ in cpu_series],
+        }
+
+    # Rollup henüz yoksa (ilk kurulum) ham satırlardan
+    metrics = await repo.get_latest_metrics(cluster_id=cluster_id, hours=days * 24)
 
     daily_data = {}
     for m in metrics:
@@ -3,14 +3,13 @@
 # In a multi-cluster setup, each cluster's KubePocket instance exposes
 # its own /api/nodes endpoint for that cluster's node data.
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from db.dependencies import get_db
 from db.models import ApiKey
 from api.auth import get_current_key
-from collector.k8s_client import K8sClient
+from collector.k8s_client import get_shared_client
 
 router = APIRouter()
 
@@ -19,8 +18,9 @@ router = APIRouter()
 async def get_nodes(_auth: ApiKey = Depends(get_current_key)):
     """Node capacity, allocatable resources, usage and pod distribution for the local cluster."""
     try:
-        k8s = K8sClient()
-        nodes = k8s.collect_node_metrics()
+        k8s = get_shared_client()
+        # Kubernetes client bloklayıcı — event loop dışında çalıştır
+        nodes = await run_in_threadpool(k8s.collect_node_metrics)
         return {
             'nodes': nodes,
             'summary': {
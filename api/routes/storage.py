@@ -3,12 +3,13 @@
 # In a multi-cluster setup, each cluster's KubePocket instance exposes
 # its own /api/storage endpoint for that cluster's PVC data.
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from db.models import ApiKey
 from api.auth import get_current_key
-from collector.k8s_client import K8sClient
+from collector.k8s_client import get_shared_client
 
 router = APIRouter()
 
@@ -17,8 +18,9 @@ router = APIRouter()
 async def get_storage(_auth: ApiKey = Depends(get_current_key)):
     """PVC and PV storage monitoring for the local cluster."""
     try:
-        k8s = K8sClient()
-        pvcs = k8s.collect_pvc_metrics()
+        k8s = get_shared_client()
+        # Kubernetes client bloklayıcı — event loop dışında çalıştır
+        pvcs = await run_in_threadpool(k8s.collect_pvc_metrics)
         total_capacity  = round(sum(p['capacity_gib']  for p in pvcs), 3)
         total_requested = round(sum(p['requested_gib'] for p in pvcs), 3)
         unbound = [p for p in pvcs if not p['bound']]
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# benchmarks/fake_apiserver.py
+"""
+Fake Kubernetes API server for collector benchmarks.
+
+Serves a synthetic cluster of configurable size — namespaces, pods,
+nodes, PVCs/PVs, Warning events, metrics.k8s.io pod/node usage and
+kubelet stats/summary — without a real cluster. Objects are generated
+deterministically from their index, so a 50k-pod cluster costs no
+server memory. Lists honour limit/continue pagination; every request
+can be delayed by --latency-ms; /_stats returns per-endpoint call counts.
+
+Usage:
+    python benchmarks/fake_apiserver.py --pods 50000 --namespaces 600 \\
+        --nodes 2000 --pvcs 5000 --events 2000 --latency-ms 20 --port 8443
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+RESOURCE_VERSION = '1000'
+
+CPU_REQUESTS = ['50m', '100m', '250m', '500m', '1', '2']
+MEMORY_REQUESTS = ['64Mi', '128Mi', '256Mi', '512Mi', '1Gi', '2Gi']
+PHASES = ['Running'] * 17 + ['Pending', 'Failed', 'Succeeded']
+EVENT_REASONS = ['BackOff', 'OOMKilling', 'Unhealthy', 'FailedScheduling',
+                 'Evicted', 'FailedMount', 'ErrImagePull']
+APPS = ['api', 'web', 'worker', 'cache', 'db', 'queue', 'auth', 'billing']
+
+
+def _h(*parts):
+    """İndeksten deterministik sayı"""
+    digest = hashlib.blake2b(':'.join(map(str, parts)).encode(),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _ts(offset_hours):
+    return (BASE_TIME - timedelta(hours=offset_hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class SyntheticCluster:
+
+    def __init__(self, pods, namespaces, nodes, pvcs, events):
+        self.n_pods = pods
+        self.n_namespaces = max(1, namespaces)
+        self.n_nodes = max(1, nodes)
+        self.n_pvcs = min(pvcs, pods)
+        self.n_events = events
+
+    def namespace_name(self, i):
+        return f'team-{i:04d}'
+
+    def node_name(self, i):
+        return f'node-{i:05d}'
+
+    def pod_namespace_index(self, i):
+        return i % self.n_namespaces
+
+    def pod_name(self, i):
+        app = APPS[_h('app', i) % len(APPS)]
+        return f'{app}-{_h("rs", i) % 0xfffff:05x}-{i:06d}'
+
+    # ── core/v1 ──────────────────────────────────────────────
+    def namespace(self, i):
+        return {'metadata': {'name': self.namespace_name(i),
+                             'resourceVersion': RESOURCE_VERSION}}
+
+    def pod(self, i):
+        containers = []
+        statuses = []
+        for c in range(1 + _h('containers', i) % 2):
+            containers.append({
+                'name': f'c{c}',
+                'image': 'registry.local/app:1.0',
+                'resources': {
+                    'requests': {
+                        'cpu': CPU_REQUESTS[_h('cpu', i, c) % len(CPU_REQUESTS)],
+                        'memory': MEMORY_REQUESTS[_h('mem', i, c) % len(MEMORY_REQUESTS)],
+                    },
+                    'limits': {
+                        'cpu': CPU_REQUESTS[-1],
+                        'memory': MEMORY_REQUESTS[-1],
+                    },
+                },
+            })
+            statuses.append({
+                'name': f'c{c}',
+                'image': 'registry.local/app:1.0',
+                'imageID': 'sha256:0',
+                'ready': True,
+                'restartCount': _h('restarts', i, c) % 12 if i % 50 == 0 else 0,
+            })
+        pod = {
+            'metadata': {
+                'name': self.pod_name(i),
+                'namespace': self.namespace_name(self.pod_namespace_index(i)),
+                'uid': f'pod-{i}',
+                'resourceVersion': RESOURCE_VERSION,
+                'creationTimestamp': _ts(_h('age', i) % 2000),
+                'labels': {'app': self.pod_name(i).split('-')[0]},
+            },
+            'spec': {
+                'nodeName': self.node_name(i % self.n_nodes),
+                'containers': containers,
+            },
+            'status': {
+                'phase': PHASES[_h('phase', i) % len(PHASES)],
+                'containerStatuses': statuses,
+            },
+        }
+        if i < self.n_pvcs:
+            pod['spec']['volumes'] = [{
+                'name': 'data',
+                'persistentVolumeClaim': {'claimName': f'data-{i:06d}'},
+            }]
+        return pod
+
+    def node(self, i):
+        return {
+            'metadata': {'name': self.node_name(i),
+                         'resourceVersion': RESOURCE_VERSION},
+            'status': {
+                'capacity': {'cpu': '16', 'memory': '64Gi', 'pods': '110'},
+                'allocatable': {'cpu': '15800m', 'memory': '62Gi', 'pods': '110'},
+                'conditions': [{'type': 'Ready',
+                                'status': 'False' if i % 97 == 0 else 'True'}],
+            },
+        }
+
+    def pvc(self, i):
+        bound = i % 41 != 0
+        return {
+            'metadata': {'name': f'data-{i:06d}',
+                         'namespace': self.namespace_name(self.pod_namespace_index(i)),
+                         'resourceVersion': RESOURCE_VERSION},
+            'spec': {
+                'accessModes': ['ReadWriteOnce'],
+                'resources': {'requests': {'storage': '10Gi'}},
+                'storageClassName': 'standard',
+                'volumeName': f'pv-{i:06d}' if bound else None,
+            },
+            'status': {'phase': 'Bound' if bound else 'Pending'},
+        }
+
+    def pv(self, i):
+        return {
+            'metadata': {'name': f'pv-{i:06d}',
+                         'resourceVersion': RESOURCE_VERSION},
+            'spec': {'capacity': {'storage': '10Gi'},
+                     'persistentVolumeReclaimPolicy': 'Delete'},
+        }
+
+    def event(self, i):
+        pod_index = _h('event-pod', i) % max(self.n_pods, 1)
+        return {
+            'metadata': {'name': f'ev-{i:06d}',
+                         'namespace': self.namespace_name(self.pod_namespace_index(pod_index)),
+                         'resourceVersion': RESOURCE_VERSION},
+            'type': 'Warning',
+            'reason': EVENT_REASONS[i % len(EVENT_REASONS)],
+            'message': 'synthetic warning event',
+            'count': 1 + i % 5,
+            'firstTimestamp': _ts(2),
+            'lastTimestamp': _ts(0),
+            'involvedObject': {'kind': 'Pod', 'name': self.pod_name(pod_index),
+                               'namespace': self.namespace_name(self.pod_namespace_index(pod_index))},
+        }
+
+    # ── metrics.k8s.io ───────────────────────────────────────
+    def pod_usage(self, i):
+        pod = self.pod(i)
+        return {
+            'metadata': {'name': pod['metadata']['name'],
+                         'namespace': pod['metadata']['namespace']},
+            'containers': [{
+                'name': c['name'],
+                'usage': {'cpu': f'{_h("ucpu", i) % 900_000_000}n',
+                          'memory': f'{_h("umem", i) % 900_000}Ki'},
+            } for c in pod['spec']['containers']],
+        }
+
+    def node_usage(self, i):
+        return {'metadata': {'name': self.node_name(i)},
+                'usage': {'cpu': f'{_h("ncpu", i) % 15_000}m',
+                          'memory': f'{_h("nmem", i) % 60_000_000}Ki'}}
+
+    # ── kubelet stats/summary ────────────────────────────────
+    def stats_summary(self, node_index):
+        pods = []
+        for i in range(node_index, self.n_pods, self.n_nodes):
+            entry = {
+                'podRef': {'name': self.pod_name(i),
+                           'namespace': self.namespace_name(self.pod_namespace_index(i)),
+                           'uid': f'pod-{i}'},
+                'ephemeral-storage': {'usedBytes': _h('eph', i) % (2 * 1024 ** 3)},
+            }
+            if i < self.n_pvcs:
+                entry['volume'] = [{
+                    'name': 'data',
+                    'usedBytes': _h('pvc-used', i) % (10 * 1024 ** 3),
+                    'capacityBytes': 10 * 1024 ** 3,
+                    'pvcRef': {'name': f'data-{i:06d}',
+                               'namespace': entry['podRef']['namespace']},
+                }]
+            pods.append(entry)
+        return {'node': {'nodeName': self.node_name(node_index)}, 'pods': pods}
+
+
+def _paginate(indices, make, query, kind):
+    limit = int(query.get('limit', ['0'])[0] or 0)
+    start = int(query.get('continue', ['0'])[0] or 0)
+    end = len(indices) if not limit else min(len(indices), start + limit)
+    metadata = {'resourceVersion': RESOURCE_VERSION}
+    if end < len(indices):
+        metadata['continue'] = str(end)
+    return {'kind': kind, 'apiVersion': 'v1', 'metadata': metadata,
+            'items': [make(i) for i in indices[start:end]]}
+
+
+class Stats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def record(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'total': sum(self.calls.values()), 'calls': dict(self.calls)}
+
+
+def make_handler(cluster, stats, latency):
+    ns_pods = re.compile(r'^/api/v1/namespaces/([^/]+)/pods$')
+    ns_metrics = re.compile(r'^/apis/metrics.k8s.io/v1beta1/namespaces/([^/]+)/pods$')
+    node_metric = re.compile(r'^/apis/metrics.k8s.io/v1beta1/nodes/([^/]+)$')
+    node_stats = re.compile(r'^/api/v1/nodes/([^/]+)/proxy/stats/summary$')
+
+    def pods_in_namespace(ns):
+        if not ns.startswith('team-'):
+            return []
+        idx = int(ns.split('-')[1])
+        return range(idx, cluster.n_pods, cluster.n_namespaces)
+
+    def node_index(name):
+        return int(name.split('-')[1])
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            data = _dumps(body)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            path, query = url.path, parse_qs(url.query)
+
+            if path == '/_stats':
+                return self._send(200, stats.snapshot())
+
+            if query.get('watch', ['false'])[0] in ('true', '1'):
+                # Watch desteklenmez — bağlantıyı kısa bir süre tutup boş kapat
+                stats.record('watch')
+                time.sleep(min(int(query.get('timeoutSeconds', ['5'])[0]), 5))
+                return self._send(200, {})
+
+            if latency:
+                time.sleep(latency)
+
+            if path == '/api/v1/namespaces':
+                stats.record('namespaces')
+                return self._send(200, _paginate(
+                    range(cluster.n_namespaces), cluster.namespace, query, 'NamespaceList'))
+            if path == '/api/v1/pods':
+                stats.record('pods')
+                return self._send(200, _paginate(
+                    range(cluster.n_pods), cluster.pod, query, 'PodList'))
+            m = ns_pods.match(path)
+            if m:
+                stats.record('namespaced_pods')
+                return self._send(200, _paginate(
+                    pods_in_namespace(m.group(1)), cluster.pod, query, 'PodList'))
+            if path == '/api/v1/nodes':
+                stats.record('nodes')
+                return self._send(200, _paginate(
+                    range(cluster.n_nodes), cluster.node, query, 'NodeList'))
+            if path == '/api/v1/persistentvolumeclaims':
+                stats.record('pvcs')
+                return self._send(200, _paginate(
+                    range(cluster.n_pvcs), cluster.pvc, query,
+                    'PersistentVolumeClaimList'))
+            if path == '/api/v1/persistentvolumes':
+                stats.record('pvs')
+                return self._send(200, _paginate(
+                    range(cluster.n_pvcs), cluster.pv, query, 'PersistentVolumeList'))
+            if path == '/api/v1/events':
+                stats.record('events')
+                return self._send(200, _paginate(
+                    range(cluster.n_events), cluster.event, query, 'EventList'))
+            m = node_stats.match(path)
+            if m:
+                stats.record('stats_summary')
+                return self._send(200, cluster.stats_summary(node_index(m.group(1))))
+            if path == '/apis/metrics.k8s.io/v1beta1/pods':
+                stats.record('metrics_pods')
+                return self._send(200, {'items': [
+                    cluster.pod_usage(i) for i in range(cluster.n_pods)]})
+            m = ns_metrics.match(path)
+            if m:
+                stats.record('metrics_namespaced_pods')
+                return self._send(200, {'items': [
+                    cluster.pod_usage(i) for i in pods_in_namespace(m.group(1))]})
+            if path == '/apis/metrics.k8s.io/v1beta1/nodes':
+                stats.record('metrics_nodes')
+                return self._send(200, {'items': [
+                    cluster.node_usage(i) for i in range(cluster.n_nodes)]})
+            m = node_metric.match(path)
+            if m:
+                stats.record('metrics_node')
+                return self._send(200, cluster.node_usage(node_index(m.group(1))))
+
+            stats.record('not_found')
+            return self._send(404, {'kind': 'Status', 'code': 404,
+                                    'message': f'{path} not found'})
+
+    return Handler
+
+
+def serve(args):
+    cluster = SyntheticCluster(args.pods, args.namespaces, args.nodes,
+                               args.pvcs, args.events)
+    stats = Stats()
+    httpd = ThreadingHTTPServer(
+        (args.host, args.port),
+        make_handler(cluster, stats, args.latency_ms / 1000.0))
+    httpd.daemon_threads = True
+    # Benchmark bu satırı okuyarak portu öğrenir
+    print(f'listening on {args.host}:{httpd.server_address[1]}', flush=True)
+    httpd.serve_forever()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Fake Kubernetes API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--pods', type=int, default=50000)
+    parser.add_argument('--namespaces', type=int, default=600)
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--pvcs', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    return parser
+
+
+if __name__ == '__main__':
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    serve(build_parser().parse_args())
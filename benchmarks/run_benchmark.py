@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# benchmarks/run_benchmark.py
+"""
+Collector benchmark against the fake apiserver.
+
+Starts benchmarks/fake_apiserver.py in a subprocess (so its memory is
+not counted), writes a throwaway kubeconfig pointing at it and runs the
+collector phases one by one, then the full AsyncCollectionEngine cycle
+and — if a database URL is given — MetricRepository.save_metrics().
+Per phase it reports wall time, apiserver call count and peak RSS.
+
+Usage:
+    python benchmarks/run_benchmark.py --pods 50000 --latency-ms 20
+    python benchmarks/run_benchmark.py --pods 50000 --page-size 0   # eski mod
+    python benchmarks/run_benchmark.py --database-url sqlite:////tmp/bench.db
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+KUBECONFIG_TEMPLATE = """apiVersion: v1
+kind: Config
+clusters:
+- name: fake
+  cluster:
+    server: http://{host}:{port}
+contexts:
+- name: fake
+  context:
+    cluster: fake
+    user: fake
+current-context: fake
+users:
+- name: fake
+  user:
+    token: benchmark
+"""
+
+
+def peak_rss_mb():
+    # Linux'ta ru_maxrss KB cinsinden
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def start_fake_apiserver(args):
+    cmd = [sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_apiserver.py'),
+           '--host', '127.0.0.1', '--port', '0',
+           '--pods', str(args.pods), '--namespaces', str(args.namespaces),
+           '--nodes', str(args.nodes), '--pvcs', str(args.pvcs),
+           '--events', str(args.events), '--latency-ms', str(args.latency_ms)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline().strip()
+    if not line.startswith('listening on '):
+        proc.kill()
+        raise RuntimeError(f'fake apiserver failed to start: {line!r}')
+    host, port = line.rsplit(' ', 1)[1].rsplit(':', 1)
+    return proc, host, int(port)
+
+
+class Recorder:
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.results = []
+
+    def api_calls(self):
+        with urllib.request.urlopen(f'{self.base_url}/_stats') as resp:
+            return json.load(resp)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        before = self.api_calls()
+        started = time.perf_counter()
+        entry = {'phase': name}
+        try:
+            # Collector'ın namespace başına print'leri ölçümü boğmasın
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield entry
+        finally:
+            entry['wall_s'] = round(time.perf_counter() - started, 3)
+            after = self.api_calls()
+            entry['api_calls'] = after['total'] - before['total']
+            entry['api_calls_by_endpoint'] = {
+                k: v - before['calls'].get(k, 0)
+                for k, v in after['calls'].items()
+                if v - before['calls'].get(k, 0)}
+            entry['peak_rss_mb'] = round(peak_rss_mb(), 1)
+            self.results.append(entry)
+
+
+def run_collector_phases(rec, args):
+    from collector.k8s_client import K8sClient
+    from collector.async_engine import AsyncCollectionEngine
+
+    with rec.phase('connect'):
+        k8s = K8sClient()
+
+    if not args.skip_phases:
+        with rec.phase('pods') as entry:
+            metrics = k8s.collect_all_metrics()
+            entry['items'] = sum(ns['pod_count'] for ns in metrics)
+        with rec.phase('usage_snapshot') as entry:
+            usage = k8s.get_usage_snapshot()
+            entry['items'] = len(usage.pods)
+        with rec.phase('kubelet_stats') as entry:
+            volume_usage = k8s.get_volume_usage()
+            entry['items'] = len(volume_usage.pvcs) if volume_usage else 0
+        with rec.phase('nodes') as entry:
+            entry['items'] = len(k8s.collect_node_metrics(usage))
+        with rec.phase('pvcs') as entry:
+            entry['items'] = len(k8s.collect_pvc_metrics(volume_usage))
+        with rec.phase('events') as entry:
+            entry['items'] = len(k8s.list_warning_events())
+
+    with rec.phase('full_cycle') as entry:
+        snapshot = AsyncCollectionEngine({'bench': k8s}).snapshots()['bench']
+        entry['items'] = sum(ns['pod_count'] for ns in snapshot.metrics)
+    return snapshot
+
+
+def run_db_phase(rec, snapshot, database_url):
+    os.environ['DATABASE_URL'] = database_url
+    from db.models import Base, SessionLocal, engine
+    from db.repository import MetricRepository
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        repo = MetricRepository(db)
+        cluster = repo.get_or_create_cluster('benchmark', 'fake')
+        with rec.phase('db_write') as entry:
+            entry['items'] = repo.save_metrics(cluster.id, list(snapshot.metrics))
+    finally:
+        db.close()
+
+
+def print_report(results):
+    print(f"{'phase':<16}{'wall (s)':>10}{'API calls':>11}"
+          f"{'items':>9}{'peak RSS (MB)':>15}")
+    print('-' * 61)
+    for r in results:
+        print(f"{r['phase']:<16}{r['wall_s']:>10.3f}{r['api_calls']:>11}"
+              f"{r.get('items', ''):>9}{r['peak_rss_mb']:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KubePocket collector benchmark')
+    parser.add_argument('--pods', type=int, default=50000)
+    parser.add_argument('--namespaces', type=int, default=600)
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--pvcs', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=None,
+                        help='KUBEPOCKET_POD_PAGE_SIZE (0 = namespace başına liste)')
+    parser.add_argument('--no-raw-decode', action='store_true')
+    parser.add_argument('--no-compact-pods', action='store_true')
+    parser.add_argument('--no-kubelet-stats', action='store_true')
+    parser.add_argument('--skip-phases', action='store_true',
+                        help='Sadece tam döngüyü ölç')
+    parser.add_argument('--database-url', default=None,
+                        help='Verilirse save_metrics() süresi de ölçülür')
+    parser.add_argument('--json', dest='json_out', default=None,
+                        help='Sonuçları JSON olarak bu dosyaya yaz')
+    args = parser.parse_args()
+
+    # k8s_client modül sabitleri import sırasında okunur
+    os.environ['KUBEPOCKET_INFORMERS'] = 'false'
+    if args.page_size is not None:
+        os.environ['KUBEPOCKET_POD_PAGE_SIZE'] = str(args.page_size)
+    if args.no_raw_decode:
+        os.environ['KUBEPOCKET_RAW_DECODE'] = 'false'
+    if args.no_compact_pods:
+        os.environ['KUBEPOCKET_COMPACT_PODS'] = 'false'
+    if args.no_kubelet_stats:
+        os.environ['KUBEPOCKET_KUBELET_STATS'] = 'false'
+    os.environ.pop('KUBERNETES_SERVICE_HOST', None)
+
+    proc, host, port = start_fake_apiserver(args)
+    try:
+        with tempfile.NamedTemporaryFile('w', suffix='.kubeconfig',
+                                         delete=False) as f:
+            f.write(KUBECONFIG_TEMPLATE.format(host=host, port=port))
+        os.environ['KUBECONFIG'] = f.name
+
+        rec = Recorder(f'http://{host}:{port}')
+        snapshot = run_collector_phases(rec, args)
+        if args.database_url:
+            run_db_phase(rec, snapshot, args.database_url)
+    finally:
+        proc.terminate()
+        proc.wait()
+        if os.environ.get('KUBECONFIG', '').endswith('.kubeconfig'):
+            os.unlink(os.environ['KUBECONFIG'])
+
+    print(f"\nCluster: {args.pods} pods, {args.namespaces} namespaces, "
+          f"{args.nodes} nodes, {args.pvcs} PVCs, latency {args.latency_ms}ms\n")
+    print_report(rec.results)
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({'args': vars(args), 'results': rec.results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# collector/async_engine.py
+"""
+Concurrent asyncio collection engine.
+
+K8sClient is synchronous, so a cycle used to run the pod list, the
+Metrics Server usage snapshot, the node list and the PVC list one after
+another. AsyncCollectionEngine fans these calls out on a bounded
+worker pool (KUBEPOCKET_COLLECT_CONCURRENCY) — each K8sClient keeps its
+own urllib3 connection pool sized by KUBEPOCKET_K8S_POOL_SIZE — and
+across clusters, then merges the results into the exact structures
+collect_all_metrics_with_usage(), collect_node_metrics() and
+collect_pvc_metrics() return. Cycle wall time approaches the slowest
+single call instead of the sum of all calls.
+
+Usage:
+    engine = AsyncCollectionEngine({'prod-eu': K8sClient(context='prod-eu')})
+    results = engine.run()
+    results['prod-eu']['metrics'], results['prod-eu']['nodes'], ...
+
+run_collector --contexts a,b,c collects several kubeconfig contexts in
+one cycle through connect_contexts() / collect_contexts().
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from collector.kubelet_stats import VolumeUsageIndex
+from collector.snapshot import ClusterSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Aynı anda uçuşta olabilecek en fazla API çağrısı (tüm cluster'lar toplamı)
+COLLECT_CONCURRENCY = int(os.getenv('KUBEPOCKET_COLLECT_CONCURRENCY', '16'))
+
+ALL_PARTS = ('metrics', 'nodes', 'pvcs')
+# ClusterSnapshot: collect_once node listesini okumaz — 'nodes' parçası
+# informer yokken pod + node listesini ikinci kez çekerdi, bu yüzden dahil değil
+SNAPSHOT_PARTS = ('metrics', 'pvcs', 'events')
+
+
+class AsyncCollectionEngine:
+
+    def __init__(self, clients, concurrency=COLLECT_CONCURRENCY):
+        """clients: {cluster_name: K8sClient}"""
+        self.clients = clients
+        self.concurrency = max(1, concurrency)
+        self._executor = None
+        self._semaphore = None
+
+    def run(self, parts=ALL_PARTS):
+        """Senkron giriş noktası — collect_all() sonucunu döndürür."""
+        return asyncio.run(self.collect_all(parts))
+
+    def snapshots(self):
+        """Her cluster için döngü başına tek bir ClusterSnapshot."""
+        return {name: ClusterSnapshot.from_collected(name, collected)
+                for name, collected in self.run(SNAPSHOT_PARTS).items()}
+
+    async def collect_all(self, parts=ALL_PARTS):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='k8s-collect')
+        try:
+            names = list(self.clients)
+            results = await asyncio.gather(
+                *(self.collect_cluster(name, self.clients[name], parts)
+                  for name in names),
+                return_exceptions=True)
+        finally:
+            self._executor.shutdown(wait=False)
+
+        merged = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Cluster {name}: collection failed: {result}")
+                continue
+            merged[name] = result
+        return merged
+
+    async def collect_cluster(self, name, k8s, parts=ALL_PARTS):
+        started = time.monotonic()
+        tasks = {}
+
+        # Tek cluster-wide usage snapshot'ı pod ve node yolları paylaşır
+        usage = None
+        if 'metrics' in parts or 'nodes' in parts:
+            usage = asyncio.ensure_future(self._call(k8s.get_usage_snapshot))
+
+        # Kubelet stats/summary indeksi: PVC kullanımı + pod ephemeral-storage
+        volume_usage = None
+        if 'metrics' in parts or 'pvcs' in parts:
+            volume_usage = asyncio.ensure_future(self._volume_usage(name, k8s))
+
+        if 'metrics' in parts:
+            tasks['metrics'] = self._collect_metrics_with_usage(
+                k8s, usage, volume_usage)
+        if 'nodes' in parts:
+            tasks['nodes'] = self._collect_nodes(k8s, usage)
+        if 'pvcs' in parts:
+            tasks['pvcs'] = self._collect_pvcs(k8s, volume_usage)
+        if 'events' in parts:
+            tasks['events'] = self._call(k8s.list_warning_events)
+
+        # Parça bazında izolasyon: PVC/node/event hatası metrics'i düşürmez
+        values = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        result = {}
+        for part, value in zip(tasks.keys(), values):
+            if isinstance(value, Exception):
+                if part == 'metrics':
+                    raise value
+                logger.warning(f"Cluster {name}: {part} collection failed: {value}")
+                continue
+            result[part] = value
+        collected = ', '.join(result)
+        if usage is not None:
+            result['usage'] = await usage
+        if volume_usage is not None:
+            result['volume_usage'] = await volume_usage
+        logger.info(f"Cluster {name}: collected {collected} "
+                    f"in {time.monotonic() - started:.2f}s")
+        return result
+
+    async def _collect_metrics_with_usage(self, k8s, usage, volume_usage):
+        """collect_all_metrics_with_usage() ile aynı çıktı; pod listesi ve usage paralel."""
+        metrics = await self._call(k8s.collect_all_metrics)
+        usage_by_ns = (await usage).by_namespace()
+        volume_usage = await volume_usage
+        for ns_data in metrics:
+            k8s.apply_usage(ns_data, usage_by_ns.get(ns_data['namespace'], {}),
+                            volume_usage)
+        return metrics
+
+    async def _volume_usage(self, name, k8s):
+        """Kubelet stats/summary opsiyonel — hata olursa boş indeksle devam."""
+        try:
+            return await self._call(k8s.get_volume_usage)
+        except Exception as e:
+            logger.warning(f"Cluster {name}: kubelet stats/summary failed: {e}")
+            return VolumeUsageIndex()
+
+    async def _collect_nodes(self, k8s, usage):
+        return await self._call(k8s.collect_node_metrics, await usage)
+
+    async def _collect_pvcs(self, k8s, volume_usage):
+        return await self._call(k8s.collect_pvc_metrics, await volume_usage)
+
+    async def _call(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+
+def connect_contexts(contexts):
+    """{context: K8sClient} — bağlanamayan context'ler loglanıp atlanır."""
+    from collector.k8s_client import K8sClient
+
+    clients = {}
+    for context in contexts:
+        try:
+            clients[context] = K8sClient(context=context)
+        except Exception as e:
+            logger.error(f"Context {context}: connection failed: {e}")
+    return clients
+
+
+def collect_contexts(clients, concurrency=COLLECT_CONCURRENCY):
+    """Birden fazla cluster'ı tek döngüde paralel topla: {context: ClusterSnapshot}"""
+    return AsyncCollectionEngine(clients, concurrency).snapshots()
@@ -70,19 +70,31 @@ def _parse_k8s_time(dt):
 
 class EventCollector:
 
-    def __init__(self, cluster_id=None):
-        try:
-            config.load_incluster_config()
-        except:
-            config.load_kube_config()
-
-        self.core_v1 = client.CoreV1Api()
+    def __init__(self, cluster_id=None, k8s=None):
+        # K8sClient verilirse onun API client'ı (ve informer cache'i) kullanılır
+        self.k8s = k8s
+        if k8s is not None:
+            self.core_v1 = k8s.core_v1
+        else:
+            try:
+                config.load_incluster_config()
+            except:
+                config.load_kube_config()
+            self.core_v1 = client.CoreV1Api()
         self.cluster_id = cluster_id
 
-    def collect_events(self):
+    def _list_warning_events(self):
+        if self.k8s is not None:
+            return self.k8s.list_warning_events()
+        return self.core_v1.list_event_for_all_namespaces(
+            field_selector='type=Warning'  # sadece Warning event'leri
+        ).items
+
+    def collect_events(self, events=None):
         """
         Tüm namespace'lerden kritik event'leri topla ve DB'ye kaydet.
         Aynı (pod, event_type) için yeni kayıt eklemek yerine count'u güncelle.
+        events verilirse (ClusterSnapshot.events) API'ye gidilmez.
         """
         db = SessionLocal()
         saved = 0
@@ -90,11 +102,10 @@ class EventCollector:
 
         try:
             # Tüm namespace'lerden event'leri çek
-            events = self.core_v1.list_event_for_all_namespaces(
-                field_selector='type=Warning'  # sadece Warning event'leri
-            )
+            if events is None:
+                events = self._list_warning_events()
 
-            for event in events.items:
+            for event in events:
                 reason = event.reason or ''
                 if reason not in TRACKED_REASONS:
                     continue
@@ -0,0 +1,182 @@
+# collector/informer.py
+"""
+Informer-style list+watch cache for Kubernetes objects.
+
+Each Informer does one (paginated) initial list, then keeps an in-memory
+store current through a watch that resumes from the last resourceVersion.
+Bookmark events advance the resourceVersion without touching the store;
+a 410 Gone (resourceVersion too old) triggers a full relist.
+
+SharedInformers bundles the informers the collector, exporter and API
+need (namespaces, pods, nodes, PVCs, PVs, Warning events) so they can
+read from memory and the apiserver only sees deltas.
+"""
+import logging
+import os
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+# Sunucu tarafı watch zaman aşımı — süre dolunca son resourceVersion'dan devam edilir
+WATCH_TIMEOUT_SECONDS = int(
+    os.getenv('KUBEPOCKET_INFORMER_WATCH_TIMEOUT', '300'))
+# İlk listeleme ve relist için sayfa boyutu
+LIST_PAGE_SIZE = int(os.getenv('KUBEPOCKET_INFORMER_PAGE_SIZE', '500'))
+# Beklenmeyen hatalardan sonra yeniden deneme gecikmesi (saniye)
+RETRY_DELAY_SECONDS = 5
+
+
+def _object_key(obj):
+    meta = obj.metadata
+    return (meta.namespace or '', meta.name)
+
+
+class Informer:
+
+    def __init__(self, name, list_func, **list_kwargs):
+        self.name = name
+        self._list_func = list_func
+        self._list_kwargs = list_kwargs
+        self._store = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.resource_version = None
+        self.relists = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f'informer-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def has_synced(self):
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout=None):
+        return self._synced.wait(timeout)
+
+    def list(self):
+        """Store'daki nesnelerin anlık bir kopyası."""
+        with self._lock:
+            return list(self._store.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._store)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch()
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"Informer {self.name}: resourceVersion "
+                                f"expired (410 Gone), relisting")
+                    self.resource_version = None
+                    continue
+                logger.warning(f"Informer {self.name}: API error: {e}")
+                self._stop.wait(RETRY_DELAY_SECONDS)
+            except Exception as e:
+                logger.warning(f"Informer {self.name}: {e}")
+                self._stop.wait(RETRY_DELAY_SECONDS)
+
+    def _relist(self):
+        store = {}
+        _continue = None
+        while True:
+            kwargs = dict(self._list_kwargs, limit=LIST_PAGE_SIZE)
+            if _continue:
+                kwargs['_continue'] = _continue
+            page = self._list_func(**kwargs)
+            for obj in page.items:
+                store[_object_key(obj)] = obj
+            _continue = page.metadata._continue
+            if not _continue:
+                break
+
+        with self._lock:
+            self._store = store
+        self.resource_version = page.metadata.resource_version
+        self.relists += 1
+        self._synced.set()
+        logger.info(f"Informer {self.name}: listed {len(store)} objects "
+                    f"(resourceVersion {self.resource_version})")
+
+    def _watch(self):
+        w = watch.Watch()
+        try:
+            for event in w.stream(self._list_func,
+                                  resource_version=self.resource_version,
+                                  allow_watch_bookmarks=True,
+                                  timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                                  **self._list_kwargs):
+                if self._stop.is_set():
+                    break
+
+                event_type = event['type']
+                if event_type == 'ERROR':
+                    raw = event.get('raw_object') or {}
+                    raise ApiException(status=raw.get('code'),
+                                       reason=raw.get('message'))
+
+                obj = event['object']
+                if event_type == 'ADDED' or event_type == 'MODIFIED':
+                    with self._lock:
+                        self._store[_object_key(obj)] = obj
+                elif event_type == 'DELETED':
+                    with self._lock:
+                        self._store.pop(_object_key(obj), None)
+
+                # BOOKMARK dahil her olay resourceVersion'ı ilerletir
+                self.resource_version = obj.metadata.resource_version
+        finally:
+            w.stop()
+
+
+class SharedInformers:
+    """Collector, exporter ve API'nin paylaştığı informer seti."""
+
+    def __init__(self, core_v1):
+        self.namespaces = Informer('namespaces', core_v1.list_namespace)
+        self.pods = Informer('pods', core_v1.list_pod_for_all_namespaces)
+        self.nodes = Informer('nodes', core_v1.list_node)
+        self.pvcs = Informer(
+            'pvcs', core_v1.list_persistent_volume_claim_for_all_namespaces)
+        self.pvs = Informer('pvs', core_v1.list_persistent_volume)
+        self.events = Informer('events', core_v1.list_event_for_all_namespaces,
+                               field_selector='type=Warning')
+
+    def all(self):
+        return [self.namespaces, self.pods, self.nodes,
+                self.pvcs, self.pvs, self.events]
+
+    def start(self):
+        for informer in self.all():
+            informer.start()
+        return self
+
+    def stop(self):
+        for informer in self.all():
+            informer.stop()
+
+    def wait_for_sync(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        for informer in self.all():
+            remaining = max(0.0, deadline - time.monotonic())
+            if not informer.wait_for_sync(remaining):
+                logger.warning(f"Informer {informer.name} not synced "
+                               f"after {timeout}s")
+                return False
+        return True
@@ -1,109 +1,165 @@
 # collector/k8s_client.py
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from collector.informer import SharedInformers
+from collector.usage import UsageSnapshot, efficiency_fields
+from collector.pod_table import PodTable
+from collector.kubelet_stats import StatsSummaryHarvester, VolumeUsageIndex
+from collector import quantity
+from collector.snapshot import find_high_restart_pods
 import os
+import threading
 from datetime import datetime
 import time
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Namespace'ler bu prefix'lerle başlıyorsa toplanmaz
+SKIPPED_NAMESPACE_PREFIXES = ('kube-', 'minikube', 'kubernetes')
+
+# list_pod_for_all_namespaces sayfa boyutu.
+# 0 → eski mod (namespace başına bir list_namespaced_pod çağrısı)
+POD_PAGE_SIZE = int(os.getenv('KUBEPOCKET_POD_PAGE_SIZE', '500'))
+
+# Pod listelerini V1Pod nesnelerine çevirmeden ham JSON'dan oku
+RAW_DECODE = os.getenv('KUBEPOCKET_RAW_DECODE', 'true').lower() == 'true'
+
+# Pod kayıtlarını sözlük listesi yerine kolon bazlı PodTable'da tut
+COMPACT_PODS = os.getenv('KUBEPOCKET_COMPACT_PODS', 'true').lower() == 'true'
+
+# Cluster başına HTTP bağlantı havuzu boyutu (eşzamanlı çağrı sayısı)
+CONNECTION_POOL_SIZE = int(os.getenv('KUBEPOCKET_K8S_POOL_SIZE', '20'))
+
+# PVC / ephemeral-storage kullanımı için kubelet stats/summary (nodes/proxy yetkisi gerekir)
+KUBELET_STATS_ENABLED = os.getenv(
+    'KUBEPOCKET_KUBELET_STATS', 'true').lower() == 'true'
+
+# Exporter ve API süreçlerinde paylaşılan informer cache'i
+INFORMERS_ENABLED = os.getenv(
+    'KUBEPOCKET_INFORMERS', 'true').lower() == 'true'
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """
+    Süreç genelinde tek bir K8sClient döndür (exporter / API route'ları).
+    Informer'lar açıksa her istek apiserver'a gitmek yerine bellekten okur.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            k8s = K8sClient()
+            if INFORMERS_ENABLED:
+                # İstekleri bekletme — senkron olana kadar API'ye düşülür
+                k8s.start_informers(wait_timeout=0)
+            _shared_client = k8s
+        return _shared_client
+
 
 class K8sClient:
     def __init__(self, context=None):
+        # Her client kendi Configuration/ApiClient'ını kullanır; böylece
+        # aynı süreçte birden fazla cluster (context) yan yana çalışabilir.
+        # context verildiyse doğrudan kubeconfig: in-cluster config onu yok
+        # sayar ve her context için yerel cluster'ı toplardı.
+        configuration = client.Configuration()
         try:
-            config.load_incluster_config()
-            print("✅ In-cluster config yüklendi")
-        except:
-            try:
-                config.load_kube_config(context=context)
-                print(
-                    f"✅ Kubeconfig yüklendi (context: {context or 'default'})")
-            except Exception as e:
-                print(f"❌ Kubernetes bağlantı hatası: {e}")
-                raise
+            if context is None:
+                try:
+                    config.load_incluster_config(client_configuration=configuration)
+                    print("✅ In-cluster config yüklendi")
+                except config.ConfigException:
+                    config.load_kube_config(client_configuration=configuration)
+                    print("✅ Kubeconfig yüklendi (context: default)")
+            else:
+                config.load_kube_config(context=context,
+                                        client_configuration=configuration)
+                print(f"✅ Kubeconfig yüklendi (context: {context})")
+        except Exception as e:
+            print(f"❌ Kubernetes bağlantı hatası: {e}")
+            raise
 
-        self.core_v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
+        # Eşzamanlı çağrılar için urllib3 bağlantı havuzu
+        configuration.connection_pool_maxsize = CONNECTION_POOL_SIZE
+        self.context = context
+        self.api_client = client.ApiClient(configuration)
+        self.core_v1 = client.CoreV1Api(self.api_client)
+        self.apps_v1 = client.AppsV1Api(self.api_client)
 
         try:
-            self.metrics_api = client.CustomObjectsApi()
+            self.metrics_api = client.CustomObjectsApi(self.api_client)
             self.has_metrics = True
         except:
             self.has_metrics = False
             print("⚠️ Metrics API bulunamadı")
 
+        self.informers = None
+
+    def start_informers(self, wait_timeout=60):
+        """
+        Pod, node, PVC, PV ve Warning event'ler için list+watch cache'i
+        başlat. Senkronize olana kadar metodlar doğrudan API'ye düşer.
+        """
+        if self.informers is None:
+            self.informers = SharedInformers(self.core_v1).start()
+            if wait_timeout:
+                self.informers.wait_for_sync(wait_timeout)
+        return self.informers
+
+    def _synced(self, informer_name):
+        return (self.informers is not None
+                and getattr(self.informers, informer_name).has_synced())
+
+    def _list_objects(self, informer_name, list_func, **kwargs):
+        """Informer senkronsa store'dan, değilse doğrudan API'den listele."""
+        if self._synced(informer_name):
+            return getattr(self.informers, informer_name).list()
+        return list_func(**kwargs).items
+
     def parse_cpu(self, cpu_str):
-        if not cpu_str:
-            return 0
-        if cpu_str.endswith('n'):      # nanoseconds — Metrics Server kullanır
-            return float(cpu_str[:-1]) / 1_000_000_000
-        if cpu_str.endswith('u'):      # microseconds
-            return float(cpu_str[:-1]) / 1_000_000
-        if cpu_str.endswith('m'):      # millicores
-            return float(cpu_str[:-1]) / 1000
-        return float(cpu_str)
+        """CPU quantity → core (tam Quantity grameri, memoized)"""
+        return quantity.parse_cpu(cpu_str)
 
     def parse_memory(self, mem_str):
-        if not mem_str:
-            return 0
-        multipliers = {
-            'Ki': 1/1024/1024,
-            'Mi': 1/1024,
-            'Gi': 1,
-            'Ti': 1024
-        }
-        for unit, multiplier in multipliers.items():
-            if mem_str.endswith(unit):
-                return float(mem_str[:-2]) * multiplier
-        return float(mem_str) / (1024**3)
+        """Memory / storage quantity → GiB (tam Quantity grameri, memoized)"""
+        return quantity.parse_memory(mem_str)
 
     def collect_all_metrics(self):
+        if self._synced('pods') and self._synced('namespaces'):
+            namespaces = [ns.metadata.name
+                          for ns in self.informers.namespaces.list()]
+            pod_infos = [self._process_pod(pod)
+                         for pod in self.informers.pods.list()]
+            return self._group_pods(namespaces, [pod_infos],
+                                    source='informer cache')
+
+        if POD_PAGE_SIZE > 0:
+            return self.collect_all_metrics_paginated(POD_PAGE_SIZE)
+
         try:
             namespaces = self.core_v1.list_namespace()
             results = []
 
             for ns in namespaces.items:
                 ns_name = ns.metadata.name
-                if ns_name.startswith(('kube-', 'minikube', 'kubernetes')):
+                if self._is_skipped_namespace(ns_name):
                     continue
 
                 print(f"📊 {ns_name} kontrol ediliyor...")
-                pods = self.core_v1.list_namespaced_pod(ns_name)
-
-                namespace_data = {
-                    'namespace': ns_name,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'pods': [],
-                    'total_restarts': 0,
-                    'total_cpu_request': 0,
-                    'total_memory_request': 0,
-                    'total_cpu_limit': 0,
-                    'total_memory_limit': 0,
-                    'pod_count': len(pods.items),
-                    'running_pods': 0,
-                    'pending_pods': 0,
-                    'failed_pods': 0
-                }
+                pod_infos, _ = self._list_pod_infos(
+                    self.core_v1.list_namespaced_pod, namespace=ns_name)
 
-                for pod in pods.items:
-                    pod_info = self._process_pod(pod)
-                    namespace_data['pods'].append(pod_info)
-                    namespace_data['total_restarts'] += pod_info['restart_count']
-                    namespace_data['total_cpu_request'] += pod_info['cpu_request']
-                    namespace_data['total_memory_request'] += pod_info['memory_request']
-                    namespace_data['total_cpu_limit'] += pod_info['cpu_limit']
-                    namespace_data['total_memory_limit'] += pod_info['memory_limit']
-
-                    if pod_info['status'] == 'Running':
-                        namespace_data['running_pods'] += 1
-                    elif pod_info['status'] == 'Pending':
-                        namespace_data['pending_pods'] += 1
-                    elif pod_info['status'] == 'Failed':
-                        namespace_data['failed_pods'] += 1
+                namespace_data = self._new_namespace_data(ns_name)
+                for pod_info in pod_infos:
+                    self._add_pod(namespace_data, pod_info)
 
                 results.append(namespace_data)
-                print(f"   → {namespace_data['pod_count']} pod, "
-                      f"{namespace_data['total_cpu_request']:.2f} CPU, "
-                      f"{namespace_data['total_memory_request']:.2f} Gi, "
-                      f"{namespace_data['total_restarts']} restart")
+                self._print_namespace_summary(namespace_data)
 
             return results
 
@@ -111,6 +167,142 @@ class K8sClient:
             print(f"❌ API Hatası: {e}")
             return []
 
+    def collect_all_metrics_paginated(self, page_size=500):
+        """
+        Tek bir list_pod_for_all_namespaces çağrısı ile (limit/_continue
+        sayfalama) tüm pod'ları topla ve namespace bazında grupla.
+
+        Namespace sözlükleri sayfalar geldikçe doldurulur; ham sayfa
+        verisi işlendikten sonra bırakılır, böylece bellek
+        kullanımı sayfa boyutuyla sınırlı kalır. Namespace sayısından
+        bağımsız olarak birkaç round trip yeterlidir.
+        """
+        try:
+            # Boş namespace'ler de (pod_count=0) raporlansın diye tek çağrı
+            namespaces = [ns.metadata.name
+                          for ns in self.core_v1.list_namespace().items]
+            return self._group_pods(namespaces,
+                                    self._iter_pod_pages(page_size),
+                                    source=f'sayfa boyutu: {page_size}')
+
+        except ApiException as e:
+            print(f"❌ API Hatası: {e}")
+            return []
+
+    def _group_pods(self, namespaces, pod_pages, source=''):
+        """pod_info sayfalarını namespace sözlüklerine dağıt."""
+        by_namespace = {}
+        for ns_name in namespaces:
+            if not self._is_skipped_namespace(ns_name):
+                by_namespace[ns_name] = self._new_namespace_data(ns_name)
+
+        pages = 0
+        for items in pod_pages:
+            pages += 1
+            for pod_info in items:
+                ns_name = pod_info['namespace']
+                if self._is_skipped_namespace(ns_name):
+                    continue
+                namespace_data = by_namespace.get(ns_name)
+                if namespace_data is None:
+                    namespace_data = self._new_namespace_data(ns_name)
+                    by_namespace[ns_name] = namespace_data
+                self._add_pod(namespace_data, pod_info)
+
+        results = list(by_namespace.values())
+        print(f"📊 {len(results)} namespace, {pages} sayfa ({source})")
+        for namespace_data in results:
+            self._print_namespace_summary(namespace_data)
+
+        return results
+
+    def _iter_pod_pages(self, page_size, process=None, process_raw=None):
+        """
+        list_pod_for_all_namespaces sonuçlarını sayfa sayfa döndür
+        (process / process_raw: _list_pod_infos() dönüştürücüleri).
+        Continue token'ı süresi dolarsa (410 Gone) listeleme baştan
+        başlatılamaz — kısmi sonuçlar zaten işlendi — bu yüzden hata
+        yukarı iletilir ve döngü bir sonraki periyotta tekrar dener.
+        """
+        _continue = None
+        while True:
+            kwargs = {'limit': page_size}
+            if _continue:
+                kwargs['_continue'] = _continue
+            pod_infos, _continue = self._list_pod_infos(
+                self.core_v1.list_pod_for_all_namespaces,
+                process, process_raw, **kwargs)
+            yield pod_infos
+            if not _continue:
+                break
+
+    def _list_pod_infos(self, list_func, process=None, process_raw=None, **kwargs):
+        """
+        Pod listesini çek ve pod_info sözlüklerine çevir (varsayılan
+        _process_pod / _process_pod_raw; başka alanlar için dönüştürücü
+        verilebilir). RAW_DECODE açıkken yanıt V1Pod nesnelerine
+        deserialize edilmez: ham JSON hızlı parser ile okunur ve sadece
+        gereken alanlar alınır.
+        Dönüş: (pod_info listesi, continue token)
+        """
+        if RAW_DECODE:
+            process_raw = process_raw or self._process_pod_raw
+            resp = list_func(_preload_content=False, **kwargs)
+            body = json_loads(resp.data)
+            pod_infos = [process_raw(item) for item in body.get('items') or []]
+            return pod_infos, (body.get('metadata') or {}).get('continue')
+
+        process = process or self._process_pod
+        page = list_func(**kwargs)
+        return ([process(pod) for pod in page.items],
+                page.metadata._continue)
+
+    @staticmethod
+    def _is_skipped_namespace(ns_name):
+        return ns_name.startswith(SKIPPED_NAMESPACE_PREFIXES)
+
+    @staticmethod
+    def _new_namespace_data(ns_name):
+        return {
+            'namespace': ns_name,
+            'timestamp': datetime.utcnow().isoformat(),
+            'pods': PodTable() if COMPACT_PODS else [],
+            'total_restarts': 0,
+            'total_cpu_request': 0,
+            'total_memory_request': 0,
+            'total_cpu_limit': 0,
+            'total_memory_limit': 0,
+            'pod_count': 0,
+            'running_pods': 0,
+            'pending_pods': 0,
+            'failed_pods': 0
+        }
+
+    @staticmethod
+    def _add_pod(namespace_data, pod_info):
+        namespace_data['pods'].append(pod_info)
+        namespace_data['pod_count'] += 1
+        namespace_data['total_restarts'] += pod_info['restart_count']
+        namespace_data['total_cpu_request'] += pod_info['cpu_request']
+        namespace_data['total_memory_request'] += pod_info['memory_request']
+        namespace_data['total_cpu_limit'] += pod_info['cpu_limit']
+        namespace_data['total_memory_limit'] += pod_info['memory_limit']
+
+        if pod_info['status'] == 'Running':
+            namespace_data['running_pods'] += 1
+        elif pod_info['status'] == 'Pending':
+            namespace_data['pending_pods'] += 1
+        elif pod_info['status'] == 'Failed':
+            namespace_data['failed_pods'] += 1
+
+    @staticmethod
+    def _print_namespace_summary(namespace_data):
+        print(f"   → {namespace_data['namespace']}: "
+              f"{namespace_data['pod_count']} pod, "
+              f"{namespace_data['total_cpu_request']:.2f} CPU, "
+              f"{namespace_data['total_memory_request']:.2f} Gi, "
+              f"{namespace_data['total_restarts']} restart")
+
     def _process_pod(self, pod):
         restart_count = 0
         if pod.status.container_statuses:
@@ -151,66 +343,184 @@ class K8sClient:
             'created_at': pod.metadata.creation_timestamp.isoformat(),
         }
 
-    def get_high_restart_pods(self, threshold=5):
-        all_metrics = self.collect_all_metrics()
-        problematic = []
-        for ns_data in all_metrics:
-            for pod in ns_data['pods']:
-                if pod['restart_count'] >= threshold:
-                    problematic.append({
-                        'namespace': ns_data['namespace'],
-                        'pod_name': pod['name'],
-                        'restarts': pod['restart_count'],
-                        'status': pod['status']
-                    })
-        return problematic
-
-    def get_actual_usage(self, namespace):
-        """Metrics Server'dan gerçek CPU/memory kullanımını çek."""
+    def _process_pod_raw(self, item):
+        """_process_pod() ile aynı çıktı, ham JSON sözlüğünden."""
+        metadata = item.get('metadata') or {}
+        spec = item.get('spec') or {}
+        status = item.get('status') or {}
+
+        restart_count = sum(cs.get('restartCount', 0)
+                            for cs in status.get('containerStatuses') or [])
+
+        cpu_request = 0
+        memory_request = 0
+        cpu_limit = 0
+        memory_limit = 0
+
+        for container in spec.get('containers') or []:
+            resources = container.get('resources') or {}
+            requests = resources.get('requests')
+            limits = resources.get('limits')
+            if requests:
+                cpu_request += self.parse_cpu(requests.get('cpu', '0'))
+                memory_request += self.parse_memory(requests.get('memory', '0'))
+            if limits:
+                cpu_limit += self.parse_cpu(limits.get('cpu', '0'))
+                memory_limit += self.parse_memory(limits.get('memory', '0'))
+
+        created = datetime.fromisoformat(
+            metadata['creationTimestamp'].replace('Z', '+00:00'))
+        age = datetime.utcnow() - created.replace(tzinfo=None)
+
+        return {
+            'name': metadata.get('name'),
+            'namespace': metadata.get('namespace'),
+            'status': status.get('phase'),
+            'restart_count': restart_count,
+            'cpu_request': cpu_request,
+            'memory_request': memory_request,
+            'cpu_limit': cpu_limit,
+            'memory_limit': memory_limit,
+            'node_name': spec.get('nodeName'),
+            'age_hours': age.total_seconds() / 3600,
+            'created_at': created.isoformat(),
+        }
+
+    @staticmethod
+    def _node_requests(pod):
+        """V1Pod → (node adı, [(cpu, memory) request'leri]) — container başına"""
+        requests = [(c.resources.requests.get('cpu', '0'),
+                     c.resources.requests.get('memory', '0'))
+                    for c in pod.spec.containers
+                    if c.resources and c.resources.requests]
+        return pod.spec.node_name, requests
+
+    @staticmethod
+    def _node_requests_raw(item):
+        """_node_requests() ile aynı çıktı, ham JSON sözlüğünden."""
+        spec = item.get('spec') or {}
+        requests = []
+        for container in spec.get('containers') or []:
+            container_requests = (container.get('resources') or {}).get('requests')
+            if container_requests:
+                requests.append((container_requests.get('cpu', '0'),
+                                 container_requests.get('memory', '0')))
+        return spec.get('nodeName'), requests
+
+    def _iter_node_request_pages(self):
+        """
+        Tüm pod'ların (node, request'ler) çiftleri, sayfa sayfa. Informer
+        senkronsa store'dan; değilse collect_all_metrics() gibi POD_PAGE_SIZE
+        sayfaları ve RAW_DECODE ile (sadece spec.nodeName ve request'ler).
+        """
+        if self._synced('pods'):
+            return [[self._node_requests(pod) for pod in self.informers.pods.list()]]
+        if POD_PAGE_SIZE > 0:
+            return self._iter_pod_pages(POD_PAGE_SIZE, self._node_requests,
+                                        self._node_requests_raw)
+        pods, _ = self._list_pod_infos(self.core_v1.list_pod_for_all_namespaces,
+                                       self._node_requests, self._node_requests_raw)
+        return [pods]
+
+    def get_high_restart_pods(self, threshold=5, metrics=None):
+        """metrics verilirse (ör. ClusterSnapshot) cluster yeniden listelenmez."""
+        if metrics is None:
+            metrics = self.collect_all_metrics()
+        return find_high_restart_pods(metrics, threshold)
+
+    def list_warning_events(self):
+        """Warning tipindeki event'ler — informer senkronsa bellekten."""
+        return self._list_objects(
+            'events', self.core_v1.list_event_for_all_namespaces,
+            field_selector='type=Warning')
+
+    def get_usage_snapshot(self):
+        """
+        Tek bir cluster-scoped pods listesi ve tek bir nodes listesi ile
+        tüm cluster'ın Metrics Server kullanımını indeksle.
+        """
+        pods = {}
+        nodes = {}
         if not self.has_metrics:
-            return {}
+            return UsageSnapshot()
+
         try:
-            pod_metrics = self.metrics_api.list_namespaced_custom_object(
-                group='metrics.k8s.io',
-                version='v1beta1',
-                namespace=namespace,
-                plural='pods'
-            )
-            usage = {}
+            pod_metrics = self.metrics_api.list_cluster_custom_object(
+                group='metrics.k8s.io', version='v1beta1', plural='pods')
             for item in pod_metrics.get('items', []):
-                pod_name = item['metadata']['name']
-                cpu_total = 0
-                mem_total = 0
-                for container in item.get('containers', []):
-                    cpu_total += self.parse_cpu(
-                        container['usage'].get('cpu', '0'))
-                    mem_total += self.parse_memory(
-                        container['usage'].get('memory', '0'))
-                usage[pod_name] = {
-                    'cpu_actual': round(cpu_total, 4),
-                    'memory_actual_gib': round(mem_total, 4),
+                meta = item['metadata']
+                pods[(meta['namespace'], meta['name'])] = self._pod_usage(item)
+        except Exception as e:
+            print(f"⚠️ Pod usage alınamadı: {e}")
+
+        try:
+            node_metrics = self.metrics_api.list_cluster_custom_object(
+                group='metrics.k8s.io', version='v1beta1', plural='nodes')
+            for item in node_metrics.get('items', []):
+                nodes[item['metadata']['name']] = {
+                    'cpu_actual': round(self.parse_cpu(
+                        item['usage']['cpu']), 4),
+                    'memory_actual_gib': round(self.parse_memory(
+                        item['usage']['memory']), 4),
                 }
-            return usage
-        except Exception:
-            return {}
+        except Exception as e:
+            print(f"⚠️ Node usage alınamadı: {e}")
+
+        return UsageSnapshot(pods=pods, nodes=nodes)
+
+    def _pod_usage(self, item):
+        cpu_total = 0
+        mem_total = 0
+        for container in item.get('containers', []):
+            cpu_total += self.parse_cpu(
+                container['usage'].get('cpu', '0'))
+            mem_total += self.parse_memory(
+                container['usage'].get('memory', '0'))
+        return {
+            'cpu_actual': round(cpu_total, 4),
+            'memory_actual_gib': round(mem_total, 4),
+        }
 
-    def collect_pvc_metrics(self):
-        """PVC ve PV bazlı storage izleme."""
+    def get_volume_usage(self):
+        """
+        Tüm kubelet'lerin stats/summary çıktısından PVC ve ephemeral-storage
+        kullanım indeksi (node başına bir istek, paralel).
+        """
+        if not KUBELET_STATS_ENABLED:
+            return VolumeUsageIndex()
+        # Kubelet erişimi opsiyonel: hata pod/PVC toplamayı durdurmamalı
+        try:
+            nodes = self._list_objects('nodes', self.core_v1.list_node)
+            return StatsSummaryHarvester(self.core_v1).harvest(
+                node.metadata.name for node in nodes)
+        except Exception as e:
+            print(f"⚠️ Kubelet stats/summary alınamadı: {e}")
+            return VolumeUsageIndex()
+
+    def collect_pvc_metrics(self, volume_usage=None):
+        """
+        PVC ve PV bazlı storage izleme.
+        Gerçek kullanım kubelet stats/summary indeksinden okunur.
+        """
         try:
-            pvcs = self.core_v1.list_persistent_volume_claim_for_all_namespaces()
-            pvs = self.core_v1.list_persistent_volume()
+            if volume_usage is None:
+                volume_usage = self.get_volume_usage()
+
+            pvcs = self._list_objects(
+                'pvcs', self.core_v1.list_persistent_volume_claim_for_all_namespaces)
+            pvs = self._list_objects('pvs', self.core_v1.list_persistent_volume)
 
             # PV capacity map
             pv_capacity = {}
             pv_reclaim = {}
-            for pv in pvs.items:
+            for pv in pvs:
                 name = pv.metadata.name
                 pv_capacity[name] = self.parse_memory(
                     pv.spec.capacity.get('storage', '0'))
                 pv_reclaim[name] = pv.spec.persistent_volume_reclaim_policy or 'Retain'
 
             results = []
-            for pvc in pvcs.items:
+            for pvc in pvcs:
                 namespace = pvc.metadata.namespace
                 name = pvc.metadata.name
                 phase = pvc.status.phase or 'Unknown'
@@ -222,20 +532,9 @@ class K8sClient:
                     pv_name, requested) if pv_name else requested
                 access_modes = pvc.spec.access_modes or []
 
-                # Prometheus node-exporter'dan actual kullanım
-                actual_gib = None
+                # Kubelet stats/summary'den actual kullanım
+                actual_gib = volume_usage.pvc_used_gib(namespace, name)
                 used_pct = None
-                try:
-                    result = self.metrics_api.list_cluster_custom_object(
-                        group='metrics.k8s.io', version='v1beta1', plural='persistentvolumeclaims'
-                    )
-                    for item in result.get('items', []):
-                        if item['metadata']['name'] == name and item['metadata']['namespace'] == namespace:
-                            actual_gib = self.parse_memory(
-                                item.get('usage', {}).get('storage', '0'))
-                            break
-                except Exception:
-                    pass
 
                 if actual_gib is not None and capacity > 0:
                     used_pct = round(actual_gib / capacity * 100, 1)
@@ -261,32 +560,42 @@ class K8sClient:
             print(f"❌ PVC metrics hatası: {e}")
             return []
 
-    def collect_node_metrics(self):
-        """Node bazlı kapasite, allocatable ve pod dağılımı."""
+    def collect_node_metrics(self, usage=None):
+        """
+        Node bazlı kapasite, allocatable ve pod dağılımı.
+        usage verilmezse cluster-wide UsageSnapshot tek seferde çekilir.
+        """
         try:
-            nodes = self.core_v1.list_node()
-            all_pods = self.core_v1.list_pod_for_all_namespaces()
+            if usage is None:
+                usage = self.get_usage_snapshot()
+
+            nodes = self._list_objects('nodes', self.core_v1.list_node)
 
-            # Pod -> node mapping
+            # Pod -> node mapping; request'ler kolon olarak toplanıp
+            # tek bir batch çağrısıyla parse edilir
             node_pods = {}
+            req_nodes, req_cpu, req_mem = [], [], []
+            for page in self._iter_node_request_pages():
+                for node, requests in page:
+                    if not node:
+                        continue
+                    node_pods[node] = node_pods.get(node, 0) + 1
+                    for cpu, memory in requests:
+                        req_nodes.append(node)
+                        req_cpu.append(cpu)
+                        req_mem.append(memory)
+
             node_cpu_requested = {}
             node_mem_requested = {}
-            for pod in all_pods.items:
-                node = pod.spec.node_name
-                if not node:
-                    continue
-                node_pods[node] = node_pods.get(node, 0) + 1
-                for container in pod.spec.containers:
-                    if container.resources and container.resources.requests:
-                        node_cpu_requested[node] = node_cpu_requested.get(node, 0) + \
-                            self.parse_cpu(
-                                container.resources.requests.get('cpu', '0'))
-                        node_mem_requested[node] = node_mem_requested.get(node, 0) + \
-                            self.parse_memory(
-                                container.resources.requests.get('memory', '0'))
+            cpu_values = quantity.parse_quantities(req_cpu).tolist()
+            mem_values = quantity.parse_quantities(
+                req_mem, scale=quantity.GIB).tolist()
+            for node, cpu, mem in zip(req_nodes, cpu_values, mem_values):
+                node_cpu_requested[node] = node_cpu_requested.get(node, 0) + cpu
+                node_mem_requested[node] = node_mem_requested.get(node, 0) + mem
 
             results = []
-            for node in nodes.items:
+            for node in nodes:
                 name = node.metadata.name
                 cap = node.status.capacity
                 alloc = node.status.allocatable
@@ -301,21 +610,9 @@ class K8sClient:
                 mem_requested = round(node_mem_requested.get(name, 0), 4)
 
                 # Actual usage from Metrics Server
-                cpu_actual = None
-                mem_actual = None
-                try:
-                    node_metrics = self.metrics_api.get_cluster_custom_object(
-                        group='metrics.k8s.io',
-                        version='v1beta1',
-                        plural='nodes',
-                        name=name
-                    )
-                    cpu_actual = round(self.parse_cpu(
-                        node_metrics['usage']['cpu']), 4)
-                    mem_actual = round(self.parse_memory(
-                        node_metrics['usage']['memory']), 4)
-                except Exception:
-                    pass
+                node_usage = usage.node(name) or {}
+                cpu_actual = node_usage.get('cpu_actual')
+                mem_actual = node_usage.get('memory_actual_gib')
 
                 # Conditions
                 conditions = {}
@@ -351,24 +648,35 @@ class K8sClient:
             print(f"❌ Node metrics hatası: {e}")
             return []
 
-    def collect_all_metrics_with_usage(self):
-        """collect_all_metrics() + Metrics Server'dan gerçek kullanım."""
+    def collect_all_metrics_with_usage(self, usage=None, volume_usage=None):
+        """
+        collect_all_metrics() + Metrics Server'dan gerçek kullanım.
+        volume_usage verilirse pod'lara ephemeral-storage kullanımı da eklenir.
+        """
         metrics = self.collect_all_metrics()
+        if usage is None:
+            usage = self.get_usage_snapshot()
 
+        usage_by_ns = usage.by_namespace()
         for ns_data in metrics:
-            actual = self.get_actual_usage(ns_data['namespace'])
-            for pod in ns_data['pods']:
-                usage = actual.get(pod['name'], {})
-                cpu_req = pod.get('cpu_request', 0)
-                mem_req = pod.get('memory_request', 0)
-                cpu_act = usage.get('cpu_actual')
-                mem_act = usage.get('memory_actual_gib')
-
-                pod['cpu_actual'] = cpu_act
-                pod['memory_actual_gib'] = mem_act
-                pod['cpu_efficiency_pct'] = round(
-                    cpu_act / cpu_req * 100, 1) if cpu_act is not None and cpu_req > 0 else None
-                pod['memory_efficiency_pct'] = round(
-                    mem_act / mem_req * 100, 1) if mem_act is not None and mem_req > 0 else None
+            self.apply_usage(ns_data, usage_by_ns.get(ns_data['namespace'], {}),
+                             volume_usage)
 
         return metrics
+
+    @staticmethod
+    def apply_usage(ns_data, actual, volume_usage=None):
+        """Namespace'in pod'larına gerçek kullanım ve verimlilik alanlarını ekle."""
+        pods = ns_data['pods']
+        for index, pod in enumerate(pods):
+            fields = efficiency_fields(pod, actual.get(pod['name'], {}))
+            if volume_usage is not None:
+                eph = volume_usage.ephemeral_gib(ns_data['namespace'], pod['name'])
+                fields['ephemeral_storage_gib'] = round(
+                    eph, 4) if eph is not None else None
+
+            if isinstance(pods, PodTable):
+                for column, value in fields.items():
+                    pods.set_value(index, column, value)
+            else:
+                pod.update(fields)
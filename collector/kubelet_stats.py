@@ -0,0 +1,112 @@
+# collector/kubelet_stats.py
+"""
+Kubelet stats/summary harvester.
+
+Metrics Server does not serve PVC usage, so actual volume usage comes
+from each kubelet's /stats/summary endpoint, reached through the
+apiserver node proxy (/api/v1/nodes/{node}/proxy/stats/summary; needs
+`get` on nodes/proxy). All nodes are fetched concurrently on a bounded
+worker pool and folded into a single index:
+
+    (namespace, pvc) → used/capacity bytes
+    (namespace, pod) → ephemeral-storage used bytes
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Aynı anda sorgulanan kubelet sayısı
+KUBELET_STATS_WORKERS = int(os.getenv('KUBEPOCKET_KUBELET_STATS_WORKERS', '16'))
+# Node başına istek zaman aşımı (saniye)
+KUBELET_STATS_TIMEOUT = int(os.getenv('KUBEPOCKET_KUBELET_STATS_TIMEOUT', '10'))
+
+GIB = 1024 ** 3
+
+
+@dataclass(frozen=True)
+class VolumeUsageIndex:
+    # (namespace, pvc) → {'used_bytes': int, 'capacity_bytes': int}
+    pvcs: Dict[Tuple[str, str], dict] = field(default_factory=dict)
+    # (namespace, pod) → ephemeral-storage used bytes
+    ephemeral: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    failed_nodes: List[str] = field(default_factory=list)
+
+    def pvc_used_gib(self, namespace, name):
+        entry = self.pvcs.get((namespace, name))
+        if entry is None or entry.get('used_bytes') is None:
+            return None
+        return entry['used_bytes'] / GIB
+
+    def ephemeral_gib(self, namespace, pod):
+        used = self.ephemeral.get((namespace, pod))
+        return None if used is None else used / GIB
+
+
+class StatsSummaryHarvester:
+
+    def __init__(self, core_v1, max_workers=KUBELET_STATS_WORKERS):
+        self.core_v1 = core_v1
+        self.max_workers = max(1, max_workers)
+
+    def harvest(self, node_names):
+        """Tüm node'ların stats/summary çıktısını paralel çek ve indeksle."""
+        pvcs = {}
+        ephemeral = {}
+        failed = []
+
+        node_names = list(node_names)
+        if not node_names:
+            return VolumeUsageIndex()
+
+        workers = min(self.max_workers, len(node_names))
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix='kubelet-stats') as pool:
+            for node, summary in zip(node_names,
+                                     pool.map(self._fetch, node_names)):
+                if summary is None:
+                    failed.append(node)
+                    continue
+                self._index(summary, pvcs, ephemeral)
+
+        if failed:
+            logger.warning(f"stats/summary unavailable on {len(failed)} "
+                           f"node(s): {', '.join(failed[:5])}")
+        return VolumeUsageIndex(pvcs=pvcs, ephemeral=ephemeral,
+                                failed_nodes=failed)
+
+    def _fetch(self, node):
+        try:
+            resp = self.core_v1.connect_get_node_proxy_with_path(
+                node, 'stats/summary',
+                _preload_content=False,
+                _request_timeout=KUBELET_STATS_TIMEOUT)
+            return json.loads(resp.data)
+        except Exception as e:
+            logger.debug(f"stats/summary {node}: {e}")
+            return None
+
+    @staticmethod
+    def _index(summary, pvcs, ephemeral):
+        for pod in summary.get('pods') or []:
+            ref = pod.get('podRef') or {}
+            namespace = ref.get('namespace', '')
+
+            eph = pod.get('ephemeral-storage') or {}
+            if eph.get('usedBytes') is not None:
+                ephemeral[(namespace, ref.get('name', ''))] = eph['usedBytes']
+
+            for volume in pod.get('volume') or []:
+                pvc_ref = volume.get('pvcRef')
+                if not pvc_ref:
+                    continue
+                # RWX bir PVC birden çok pod/node'da görünebilir — aynı
+                # dosya sistemidir, bu yüzden değerler toplanmaz, üzerine yazılır
+                pvcs[(pvc_ref.get('namespace', namespace), pvc_ref['name'])] = {
+                    'used_bytes': volume.get('usedBytes'),
+                    'capacity_bytes': volume.get('capacityBytes'),
+                }
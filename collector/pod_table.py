@@ -0,0 +1,146 @@
+# collector/pod_table.py
+"""
+Compact columnar pod records.
+
+A pod from _process_pod() is a ~15-key dict; across a 100k-pod snapshot
+that is hundreds of MB of dict/float/str objects. PodTable stores the
+same data column-wise: numeric fields in typed `array` buffers, the
+low-cardinality namespace/status/node strings interned, and created_at
+as an epoch float. Optional usage fields use NaN for "no data".
+
+It behaves like the list of pod dicts it replaces — append(), len(),
+iteration and indexing yield dicts — and to_dicts()/from_dicts() convert
+at the DB boundary (MetricRepository.save_metrics).
+"""
+import math
+import sys
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Interned string kolonları (düşük kardinalite)
+INTERNED_COLUMNS = ('namespace', 'status', 'node_name')
+FLOAT_COLUMNS = ('cpu_request', 'memory_request', 'cpu_limit',
+                 'memory_limit', 'age_hours')
+INT_COLUMNS = ('restart_count',)
+# Sonradan eklenen alanlar — NaN = None
+OPTIONAL_FLOAT_COLUMNS = ('cpu_actual', 'memory_actual_gib',
+                          'cpu_efficiency_pct', 'memory_efficiency_pct',
+                          'ephemeral_storage_gib')
+
+_NAN = float('nan')
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _epoch(created_at):
+    if not created_at:
+        return _NAN
+    return datetime.fromisoformat(created_at).timestamp()
+
+
+def _isoformat(epoch):
+    if math.isnan(epoch):
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class PodTable:
+
+    __slots__ = ('_names', '_strings', '_floats', '_ints', '_optional',
+                 '_created', '_optional_present')
+
+    def __init__(self):
+        self._names = []
+        self._strings = {col: [] for col in INTERNED_COLUMNS}
+        self._floats = {col: array('d') for col in FLOAT_COLUMNS}
+        self._ints = {col: array('q') for col in INT_COLUMNS}
+        self._optional = {col: array('d') for col in OPTIONAL_FLOAT_COLUMNS}
+        self._created = array('d')
+        # En az bir kez set edilmiş opsiyonel kolonlar (to_dicts'te yer alır)
+        self._optional_present = set()
+
+    @classmethod
+    def from_dicts(cls, pods):
+        table = cls()
+        for pod in pods:
+            table.append(pod)
+        return table
+
+    def append(self, pod):
+        self._names.append(pod.get('name'))
+        for col in INTERNED_COLUMNS:
+            self._strings[col].append(_intern(pod.get(col)))
+        for col in FLOAT_COLUMNS:
+            self._floats[col].append(pod.get(col) or 0.0)
+        for col in INT_COLUMNS:
+            self._ints[col].append(pod.get(col) or 0)
+        for col in OPTIONAL_FLOAT_COLUMNS:
+            value = pod.get(col)
+            if col in pod:
+                self._optional_present.add(col)
+            self._optional[col].append(_NAN if value is None else value)
+        self._created.append(_epoch(pod.get('created_at')))
+
+    def set_value(self, index, column, value):
+        if column in self._optional:
+            self._optional_present.add(column)
+            self._optional[column][index] = _NAN if value is None else value
+        elif column in self._floats:
+            self._floats[column][index] = value
+        elif column in self._ints:
+            self._ints[column][index] = value
+        else:
+            raise KeyError(column)
+
+    def column(self, column):
+        """Sayısal bir kolonun kopyasız numpy görünümü (opsiyonellerde NaN = None)."""
+        for group in (self._floats, self._optional, self._ints):
+            if column in group:
+                return np.frombuffer(group[column], dtype=group[column].typecode)
+        if column in self._strings:
+            return self._strings[column]
+        if column == 'name':
+            return self._names
+        raise KeyError(column)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index):
+        row = {
+            'name': self._names[index],
+            'namespace': self._strings['namespace'][index],
+            'status': self._strings['status'][index],
+            'restart_count': self._ints['restart_count'][index],
+            'cpu_request': self._floats['cpu_request'][index],
+            'memory_request': self._floats['memory_request'][index],
+            'cpu_limit': self._floats['cpu_limit'][index],
+            'memory_limit': self._floats['memory_limit'][index],
+            'node_name': self._strings['node_name'][index],
+            'age_hours': self._floats['age_hours'][index],
+            'created_at': _isoformat(self._created[index]),
+        }
+        for col in OPTIONAL_FLOAT_COLUMNS:
+            if col in self._optional_present:
+                value = self._optional[col][index]
+                row[col] = None if math.isnan(value) else value
+        return row
+
+    def __iter__(self):
+        for index in range(len(self._names)):
+            yield self[index]
+
+    def to_dicts(self):
+        return list(self)
+
+    def nbytes(self):
+        """Kolon buffer'larının yaklaşık bellek kullanımı (byte)."""
+        total = sys.getsizeof(self._names) + sum(map(sys.getsizeof, self._names))
+        total += sum(sys.getsizeof(col) for col in self._strings.values())
+        for group in (self._floats, self._ints, self._optional):
+            total += sum(col.itemsize * len(col) for col in group.values())
+        return total + self._created.itemsize * len(self._created)
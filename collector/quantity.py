@@ -0,0 +1,98 @@
+# collector/quantity.py
+"""
+Kubernetes resource.Quantity parser.
+
+Implements the full quantity grammar:
+
+    <quantity>        ::= <signedNumber><suffix>
+    <number>          ::= <digits> | <digits>.<digits> | <digits>. | .<digits>
+    <suffix>          ::= <binarySI> | <decimalExponent> | <decimalSI>
+    <binarySI>        ::= Ki | Mi | Gi | Ti | Pi | Ei
+    <decimalSI>       ::= n | u | m | "" | k | M | G | T | P | E
+    <decimalExponent> ::= "e" <signedNumber> | "E" <signedNumber>
+
+"1E" is exa, "1E3" is an exponent. Results are in base units (cores
+for CPU, bytes for memory/storage). A cluster only uses a handful of
+distinct strings ("100m", "512Mi", "1Gi"), so parse_quantity() keeps a
+bounded LRU memo; parse_quantities() converts a whole column in one call
+and parses each distinct string once.
+"""
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Memo'da tutulacak en fazla farklı quantity string'i
+QUANTITY_CACHE_SIZE = int(os.getenv('KUBEPOCKET_QUANTITY_CACHE_SIZE', '4096'))
+
+GIB = 1024 ** 3
+
+_BINARY_SI = {
+    'Ki': 1024,
+    'Mi': 1024 ** 2,
+    'Gi': 1024 ** 3,
+    'Ti': 1024 ** 4,
+    'Pi': 1024 ** 5,
+    'Ei': 1024 ** 6,
+}
+
+_DECIMAL_SI = {
+    'n': 1e-9,
+    'u': 1e-6,
+    'm': 1e-3,
+    '': 1.0,
+    'k': 1e3,
+    'M': 1e6,
+    'G': 1e9,
+    'T': 1e12,
+    'P': 1e15,
+    'E': 1e18,
+}
+
+_QUANTITY_RE = re.compile(
+    r'^([+-]?(?:\d+\.?\d*|\.\d+))'
+    r'(Ki|Mi|Gi|Ti|Pi|Ei|[eE][+-]?\d+|[numkMGTPE]?)$'
+)
+
+
+@lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def parse_quantity(quantity):
+    """Quantity string'ini temel birime (core / byte) çevir."""
+    if not quantity:
+        return 0.0
+
+    match = _QUANTITY_RE.match(quantity.strip())
+    if not match:
+        raise ValueError(f"invalid quantity: {quantity!r}")
+
+    number, suffix = match.groups()
+    value = float(number)
+    if suffix in _BINARY_SI:
+        return value * _BINARY_SI[suffix]
+    if suffix in _DECIMAL_SI:
+        return value * _DECIMAL_SI[suffix]
+    # decimal exponent: e3, E-2, ...
+    return value * 10.0 ** int(suffix[1:])
+
+
+def parse_cpu(quantity):
+    """CPU quantity → core"""
+    return parse_quantity(quantity)
+
+
+def parse_memory(quantity):
+    """Memory / storage quantity → GiB"""
+    return parse_quantity(quantity) / GIB
+
+
+def parse_quantities(quantities, scale=1.0):
+    """
+    Bir quantity kolonunu tek çağrıda float64 dizisine çevir.
+    Her farklı string bir kez parse edilir; boş/None değerler 0 olur.
+    scale ile bölünür (ör. GiB için scale=GIB).
+    """
+    quantities = list(quantities)
+    values = {q: parse_quantity(q) / scale for q in set(quantities)}
+    return np.fromiter((values[q] for q in quantities),
+                       dtype=np.float64, count=len(quantities))
@@ -2,8 +2,11 @@
 # collector/run_collector.py
 from db.models import init_db, SessionLocal
 from db.repository import MetricRepository
+from db import archive, partitions, snapshots
 from collector.event_collector import EventCollector
-from collector.k8s_client import K8sClient
+from collector.async_engine import AsyncCollectionEngine, collect_contexts, connect_contexts
+from collector.snapshot import ClusterSnapshot
+from collector.k8s_client import K8sClient, INFORMERS_ENABLED
 from collector.webhook import notify_new_alerts
 import sys
 import os
@@ -25,7 +28,7 @@ def _get_license():
         return None
 
 
-def _check_cluster_limit(license, repo) -> bool:
+def _check_cluster_limit(license, repo, cluster_name=CLUSTER_NAME) -> bool:
     """
     Returns True if this cluster is allowed to collect data.
     For free tier: only 1 cluster allowed.
@@ -37,7 +40,7 @@ def _check_cluster_limit(license, repo) -> bool:
         return True
 
     # If this cluster is already registered, always allow
-    existing = repo.get_cluster_by_name(CLUSTER_NAME)
+    existing = repo.get_cluster_by_name(cluster_name)
     if existing:
         return True
 
@@ -45,7 +48,7 @@ def _check_cluster_limit(license, repo) -> bool:
     all_clusters = repo.get_all_clusters()
     if len(all_clusters) >= license.cluster_limit:
         print(f"⛔ Cluster limit reached ({len(all_clusters)}/{license.cluster_limit}). "
-              f"This cluster ({CLUSTER_NAME}) will not be registered. "
+              f"This cluster ({cluster_name}) will not be registered. "
               f"Upgrade to Pro for unlimited clusters.")
         return False
 
@@ -57,9 +60,13 @@ def _cleanup_old_data(db, cluster_id: int, license):
     Retention cleanup — only deletes data collected AFTER the license
     downgrade/expiry date. Data collected during an active Pro period
     is never touched, preserving history if the customer renews.
+
+    metrics / pod_samples / kube_events are partitioned by day: whole days before the
+    cutoff are dropped as partitions (shared by all clusters in the DB);
+    the remaining rows of the cutoff day are deleted per cluster.
     """
     try:
-        from db.models import Metric
+        from db.models import Metric, PodSample, KubeEvent
 
         retention_days = license.retention_days
 
@@ -75,23 +82,56 @@ def _cleanup_old_data(db, cluster_id: int, license):
         else:
             delete_before = datetime.utcnow() - timedelta(days=retention_days)
 
+        dropped = partitions.apply_retention(db, delete_before)
+
+        # Kalan satırlar — partition pruning ile sadece cutoff günü taranır
         deleted = (
             db.query(Metric)
             .filter(
                 Metric.cluster_id == cluster_id,
                 Metric.timestamp < delete_before,
             )
-            .delete()
+            .delete(synchronize_session=False)
+        )
+        deleted_samples = (
+            db.query(PodSample)
+            .filter(
+                PodSample.cluster_id == cluster_id,
+                PodSample.ts < delete_before,
+            )
+            .delete(synchronize_session=False)
+        )
+        deleted_events = (
+            db.query(KubeEvent)
+            .filter(
+                KubeEvent.cluster_id == cluster_id,
+                KubeEvent.created_at < delete_before,
+            )
+            .delete(synchronize_session=False)
         )
-        if deleted:
+        deleted_snapshots = snapshots.apply_retention(
+            db, delete_before, cluster_id=cluster_id)
+        pruned_days = archive.prune_before(delete_before)
+        dropped_count = sum(len(names) for names in dropped.values())
+        if (deleted or deleted_samples or deleted_events or deleted_snapshots
+                or dropped_count or pruned_days):
             db.commit()
-            print(f"  🗑  Retention cleanup: removed {deleted} old metric records "
+            print(f"  🗑  Retention cleanup: dropped {dropped_count} daily partitions, "
+                  f"removed {deleted} metric records, {deleted_samples} pod samples, "
+                  f"{deleted_snapshots} pod snapshots, "
+                  f"{deleted_events} events, {pruned_days} archived days "
                   f"(before {delete_before.date()})")
     except Exception as e:
+        db.rollback()
         print(f"  Warning: Retention cleanup failed: {e}")
 
 
-def collect_once(context=None):
+def collect_once(context=None, k8s=None, cluster_name=None, snapshot=None):
+    """
+    Tek cluster için bir toplama döngüsü. snapshot verilirse (çoklu context
+    modu, collect_contexts_once) cluster yeniden listelenmez.
+    """
+    cluster_name = cluster_name or CLUSTER_NAME
     print(f"\n{'='*50}")
     print(f"KubePocket Collector - {datetime.now()}")
     print('='*50)
@@ -123,28 +163,34 @@ def collect_once(context=None):
                     f"⚠️  License expires in {license.days_until_expiry()} days!")
     # ──────────────────────────────────────────────────────────
 
-    try:
-        k8s = K8sClient(context=context)
-    except Exception as e:
-        print(f"Kubernetes connection error: {e}")
-        return False
+    if k8s is None:
+        try:
+            k8s = K8sClient(context=context)
+        except Exception as e:
+            print(f"Kubernetes connection error: {e}")
+            return False
 
     db = SessionLocal()
     try:
         repo = MetricRepository(db)
 
         # ── Cluster limit check ───────────────────────────────
-        if not _check_cluster_limit(license, repo):
+        if not _check_cluster_limit(license, repo, cluster_name):
             return False
         # ─────────────────────────────────────────────────────
 
         cluster = repo.get_or_create_cluster(
-            CLUSTER_NAME, context or 'in-cluster')
+            cluster_name, context or 'in-cluster')
 
         new_alert_ids = []  # track newly created alerts for webhook
 
-        print("\nCollecting metrics...")
-        metrics = k8s.collect_all_metrics_with_usage()
+        # One snapshot per cycle — pods, usage, nodes, PVCs and events are
+        # listed once and shared by every consumer below.
+        if snapshot is None:
+            print("\nCollecting cluster snapshot...")
+            snapshot = AsyncCollectionEngine({cluster_name: k8s}).snapshots().get(
+                cluster_name, ClusterSnapshot(cluster_name))
+        metrics = list(snapshot.metrics)
 
         if not metrics:
             print("No metrics collected!")
@@ -158,6 +204,14 @@ def collect_once(context=None):
                       f"Upgrade to Pro for unlimited namespaces.")
                 metrics = metrics[:license.namespace_limit]
 
+        # Günlük partition'lar — bugünün ve önümüzdeki günlerin tablosu hazır olsun
+        try:
+            partitions.ensure_upcoming(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"  Warning: Partition maintenance failed: {e}")
+
         saved = repo.save_metrics(cluster.id, metrics)
 
         # Retention cleanup
@@ -166,13 +220,14 @@ def collect_once(context=None):
 
         print("\nCollecting Kubernetes events...")
         try:
-            event_collector = EventCollector(cluster_id=cluster.id)
-            ev_saved, ev_updated = event_collector.collect_events()
+            event_collector = EventCollector(cluster_id=cluster.id, k8s=k8s)
+            ev_saved, ev_updated = event_collector.collect_events(
+                events=snapshot.events)
             print(f"  -> {ev_saved} new events, {ev_updated} updated")
         except Exception as e:
             print(f"  Warning: Event collection failed: {e}")
 
-        problematic = k8s.get_high_restart_pods(threshold=5)
+        problematic = snapshot.high_restart_pods(threshold=5)
         for p in problematic:
             alert = repo.create_alert(cluster.id, p['namespace'],
                                       f"Pod {p['pod_name']} restarted {p['restarts']} times", 'warning')
@@ -182,7 +237,7 @@ def collect_once(context=None):
         # PVC alert checks
         try:
             from db.models import Alert
-            pvcs = k8s.collect_pvc_metrics()
+            pvcs = snapshot.pvcs
             pvc_names = {pvc['name'] for pvc in pvcs}
 
             active_pvc_alerts = (
@@ -276,11 +331,52 @@ def collect_once(context=None):
         db.close()
 
 
-def run_daemon(interval=300):
+def collect_contexts_once(contexts, clients=None):
+    """
+    Birden fazla kubeconfig context'i: tüm snapshot'lar tek döngüde paralel
+    toplanır, sonra her biri context adıyla ayrı cluster olarak kaydedilir.
+    """
+    if clients is None:
+        clients = connect_contexts(contexts)
+    if not clients:
+        print("Kubernetes connection error: no context reachable")
+        return False
+
+    print(f"\nCollecting {len(clients)} cluster snapshots...")
+    snapshots = collect_contexts(clients)
+    ok = False
+    for context, k8s in clients.items():
+        snapshot = snapshots.get(context)
+        if snapshot is None:
+            print(f"⚠️  {context}: collection failed, skipped this cycle")
+            continue
+        ok = collect_once(context, k8s=k8s, cluster_name=context,
+                          snapshot=snapshot) or ok
+    return ok
+
+
+def run_daemon(interval=300, context=None, contexts=None):
     print(f"Daemon mode started, interval: {interval}s")
+
+    # Long-lived client(s): informers keep pods/nodes/PVCs/events current via
+    # watch, so each cycle reads from memory instead of relisting.
+    k8s = None
+    clients = None
     while True:
         try:
-            collect_once()
+            if contexts:
+                if clients is None:
+                    clients = connect_contexts(contexts)
+                    if INFORMERS_ENABLED:
+                        for client in clients.values():
+                            client.start_informers()
+                collect_contexts_once(contexts, clients=clients)
+            else:
+                if k8s is None:
+                    k8s = K8sClient(context=context)
+                    if INFORMERS_ENABLED:
+                        k8s.start_informers()
+                collect_once(context, k8s=k8s)
             print(f"Sleeping {interval}s...")
             time.sleep(interval)
         except KeyboardInterrupt:
@@ -296,9 +392,15 @@ if __name__ == "__main__":
     parser.add_argument('--daemon',   action='store_true')
     parser.add_argument('--interval', type=int, default=300)
     parser.add_argument('--context',  help='Kubernetes context')
+    parser.add_argument('--contexts',
+                        help='Comma-separated contexts collected concurrently, '
+                             'each stored as a cluster named after its context')
     args = parser.parse_args()
+    contexts = [c.strip() for c in (args.contexts or '').split(',') if c.strip()]
 
     if args.daemon:
-        run_daemon(args.interval)
+        run_daemon(args.interval, args.context, contexts)
+    elif contexts:
+        collect_contexts_once(contexts)
     else:
         collect_once(args.context)
@@ -0,0 +1,62 @@
+# collector/snapshot.py
+"""
+Per-cycle cluster snapshot.
+
+collect_once used to list the whole cluster several times per cycle
+(usage collection, get_high_restart_pods, the PVC check and the event
+collector's own client). A ClusterSnapshot is built once per cycle by
+AsyncCollectionEngine.snapshots() and every consumer — save_metrics,
+restart alerts, PVC alerts and event upserts — reads from it.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Tuple
+
+from collector.usage import UsageSnapshot
+from collector.kubelet_stats import VolumeUsageIndex
+
+
+def find_high_restart_pods(metrics, threshold=5):
+    """Namespace sözlüklerinden restart sayısı eşiği aşan pod'lar."""
+    problematic = []
+    for ns_data in metrics:
+        for pod in ns_data['pods']:
+            if pod['restart_count'] >= threshold:
+                problematic.append({
+                    'namespace': ns_data['namespace'],
+                    'pod_name': pod['name'],
+                    'restarts': pod['restart_count'],
+                    'status': pod['status']
+                })
+    return problematic
+
+
+@dataclass(frozen=True)
+class ClusterSnapshot:
+    cluster: str
+    # collect_all_metrics_with_usage() şeklinde namespace sözlükleri
+    metrics: Tuple[dict, ...] = ()
+    # collect_node_metrics() çıktısı — SNAPSHOT_PARTS'ta yok, varsayılan boş
+    nodes: Tuple[dict, ...] = ()
+    # collect_pvc_metrics() çıktısı
+    pvcs: Tuple[dict, ...] = ()
+    # Warning tipindeki V1Event nesneleri
+    events: Tuple = ()
+    usage: UsageSnapshot = field(default_factory=UsageSnapshot)
+    volume_usage: VolumeUsageIndex = field(default_factory=VolumeUsageIndex)
+    taken_at: datetime = field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def from_collected(cls, cluster, collected):
+        return cls(
+            cluster=cluster,
+            metrics=tuple(collected.get('metrics') or ()),
+            nodes=tuple(collected.get('nodes') or ()),
+            pvcs=tuple(collected.get('pvcs') or ()),
+            events=tuple(collected.get('events') or ()),
+            usage=collected.get('usage') or UsageSnapshot(),
+            volume_usage=collected.get('volume_usage') or VolumeUsageIndex(),
+        )
+
+    def high_restart_pods(self, threshold=5):
+        return find_high_restart_pods(self.metrics, threshold)
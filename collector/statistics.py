@@ -6,15 +6,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
 from db.repository import MetricRepository
-from db.models import Statistics, Alert, Metric
+from collector import regression
+from db import rollups, running_stats, seasonal, stats_sql
+from db import bulk
+from db.models import CLUSTER_SCOPE, Alert, Forecast, Statistics
 from datetime import datetime, timedelta
-import numpy as np
-from sklearn.linear_model import LinearRegression
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Stats daemon'un forecasts tablosuna yazdığı ufuklar (gün)
+FORECAST_HORIZONS = [int(h) for h in os.getenv(
+    'KUBEPOCKET_FORECAST_HORIZONS', '1,7,30').split(',') if h.strip()]
+# Forecast'ın dayandığı günlük geçmiş
+FORECAST_HISTORY_DAYS = int(os.getenv('KUBEPOCKET_FORECAST_HISTORY_DAYS', '30'))
+FORECAST_METRICS = ('cpu', 'memory')
+# Mevsimsel trend alert'i: haftalık değişim / level oranı
+TREND_ALERT_WEEKLY_RATIO = float(os.getenv('KUBEPOCKET_TREND_ALERT_WEEKLY_RATIO', '0.1'))
+
 
 class StatisticsCalculator:
     def __init__(self, db: Session):
@@ -22,77 +32,71 @@ class StatisticsCalculator:
         self.repo = MetricRepository(db)
 
     def calculate_statistics(self):
-        """Son 7 günün verisinden namespace bazlı istatistik hesapla"""
+        """
+        Namespace bazlı istatistik: save_metrics'in güncellediği
+        running_statistics gün bucket'larının birleşimi (son
+        STATS_WINDOW_DAYS gün + bugün) — metrics yeniden taranmaz.
+        Running state kapalıysa pencere tek grouped SQL sorgusuyla
+        (db/stats_sql.py) hesaplanır.
+        """
         logger.info("📊 Calculating statistics...")
 
-        since = datetime.utcnow() - timedelta(days=7)
-        metrics = self.db.query(Metric).filter(Metric.timestamp >= since).all()
-
-        if len(metrics) < 10:
-            logger.warning(f"⚠️ Insufficient data ({len(metrics)} records, need 10)")
+        now = datetime.utcnow()
+        since = now - timedelta(days=running_stats.STATS_WINDOW_DAYS)
+        if running_stats.RUNNING_STATS_ENABLED:
+            running_stats.expire(self.db, now)
+            if running_stats.is_empty(self.db, since):
+                # İlk kurulum / yükseltme: durum yok, metrics'ten bir kez doldur
+                running_stats.backfill(self.db, since, now)
+            summaries = running_stats.window(self.db, since)
+        else:
+            summaries = stats_sql.window_statistics(self.db, since, now)
+        samples = sum(s.samples for (_, _, metric_type), s in summaries.items()
+                      if metric_type == 'cpu')
+        if samples < 10:
+            logger.warning(f"⚠️ Insufficient data ({samples} records, need 10)")
             return
 
-        # Namespace bazlı grupla
-        namespaces = {}
-        for m in metrics:
-            if m.namespace not in namespaces:
-                namespaces[m.namespace] = {'cpu': [], 'memory': [], 'timestamps': []}
-            namespaces[m.namespace]['cpu'].append(m.total_cpu)
-            namespaces[m.namespace]['memory'].append(m.total_memory)
-            namespaces[m.namespace]['timestamps'].append(m.timestamp.timestamp())
-
-        for ns, data in namespaces.items():
-            self._calculate_namespace_stats(ns, data)
+        for (cluster_id, namespace, metric_type), summary in summaries.items():
+            self.db.add(Statistics(
+                cluster_id=cluster_id,
+                namespace=namespace,
+                metric_type=metric_type,
+                avg_value=summary.mean,
+                std_dev=summary.std_dev,
+                min_value=summary.min_value,
+                max_value=summary.max_value,
+                trend_slope=summary.slope,
+                calculated_at=now
+            ))
 
         self.db.commit()
+        namespaces = {(cid, ns) for cid, ns, _ in summaries}
         logger.info(f"✅ Statistics calculated for {len(namespaces)} namespaces")
 
-    def _calculate_namespace_stats(self, namespace, data):
-        cpu_array = np.array(data['cpu'])
-        cpu_stats = Statistics(
-            namespace=namespace,
-            metric_type='cpu',
-            avg_value=float(np.mean(cpu_array)),
-            std_dev=float(np.std(cpu_array)),
-            min_value=float(np.min(cpu_array)),
-            max_value=float(np.max(cpu_array)),
-            trend_slope=self._calculate_trend(data['timestamps'], data['cpu']),
-            calculated_at=datetime.utcnow()
-        )
-        self.db.add(cpu_stats)
-
-        memory_array = np.array(data['memory'])
-        memory_stats = Statistics(
-            namespace=namespace,
-            metric_type='memory',
-            avg_value=float(np.mean(memory_array)),
-            std_dev=float(np.std(memory_array)),
-            min_value=float(np.min(memory_array)),
-            max_value=float(np.max(memory_array)),
-            trend_slope=self._calculate_trend(data['timestamps'], data['memory']),
-            calculated_at=datetime.utcnow()
-        )
-        self.db.add(memory_stats)
-
-    def _calculate_trend(self, timestamps, values):
-        if len(timestamps) < 2:
-            return 0.0
-        X = np.array(timestamps).reshape(-1, 1)
-        y = np.array(values)
-        model = LinearRegression()
-        model.fit(X, y)
-        return float(model.coef_[0])
-
     def detect_anomalies(self):
-        """Son 1 saatteki veride Z-score anomaly tespiti"""
+        """
+        Son 1 saatteki veride anomaly tespiti. Mevsimsel profili hazır ve o
+        saatin slot'u ısınmış (slot_ready) namespace'ler haftanın o saatinin
+        beklenen değerine göre (seasonal z-score, Holt-Winters trend'i),
+        diğerleri haftalık ortalamaya göre.
+        """
         logger.info("🚨 Detecting anomalies...")
 
         recent = self.repo.get_latest_metrics(hours=1)
+        profiles = seasonal.load(self.db)
 
         for metric in recent:
+            profile = profiles.get((metric.cluster_id, metric.namespace, 'cpu'))
+            if (profile is not None and profile.ready
+                    and profile.slot_ready(metric.timestamp)):
+                self._check_seasonal(metric, profile)
+                continue
+
             cpu_stats = (
                 self.db.query(Statistics)
                 .filter(
+                    Statistics.cluster_id == metric.cluster_id,
                     Statistics.namespace == metric.namespace,
                     Statistics.metric_type == 'cpu'
                 )
@@ -115,6 +119,18 @@ class StatisticsCalculator:
 
         self.db.commit()
 
+    def _check_seasonal(self, metric, profile):
+        expected, z_score = profile.zscore(metric.total_cpu, metric.timestamp)
+        if abs(z_score) > 3:
+            self._create_anomaly_alert(
+                metric.namespace, 'cpu', metric.total_cpu, expected, abs(z_score))
+
+        # Günlük döngüden arındırılmış trend: haftalık değişim / level
+        weekly_change = profile.trend * seasonal.SEASON_LENGTH
+        if abs(weekly_change) > TREND_ALERT_WEEKLY_RATIO * max(abs(profile.level), 0.01):
+            direction = "increasing" if weekly_change > 0 else "decreasing"
+            self._create_trend_alert(metric.namespace, 'cpu', profile.trend * 24, direction)
+
     def _create_anomaly_alert(self, namespace, metric_type, current, avg, z_score):
         message = (
             f"⚠️ Anomaly: {namespace}/{metric_type} unusually high! "
@@ -141,52 +157,125 @@ class StatisticsCalculator:
         ))
         logger.info(f"📊 {message}")
 
-    def forecast(self, namespace, metric_type, days=7):
-        """Gelecek N gün için tahmin"""
-        since = datetime.utcnow() - timedelta(days=30)
-        metrics = self.db.query(Metric).filter(
-            Metric.namespace == namespace,
-            Metric.timestamp >= since
-        ).all()
-
-        if len(metrics) < 5:
-            return None
-
-        daily = {}
-        for m in metrics:
-            day = m.timestamp.strftime('%Y-%m-%d')
-            if day not in daily:
-                daily[day] = []
-            daily[day].append(m.total_cpu if metric_type == 'cpu' else m.total_memory)
-
-        days_list, values_list = [], []
-        for day in sorted(daily.keys()):
-            days_list.append(len(days_list))
-            values_list.append(float(np.mean(daily[day])))
-
-        if len(days_list) < 3:
-            return None
-
-        X = np.array(days_list).reshape(-1, 1)
-        y = np.array(values_list)
-        model = LinearRegression()
-        model.fit(X, y)
-
-        forecast_x = np.array(range(len(days_list), len(days_list) + days)).reshape(-1, 1)
-        forecast_values = model.predict(forecast_x)
-
-        volatility = np.std(values_list) / (np.mean(values_list) + 0.01)
-        confidence = max(0.0, min(1.0, 1 - volatility))
+    def forecast(self, namespace, metric_type, days=7, cluster_id=None):
+        """
+        Gelecek N gün için tahmin. cluster_id verilmiş ve mevsimsel profilin
+        tüm slot'ları hazırsa (forecast_ready) Holt-Winters (günlük
+        ortalamalar), değilse günlük rollup'lara doğrusal fit (cluster_id
+        verilmişse sadece o cluster'ın serisi).
+        """
+        if cluster_id is not None:
+            profile = seasonal.load_one(self.db, cluster_id, namespace, metric_type)
+            if profile is not None and profile.forecast_ready:
+                return self._seasonal_forecast(profile, days)
 
+        since = datetime.utcnow() - timedelta(days=30)
+        # Günlük rollup — namespace başına gün başına tek satır
+        series = rollups.daily_series(self.db, metric_type, since,
+                                      cluster_id=cluster_id, namespace=namespace)
+        values = [float(value) for _, value in series]
+        return regression.forecast([namespace], [values], days).get(namespace)
+
+    @staticmethod
+    def _seasonal_forecast(profile, days):
+        projected = profile.forecast_days(days)
         return {
-            'historical_days': days_list,
-            'historical_values': values_list,
-            'forecast_days': list(range(len(days_list), len(days_list) + days)),
-            'forecast_values': forecast_values.tolist(),
-            'trend': float(model.coef_[0]),
-            'confidence': confidence
+            'historical_days': [],
+            'historical_values': [],
+            'forecast_days': list(range(1, days + 1)),
+            'forecast_values': [value for value, _, _ in projected],
+            'forecast_lower': [lower for _, lower, _ in projected],
+            'forecast_upper': [upper for _, _, upper in projected],
+            'trend': profile.trend * 24,
+            'confidence': profile.confidence,
+            'method': 'seasonal',
         }
 
+    def precompute_forecasts(self):
+        """
+        Namespace ve cluster toplamı serileri için FORECAST_HORIZONS
+        tahminlerini forecasts tablosuna yaz: günlük rollup'lara doğrusal fit
+        (tek sorgu, tek vektörel fit), hazır mevsimsel profili olan serilerde
+        Holt-Winters. Artık görülmeyen namespace'lerin satırları silinir.
+        Döndürür: yazılan satır sayısı.
+        """
+        now = datetime.utcnow()
+        since = rollups.floor_day(now - timedelta(days=FORECAST_HISTORY_DAYS))
+
+        series, cluster_days = {}, {}
+        for r in rollups.get_rollups(self.db, 'daily', since):
+            if not r.samples:
+                continue
+            for metric_type in FORECAST_METRICS:
+                value = float(getattr(r, f'{metric_type}_avg') or 0.0)
+                series.setdefault((r.cluster_id, r.namespace, metric_type), []).append(value)
+                # Cluster toplamı: günün namespace ortalamalarının toplamı
+                days = cluster_days.setdefault((r.cluster_id, CLUSTER_SCOPE, metric_type), {})
+                days[r.bucket] = days.get(r.bucket, 0.0) + value
+        for key, days in cluster_days.items():
+            series[key] = [days[day] for day in sorted(days)]
+
+        keys = [key for key, values in series.items() if len(values) >= 3]
+        rows = []
+        if keys and FORECAST_HORIZONS:
+            fit, predicted, lower, upper = regression.project(
+                [series[key] for key in keys], FORECAST_HORIZONS)
+            predicted, lower, upper = predicted.tolist(), lower.tolist(), upper.tolist()
+            for i, (cluster_id, namespace, metric_type) in enumerate(keys):
+                for j, horizon in enumerate(FORECAST_HORIZONS):
+                    rows.append({
+                        'cluster_id': cluster_id,
+                        'namespace': namespace,
+                        'metric_type': metric_type,
+                        'horizon_days': horizon,
+                        'value': max(0.0, predicted[i][j]),
+                        'lower': max(0.0, lower[i][j]),
+                        'upper': max(0.0, upper[i][j]),
+                        'trend': float(fit.slope[i]),
+                        'confidence': float(fit.confidence[i]),
+                        'history_days': int(fit.n[i]),
+                        'method': 'linear',
+                        'computed_at': now,
+                    })
+
+        # Hazır mevsimsel profili olan seriler için Holt-Winters tahmini
+        rows = {(r['cluster_id'], r['namespace'], r['metric_type'], r['horizon_days']): r
+                for r in rows}
+        if FORECAST_HORIZONS:
+            for (cluster_id, namespace, metric_type), profile in seasonal.load(self.db).items():
+                if metric_type not in FORECAST_METRICS or not profile.forecast_ready:
+                    continue
+                projected = profile.forecast_days(max(FORECAST_HORIZONS))
+                for horizon in FORECAST_HORIZONS:
+                    value, lower, upper = projected[horizon - 1]
+                    rows[(cluster_id, namespace, metric_type, horizon)] = {
+                        'cluster_id': cluster_id,
+                        'namespace': namespace,
+                        'metric_type': metric_type,
+                        'horizon_days': horizon,
+                        'value': max(0.0, value),
+                        'lower': max(0.0, lower),
+                        'upper': max(0.0, upper),
+                        'trend': profile.trend * 24,
+                        'confidence': profile.confidence,
+                        'history_days': profile.observations // 24,
+                        'method': 'seasonal',
+                        'computed_at': now,
+                    }
+        rows = list(rows.values())
+
+        bulk.upsert(
+            self.db, Forecast, rows,
+            index_elements=['cluster_id', 'namespace', 'metric_type', 'horizon_days'],
+            set_=lambda new: {col: new[col] for col in
+                              ('value', 'lower', 'upper', 'trend', 'confidence',
+                               'history_days', 'method', 'computed_at')},
+        )
+        self.db.query(Forecast).filter(Forecast.computed_at < now).delete(
+            synchronize_session=False)
+        self.db.commit()
+        logger.info(f"🔮 {len(rows)} forecasts stored")
+        return len(rows)
 
     def get_pod_anomalies(self, namespace=None):
         """
@@ -194,38 +283,42 @@ class StatisticsCalculator:
         Her pod'un restart sayısını ve CPU request'ini
         namespace ortalamasıyla karşılaştırır.
         """
-        recent = self.repo.get_latest_per_namespace()
+        samples = self.repo.get_latest_pod_samples(namespace=namespace)
         pod_anomalies = []
 
-        for metric in recent:
-            if namespace and metric.namespace != namespace:
-                continue
-
-            ns_avg_cpu = metric.total_cpu / max(len(metric.pod_data), 1)
-
-            for pod in metric.pod_data:
-                pod_cpu = pod.get('cpu_request', 0)
-                restarts = pod.get('restart_count', 0)
-
-                # CPU anomaly — namespace ortalamasının 3 katından fazla ise
-                cpu_ratio = pod_cpu / max(ns_avg_cpu, 0.001)
-                cpu_score = min(100.0, max(0.0, (cpu_ratio - 1) * 30))
-
-                # Restart anomaly — 5+ restart yüksek risk
-                restart_score = min(100.0, restarts * 10.0)
-
-                # Genel skor — ikisinin ağırlıklı ortalaması
-                anomaly_score = (cpu_score * 0.4) + (restart_score * 0.6)
-
-                pod_anomalies.append({
-                    'pod': pod.get('name', ''),
-                    'namespace': metric.namespace,
-                    'cpu_score': round(cpu_score, 2),
-                    'restart_score': round(restart_score, 2),
-                    'anomaly_score': round(anomaly_score, 2),
-                    'cpu_request': pod_cpu,
-                    'restarts': restarts,
-                    'status': pod.get('status', 'Unknown')
-                })
+        # Namespace ortalama CPU request'i (cluster, namespace bazında)
+        ns_totals = {}
+        for s in samples:
+            total, count = ns_totals.get((s.cluster_id, s.namespace), (0.0, 0))
+            ns_totals[(s.cluster_id, s.namespace)] = (
+                total + (s.cpu_request or 0), count + 1)
+
+        for s in samples:
+            total, count = ns_totals[(s.cluster_id, s.namespace)]
+            ns_avg_cpu = total / max(count, 1)
+
+            pod_cpu = s.cpu_request or 0
+            restarts = s.restart_count or 0
+
+            # CPU anomaly — namespace ortalamasının 3 katından fazla ise
+            cpu_ratio = pod_cpu / max(ns_avg_cpu, 0.001)
+            cpu_score = min(100.0, max(0.0, (cpu_ratio - 1) * 30))
+
+            # Restart anomaly — 5+ restart yüksek risk
+            restart_score = min(100.0, restarts * 10.0)
+
+            # Genel skor — ikisinin ağırlıklı ortalaması
+            anomaly_score = (cpu_score * 0.4) + (restart_score * 0.6)
+
+            pod_anomalies.append({
+                'pod': s.pod,
+                'namespace': s.namespace,
+                'cpu_score': round(cpu_score, 2),
+                'restart_score': round(restart_score, 2),
+                'anomaly_score': round(anomaly_score, 2),
+                'cpu_request': pod_cpu,
+                'restarts': restarts,
+                'status': s.status or 'Unknown'
+            })
 
         return sorted(pod_anomalies, key=lambda x: x['anomaly_score'], reverse=True)
@@ -9,6 +9,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from collector.statistics import StatisticsCalculator
+from db import archive, rollups, seasonal
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +26,20 @@ def run_stats_daemon(interval=3600):
             from db.models import SessionLocal
             db = SessionLocal()
             try:
+                # Saatlik / günlük rollup'ları ilerlet, katman retention'ı uygula
+                rollups.maintain(db)
+                # Yeni saatleri hour-of-week / Holt-Winters durumuna işle
+                seasonal.maintain(db)
+                # Rollup'ı tamamlanmış eski günleri Parquet arşivine taşı
+                archived = archive.archive_old_metrics(db)
+                if archived:
+                    logger.info(f"🗄  {archived} metric rows moved to archive")
+
                 calc = StatisticsCalculator(db)
                 calc.calculate_statistics()
                 calc.detect_anomalies()
+                # Exporter ve /api/forecast için önceden hesaplanmış tahminler
+                calc.precompute_forecasts()
                 logger.info("✅ Statistics & anomaly detection complete")
             finally:
                 db.close()
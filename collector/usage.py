@@ -0,0 +1,48 @@
+# collector/usage.py
+"""
+Cluster-wide Metrics Server usage snapshot.
+
+One cluster-scoped `pods` list and one `nodes` list from metrics.k8s.io
+per cycle, indexed as (namespace, pod) → usage and node → usage. Every
+collector path (pod efficiency, node metrics, the async engine) shares
+the same snapshot, so usage costs 2 requests per cycle regardless of
+namespace or node count.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Tuple
+
+
+def efficiency_fields(pod, usage):
+    """Pod sözlüğüne eklenecek gerçek kullanım ve verimlilik alanları."""
+    cpu_req = pod.get('cpu_request', 0)
+    mem_req = pod.get('memory_request', 0)
+    cpu_act = usage.get('cpu_actual')
+    mem_act = usage.get('memory_actual_gib')
+    return {
+        'cpu_actual': cpu_act,
+        'memory_actual_gib': mem_act,
+        'cpu_efficiency_pct': round(
+            cpu_act / cpu_req * 100, 1) if cpu_act is not None and cpu_req > 0 else None,
+        'memory_efficiency_pct': round(
+            mem_act / mem_req * 100, 1) if mem_act is not None and mem_req > 0 else None,
+    }
+
+
+@dataclass(frozen=True)
+class UsageSnapshot:
+    # (namespace, pod) → {'cpu_actual': cores, 'memory_actual_gib': GiB}
+    pods: Dict[Tuple[str, str], dict] = field(default_factory=dict)
+    # node → {'cpu_actual': cores, 'memory_actual_gib': GiB}
+    nodes: Dict[str, dict] = field(default_factory=dict)
+    fetched_at: datetime = field(default_factory=datetime.utcnow)
+
+    def by_namespace(self):
+        """Tüm namespace'ler için tek geçişte {namespace: {pod_name: usage}}"""
+        grouped = {}
+        for (ns, pod), usage in self.pods.items():
+            grouped.setdefault(ns, {})[pod] = usage
+        return grouped
+
+    def node(self, name):
+        return self.nodes.get(name)
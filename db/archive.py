@@ -0,0 +1,284 @@
+# db/archive.py
+"""
+Columnar archive of cold metrics (Parquet on the data PVC).
+
+The stats daemon moves whole UTC days of `metrics` rows older than
+KUBEPOCKET_ARCHIVE_AFTER_DAYS out of the database into two hive-style,
+day-partitioned Parquet datasets under KUBEPOCKET_ARCHIVE_DIR:
+
+    namespaces/day=2026-01-01/part-0.parquet   one row per Metric row
+    pods/day=2026-01-01/part-0.parquet         pod_data flattened, one row
+                                               per pod (pod_samples columns)
+
+A day is archived only after the hourly rollup watermark has passed it, so
+rollups never miss raw rows. Files are written to a temporary name and
+renamed before the day leaves the database: its metrics and pod_samples
+rows are removed (partition drop on PostgreSQL) and pod_snapshots are
+pruned to the chains still needed after it.
+
+read_raw() / read_pods() scan the datasets with pyarrow, pruning by day
+partition; db/rollups.get_rollups() uses read_raw() for ranges older than
+the rollup tables, which is how trend, forecast and reports read history,
+and DatabaseRepository.get_pod_history() uses read_pods() for archived days.
+Requires pyarrow; without it archiving is skipped and data stays in the DB.
+"""
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from db import partitions, snapshots
+from db.models import Metric, PodSample, RollupWatermark
+from db.snapshots import SnapshotReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ENABLED = os.getenv('KUBEPOCKET_ARCHIVE', 'true').lower() == 'true'
+ARCHIVE_DIR = os.getenv('KUBEPOCKET_ARCHIVE_DIR', '/data/archive')
+# Bu yaştan eski günler DB'den arşive taşınır
+ARCHIVE_AFTER_DAYS = int(os.getenv('KUBEPOCKET_ARCHIVE_AFTER_DAYS', '30'))
+
+RAW_COLUMNS = ('cluster_id', 'namespace', 'timestamp', 'total_cpu',
+               'total_memory', 'total_restarts')
+
+if pa is not None:
+    # Sabit şema: tamamen NULL bir kolon günden güne tip değiştirmesin
+    SCHEMAS = {
+        'namespaces': pa.schema([
+            ('cluster_id', pa.int32()), ('namespace', pa.string()),
+            ('timestamp', pa.timestamp('us')), ('total_cpu', pa.float64()),
+            ('total_memory', pa.float64()), ('total_restarts', pa.int64()),
+            ('pod_count', pa.int32()),
+        ]),
+        # db.repository.pod_sample_rows() kolonları
+        'pods': pa.schema(
+            [('cluster_id', pa.int32()), ('namespace', pa.string()),
+             ('pod', pa.string()), ('ts', pa.timestamp('us')),
+             ('status', pa.string()), ('node_name', pa.string()),
+             ('restart_count', pa.int64())]
+            + [(name, pa.float64()) for name in (
+                'cpu_request', 'memory_request', 'cpu_limit', 'memory_limit',
+                'cpu_actual', 'memory_actual_gib', 'cpu_efficiency_pct',
+                'memory_efficiency_pct', 'ephemeral_storage_gib', 'age_hours')]
+            + [('pod_created_at', pa.timestamp('us'))]
+        ),
+    }
+
+
+def _day_dir(dataset, day):
+    return os.path.join(ARCHIVE_DIR, dataset, f"day={day:%Y-%m-%d}")
+
+
+def has_data():
+    return pa is not None and os.path.isdir(os.path.join(ARCHIVE_DIR, 'namespaces'))
+
+
+def archived_days(dataset='namespaces'):
+    """Arşivdeki günler (sıralı)."""
+    root = os.path.join(ARCHIVE_DIR, dataset)
+    if not os.path.isdir(root):
+        return []
+    days = []
+    for name in os.listdir(root):
+        if name.startswith('day=') and os.path.exists(os.path.join(root, name, 'part-0.parquet')):
+            days.append(datetime.strptime(name[4:], '%Y-%m-%d'))
+    return sorted(days)
+
+
+# ── Writing ───────────────────────────────────────────────────
+
+def _write(dataset, day, rows):
+    """rows: sözlük listesi → day=.../part-0.parquet (atomik rename)"""
+    directory = _day_dir(dataset, day)
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pylist(rows, schema=SCHEMAS[dataset])
+    tmp = os.path.join(directory, 'part-0.parquet.tmp')
+    pq.write_table(table, tmp, compression='zstd')
+    os.replace(tmp, os.path.join(directory, 'part-0.parquet'))
+    return os.path.getsize(os.path.join(directory, 'part-0.parquet'))
+
+
+def _pod_lists(db, metrics, day):
+    """
+    Metric satırlarının pod listeleri. pod_data snapshot deposundaysa
+    (NULL) her (cluster, namespace) için günün durumları tek seferde kurulur.
+    """
+    from db.repository import pod_sample_rows
+
+    reader = SnapshotReader(db)
+    states = {}
+    for m in metrics:
+        if m.pod_data is not None:
+            yield m, pod_sample_rows(m.cluster_id, m.namespace, m.pod_data, m.timestamp)
+            continue
+        key = (m.cluster_id, m.namespace)
+        if key not in states:
+            history = reader.history(m.cluster_id, m.namespace, day,
+                                     day + timedelta(days=1))
+            initial = reader.at(m.cluster_id, m.namespace, day)
+            states[key] = ([(day, initial or [])] if initial is not None else []) + history
+        pods = []
+        for ts, state in states[key]:
+            if ts > m.timestamp:
+                break
+            pods = state
+        yield m, pod_sample_rows(m.cluster_id, m.namespace, pods, m.timestamp)
+
+
+def archive_day(db, day):
+    """
+    [day, day+1) aralığındaki metrics satırlarını ve pod durumlarını
+    Parquet'e yaz; günün metrics / pod_samples satırlarını ve artık
+    gerekmeyen pod_snapshots satırlarını DB'den sil.
+    Döndürür: arşivlenen satır sayısı.
+    """
+    end = day + timedelta(days=1)
+    metrics = (
+        db.query(Metric)
+        .filter(Metric.timestamp >= day, Metric.timestamp < end)
+        .order_by(Metric.cluster_id, Metric.namespace, Metric.timestamp)
+        .all()
+    )
+    if not metrics:
+        return 0
+
+    namespace_rows, pod_rows = [], []
+    for m, pods in _pod_lists(db, metrics, day):
+        namespace_rows.append({
+            'cluster_id': m.cluster_id, 'namespace': m.namespace,
+            'timestamp': m.timestamp, 'total_cpu': m.total_cpu,
+            'total_memory': m.total_memory, 'total_restarts': m.total_restarts,
+            'pod_count': len(pods),
+        })
+        pod_rows.extend(pods)
+
+    size = _write('namespaces', day, namespace_rows)
+    size += _write('pods', day, pod_rows)
+
+    # Arşiv diskte — günü DB'den kaldır (partition'lı ise önceki günler zaten arşivde)
+    partitions.drop_before(db, 'metrics', end)
+    partitions.drop_before(db, 'pod_samples', end)
+    (
+        db.query(Metric)
+        .filter(Metric.timestamp >= day, Metric.timestamp < end)
+        .delete(synchronize_session=False)
+    )
+    (
+        db.query(PodSample)
+        .filter(PodSample.ts >= day, PodSample.ts < end)
+        .delete(synchronize_session=False)
+    )
+    # Ertesi günün başındaki durum (zincir) tutulur
+    deleted_snapshots = snapshots.apply_retention(db, end)
+    db.commit()
+    db.expunge_all()
+    logger.info(f"🗄  Archived {day:%Y-%m-%d}: {len(namespace_rows)} metric rows, "
+                f"{len(pod_rows)} pod rows → {size / 1024:.0f} KiB parquet "
+                f"({deleted_snapshots} pod snapshots pruned)")
+    return len(namespace_rows)
+
+
+def archive_old_metrics(db, now=None):
+    """
+    ARCHIVE_AFTER_DAYS'ten eski, saatlik rollup'ı tamamlanmış günleri arşivle.
+    Döndürür: arşivlenen satır sayısı.
+    """
+    if not ARCHIVE_ENABLED:
+        return 0
+    if pa is None:
+        logger.warning("Metric archive skipped: pyarrow is not installed")
+        return 0
+
+    now = now or datetime.utcnow()
+    watermark = db.get(RollupWatermark, 'hourly')
+    if watermark is None or watermark.processed_until is None:
+        return 0
+    limit = min(now - timedelta(days=ARCHIVE_AFTER_DAYS), watermark.processed_until)
+    limit = limit.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    first = db.query(func.min(Metric.timestamp)).scalar()
+    if first is None:
+        return 0
+    day = first.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    archived = 0
+    while day < limit:
+        try:
+            archived += archive_day(db, day)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Archive of {day:%Y-%m-%d} failed: {e}")
+            break
+        day += timedelta(days=1)
+    return archived
+
+
+def prune_before(cutoff):
+    """Lisans retention'ı: cutoff'tan önceki arşiv günlerini sil."""
+    removed = 0
+    for dataset in ('namespaces', 'pods'):
+        for day in archived_days(dataset):
+            if day + timedelta(days=1) <= cutoff:
+                shutil.rmtree(_day_dir(dataset, day), ignore_errors=True)
+                removed += 1
+    return removed
+
+
+# ── Query layer ───────────────────────────────────────────────
+
+def _dataset(name):
+    path = os.path.join(ARCHIVE_DIR, name)
+    if pa is None or not os.path.isdir(path):
+        return None
+    return ds.dataset(
+        path, format='parquet',
+        schema=SCHEMAS[name].append(pa.field('day', pa.string())),
+        partitioning=ds.partitioning(pa.schema([('day', pa.string())]), flavor='hive'))
+
+
+def _scan(name, columns, since, until, **equals):
+    """since <= timestamp < until (+ eşitlik filtreleri) → pyarrow Table"""
+    dataset = _dataset(name)
+    if dataset is None:
+        return None
+    ts = 'timestamp' if name == 'namespaces' else 'ts'
+    # Önce day partition'ı ile budama, sonra satır filtresi
+    expr = ((ds.field('day') >= f"{since:%Y-%m-%d}")
+            & (ds.field('day') <= f"{until:%Y-%m-%d}")
+            & (ds.field(ts) >= pa.scalar(since, type=pa.timestamp('us')))
+            & (ds.field(ts) < pa.scalar(until, type=pa.timestamp('us'))))
+    for column, value in equals.items():
+        if value is not None:
+            expr = expr & (ds.field(column) == value)
+    return dataset.to_table(columns=list(columns), filter=expr)
+
+
+def read_raw(since, until, cluster_id=None, namespace=None):
+    """
+    Arşivdeki namespace satırları: (cluster_id, namespace, timestamp,
+    total_cpu, total_memory, total_restarts) tuple'ları, zaman sırasıyla.
+    """
+    table = _scan('namespaces', RAW_COLUMNS, since, until,
+                  cluster_id=cluster_id, namespace=namespace)
+    if table is None or table.num_rows == 0:
+        return []
+    table = table.sort_by('timestamp')
+    return list(zip(*(table.column(col).to_pylist() for col in RAW_COLUMNS)))
+
+
+def read_pods(since, until, cluster_id=None, namespace=None, pod=None):
+    """Arşivdeki pod satırları (pod_samples kolonlarıyla sözlükler)."""
+    if pa is None:
+        return []
+    table = _scan('pods', SCHEMAS['pods'].names, since, until,
+                  cluster_id=cluster_id, namespace=namespace, pod=pod)
+    return table.sort_by('ts').to_pylist() if table is not None else []
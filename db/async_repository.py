@@ -0,0 +1,116 @@
+# db/async_repository.py
+"""
+Async counterpart of MetricRepository for the FastAPI routes.
+
+Simple lookups are native select() statements on the AsyncSession. The
+heavier read paths (latest pod samples, pod history, snapshot hydration,
+rollup series) reuse the sync implementations through
+AsyncSession.run_sync(): the sync code runs against the same asyncpg
+connection, so its I/O still yields to the event loop.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Alert, ApiKey, Cluster, CurrentNamespaceState, Forecast, Metric
+from .repository import MetricRepository
+from . import rollups
+
+
+class AsyncMetricRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _sync(self, method, *args, **kwargs):
+        """MetricRepository metodunu async oturumun bağlantısında çalıştır."""
+        return await self.db.run_sync(
+            lambda session: getattr(MetricRepository(session), method)(*args, **kwargs))
+
+    async def get_cluster_by_name(self, name: str):
+        return await self.db.scalar(select(Cluster).where(Cluster.name == name))
+
+    async def get_all_clusters(self):
+        return (await self.db.scalars(select(Cluster).order_by(Cluster.name))).all()
+
+    async def get_cluster_names(self):
+        """cluster id → isim"""
+        return {c.id: c.name for c in await self.get_all_clusters()}
+
+    async def get_last_seen(self, cluster_id):
+        """Cluster'ın son metrik zamanı (ix_metrics_cluster_ts)"""
+        return await self.db.scalar(
+            select(func.max(Metric.timestamp)).where(Metric.cluster_id == cluster_id))
+
+    async def get_latest_metrics(self, cluster_id=None, namespace=None, hours=24):
+        query = select(Metric)
+        if cluster_id:
+            query = query.where(Metric.cluster_id == cluster_id)
+        if namespace:
+            query = query.where(Metric.namespace == namespace)
+
+        since = datetime.utcnow() - timedelta(hours=hours)
+        query = query.where(Metric.timestamp >= since)
+
+        return (await self.db.scalars(query.order_by(Metric.timestamp.desc()))).all()
+
+    async def get_latest_per_namespace(self, cluster_id=None, hours=None):
+        """MetricRepository.get_latest_per_namespace ile aynı anlam."""
+        query = select(CurrentNamespaceState)
+        if cluster_id is not None:
+            query = query.where(CurrentNamespaceState.cluster_id == cluster_id)
+        if hours is not None:
+            query = query.where(CurrentNamespaceState.timestamp >=
+                                datetime.utcnow() - timedelta(hours=hours))
+        current = (await self.db.scalars(query)).all()
+        if current:
+            return current
+        return await self._sync('_latest_per_namespace_from_metrics', cluster_id, hours)
+
+    async def hydrate_pod_data(self, metrics):
+        return await self._sync('hydrate_pod_data', metrics)
+
+    async def get_latest_pod_samples(self, cluster_id=None, namespace=None,
+                                     with_usage=False):
+        return await self._sync('get_latest_pod_samples', cluster_id=cluster_id,
+                                namespace=namespace, with_usage=with_usage)
+
+    async def get_pod_history(self, cluster_id, namespace, pod, hours=24):
+        return await self._sync('get_pod_history', cluster_id, namespace, pod,
+                                hours=hours)
+
+    async def daily_series(self, metric, since, cluster_id=None, namespace=None):
+        return await self.db.run_sync(
+            rollups.daily_series, metric, since,
+            cluster_id=cluster_id, namespace=namespace)
+
+    async def get_forecasts(self, cluster_id=None, namespace=None, metric_type=None,
+                            horizon_days=None):
+        query = select(Forecast)
+        if cluster_id is not None:
+            query = query.where(Forecast.cluster_id == cluster_id)
+        if namespace:
+            query = query.where(Forecast.namespace == namespace)
+        if metric_type:
+            query = query.where(Forecast.metric_type == metric_type)
+        if horizon_days is not None:
+            query = query.where(Forecast.horizon_days == horizon_days)
+        return (await self.db.scalars(query.order_by(
+            Forecast.cluster_id, Forecast.namespace, Forecast.metric_type,
+            Forecast.horizon_days))).all()
+
+    async def get_active_alerts(self, cluster_id=None):
+        query = select(Alert).where(Alert.resolved == False)
+        if cluster_id:
+            query = query.where(Alert.cluster_id == cluster_id)
+        return (await self.db.scalars(query)).all()
+
+    async def get_alerts(self, cluster_id=None):
+        query = select(Alert)
+        if cluster_id:
+            query = query.where(Alert.cluster_id == cluster_id)
+        return (await self.db.scalars(query)).all()
+
+    async def get_active_api_key(self, key_hash: str):
+        return await self.db.scalar(select(ApiKey).where(
+            ApiKey.key_hash == key_hash, ApiKey.is_active == True))
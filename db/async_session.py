@@ -0,0 +1,119 @@
+# db/async_session.py
+"""
+Async engine and session factory for the API.
+
+The URL is derived from DATABASE_URL (postgresql:// → postgresql+asyncpg://,
+sqlite:// → sqlite+aiosqlite://) unless KUBEPOCKET_ASYNC_DATABASE_URL is
+set. The engine is created on first use, so the collector and the other
+sync tools never import the async drivers.
+
+AsyncReadSessionLocal() routes read-only sessions to the DATABASE_READ_URL
+replicas with the same lag rules as db/routing.py.
+"""
+import os
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from .models import DATABASE_URL, _json_serializer
+from .routing import READ_URLS, Replica, ReplicaSet, measure_lag, replica_name
+
+# API'nin eşzamanlı istek kapasitesi: her bekleyen sorgu bir bağlantı tutar
+ASYNC_POOL_SIZE = int(os.getenv('KUBEPOCKET_ASYNC_POOL_SIZE', '20'))
+ASYNC_MAX_OVERFLOW = int(os.getenv('KUBEPOCKET_ASYNC_MAX_OVERFLOW', '20'))
+
+_ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def to_async_url(url):
+    scheme, sep, rest = url.partition('://')
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = (os.getenv('KUBEPOCKET_ASYNC_DATABASE_URL')
+                      or to_async_url(DATABASE_URL))
+
+_engine = None
+_sessionmaker = None
+_replicas = None
+
+
+def _create_engine(url):
+    options = {'json_serializer': _json_serializer, 'pool_pre_ping': True}
+    if not url.startswith('sqlite'):
+        options.update(pool_size=ASYNC_POOL_SIZE,
+                       max_overflow=ASYNC_MAX_OVERFLOW, pool_recycle=300)
+    return create_async_engine(url, **options)
+
+
+def get_async_engine():
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(ASYNC_DATABASE_URL)
+    return _engine
+
+
+def async_replica_set():
+    global _replicas
+    if _replicas is None:
+        _replicas = ReplicaSet([
+            Replica(replica_name(i), _create_engine(to_async_url(url)))
+            for i, url in enumerate(READ_URLS)
+        ])
+    return _replicas
+
+
+async def _probe(replica):
+    try:
+        async with replica.engine.connect() as conn:
+            replica.record(lag=await conn.run_sync(measure_lag))
+    except Exception as e:
+        replica.record(error=str(e).splitlines()[0])
+
+
+async def get_async_read_engine():
+    """Okuma için engine: lag'i kabul edilebilir ilk replica, yoksa primary."""
+    for replica in async_replica_set().candidates():
+        if replica.stale:
+            await _probe(replica)
+        if replica.usable:
+            return replica.engine
+    return get_async_engine()
+
+
+def _get_sessionmaker():
+    global _sessionmaker
+    if _sessionmaker is None:
+        # Commit sonrası nesneler expire edilmez: async'te lazy load yapılamaz
+        _sessionmaker = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _sessionmaker
+
+
+def AsyncSessionLocal():
+    return _get_sessionmaker()()
+
+
+async def AsyncReadSessionLocal():
+    """AsyncSessionLocal() gibi, ama get_async_read_engine()'e bağlı."""
+    return _get_sessionmaker()(bind=await get_async_read_engine())
+
+
+def async_engines():
+    """Bu süreçteki async engine'ler: {'primary': ..., 'replica-0': ...}"""
+    named = {'primary': get_async_engine()}
+    named.update((r.name, r.engine) for r in async_replica_set().replicas)
+    return named
+
+
+async def dispose_async_engine():
+    global _engine, _sessionmaker, _replicas
+    if _engine is not None:
+        await _engine.dispose()
+    for replica in (_replicas.replicas if _replicas else []):
+        await replica.engine.dispose()
+    _engine = _sessionmaker = _replicas = None
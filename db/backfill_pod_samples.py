@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# db/backfill_pod_samples.py
+"""
+Backfill pod_samples from historical Metric.pod_data blobs.
+
+Walks the metrics table in id order, batch by batch, and inserts one
+pod_samples row per pod. Metric rows whose (cluster_id, namespace,
+timestamp) already has samples — written by save_metrics() dual-write or
+an earlier run — are skipped, so the tool can be stopped and re-run.
+
+Usage:
+    python -m db.backfill_pod_samples [--days 30] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from db import bulk
+from db.models import Metric, PodSample, SessionLocal
+from db.repository import MetricRepository, pod_sample_rows
+
+
+def _existing_keys(db, metrics):
+    """Bu batch'te zaten sample'ı olan (cluster_id, namespace, ts) anahtarları"""
+    timestamps = [m.timestamp for m in metrics]
+    rows = (
+        db.query(PodSample.cluster_id, PodSample.namespace, PodSample.ts)
+        .filter(PodSample.ts >= min(timestamps), PodSample.ts <= max(timestamps))
+        .distinct()
+        .all()
+    )
+    return {tuple(r) for r in rows}
+
+
+def backfill(db, days=None, batch_size=500):
+    query = db.query(Metric).order_by(Metric.id)
+    count = db.query(func.count(Metric.id))
+    if days:
+        since = datetime.utcnow() - timedelta(days=days)
+        query = query.filter(Metric.timestamp >= since)
+        count = count.filter(Metric.timestamp >= since)
+
+    total = count.scalar()
+    print(f"📦 Backfilling pod_samples from {total} metric rows...")
+
+    repo = MetricRepository(db)
+    started = time.monotonic()
+    last_id = 0
+    metric_rows = inserted = skipped = 0
+    while True:
+        batch = query.filter(Metric.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        existing = _existing_keys(db, batch)
+        samples = []
+        for m in batch:
+            if (m.cluster_id, m.namespace, m.timestamp) in existing:
+                skipped += 1
+                continue
+            # pod_data snapshot deposundaysa oradan kur
+            repo.hydrate_pod_data([m])
+            samples.extend(pod_sample_rows(
+                m.cluster_id, m.namespace, m.pod_data or [], m.timestamp))
+
+        bulk.bulk_insert(db, PodSample, samples)
+        db.commit()
+        # Yüklenen blob'ları bellekte tutma
+        db.expunge_all()
+
+        metric_rows += len(batch)
+        inserted += len(samples)
+        elapsed = time.monotonic() - started
+        eta = elapsed / metric_rows * max(total - metric_rows, 0)
+        print(f"  … {metric_rows}/{total} metric rows, {inserted} pod samples "
+              f"(ETA {eta:.0f}s)")
+
+    print(f"✅ Backfill done: {inserted} pod samples from {metric_rows} metric rows "
+          f"({skipped} already present) in {time.monotonic() - started:.1f}s")
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Backfill pod_samples from Metric.pod_data')
+    parser.add_argument('--days', type=int, default=None,
+                        help='Only backfill the last N days (default: all)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        backfill(db, days=args.days, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
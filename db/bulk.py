@@ -0,0 +1,168 @@
+# db/bulk.py
+"""
+Bulk row ingestion.
+
+On PostgreSQL with psycopg2, rows are streamed with COPY ... FROM STDIN
+(CSV) — one round trip per batch, no ORM unit of work. JSON columns are
+encoded with orjson. Other databases/drivers fall back to a Core
+executemany, which SQLAlchemy 2 batches into multi-row INSERTs
+(insertmanyvalues). Both run inside the caller's session transaction.
+
+upsert() is the shared INSERT ... ON CONFLICT DO UPDATE used by the
+per-cycle state tables (current state, rollups, running statistics,
+forecasts, seasonal profiles); dialects without ON CONFLICT get a
+row-by-row UPDATE-then-INSERT with the same SET expressions.
+"""
+import io
+import json
+import os
+import time
+
+from sqlalchemy import JSON, and_, bindparam, insert, update
+
+try:
+    from orjson import dumps as _orjson_dumps
+
+    def json_dumps(obj):
+        return _orjson_dumps(obj).decode('utf-8')
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj)
+
+# Bulk yolunu kapatmak için KUBEPOCKET_BULK_INGEST=false (ORM add/commit'e döner)
+BULK_INGEST_ENABLED = os.getenv(
+    'KUBEPOCKET_BULK_INGEST', 'true').lower() == 'true'
+# COPY / executemany başına satır sayısı
+BULK_BATCH_SIZE = int(os.getenv('KUBEPOCKET_BULK_BATCH_SIZE', '10000'))
+
+
+def _supports_copy(session):
+    dialect = session.get_bind().dialect
+    return dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+
+
+def _csv_field(value):
+    """
+    COPY CSV alanı. None → tırnaksız boş alan (NULL); metin her zaman
+    tırnaklı, böylece '' NULL değil boş string olarak yüklenir
+    (csv.writer QUOTE_MINIMAL ikisini de tırnaksız boş yazar).
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (bool, int, float)):
+        return str(value)
+    text = value if isinstance(value, str) else str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _csv_buffer(rows, columns, json_columns):
+    buf = io.StringIO()
+    for row in rows:
+        values = []
+        for col in columns:
+            value = row.get(col)
+            if value is not None and col in json_columns:
+                value = json_dumps(value)
+            values.append(_csv_field(value))
+        buf.write(','.join(values))
+        buf.write('\n')
+    buf.seek(0)
+    return buf
+
+
+def _copy_batch(session, table, rows, columns, json_columns):
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) "
+            f"FROM STDIN WITH (FORMAT csv)",
+            _csv_buffer(rows, columns, json_columns))
+    finally:
+        cursor.close()
+
+
+def bulk_insert(session, model, rows, batch_size=BULK_BATCH_SIZE):
+    """
+    rows'u (sözlük listesi) model tablosuna yaz; commit çağıranın işi.
+    Döndürür: (satır sayısı, yöntem, süre saniye)
+    """
+    if not rows:
+        return 0, 'none', 0.0
+
+    table = model.__table__
+    started = time.perf_counter()
+    if _supports_copy(session):
+        method = 'copy'
+        # Satırlarda bulunan kolonlar; eksik olanlar (id) DB default'unu alır
+        columns = [c.name for c in table.columns if c.name in rows[0]]
+        json_columns = {c.name for c in table.columns
+                        if isinstance(c.type, JSON)}
+        for i in range(0, len(rows), batch_size):
+            _copy_batch(session, table, rows[i:i + batch_size],
+                        columns, json_columns)
+    else:
+        method = 'executemany'
+        for i in range(0, len(rows), batch_size):
+            session.execute(insert(model), rows[i:i + batch_size])
+    return len(rows), method, time.perf_counter() - started
+
+
+# INSERT ... ON CONFLICT DO UPDATE desteği olan dialect'ler
+_ON_CONFLICT_DIALECTS = ('postgresql', 'sqlite')
+
+
+class _Excluded:
+    """Genel upsert yolunda 'excluded' satırı: kolon başına bind parametresi."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, name):
+        return bindparam(f'excluded_{name}', type_=self._table.c[name].type)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+
+def upsert(session, model, rows, index_elements, set_):
+    """
+    rows'u index_elements üzerinde çakışırsa güncelleyerek yaz; commit
+    çağıranın işi. set_(excluded) → {kolon: ifade}: excluded yeni satırın
+    kolonları, model.__table__.c mevcut satırınkiler.
+
+    PostgreSQL / SQLite'ta tek INSERT ... ON CONFLICT DO UPDATE
+    (executemany). Diğer dialect'lerde satır başına UPDATE, eşleşme yoksa
+    INSERT — aynı ifadeler, çağıranın transaction'ı içinde.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in _ON_CONFLICT_DIALECTS:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=index_elements, set_=set_(stmt.excluded)), rows)
+        return
+
+    table = model.__table__
+    excluded = _Excluded(table)
+    stmt = (
+        update(table)
+        .where(and_(*(table.c[col] == excluded[col] for col in index_elements)))
+        .values(set_(excluded))
+    )
+    for row in rows:
+        params = {f'excluded_{col}': value for col, value in row.items()}
+        if session.execute(stmt, params).rowcount == 0:
+            session.execute(insert(model), [row])
+
+
+def report(label, count, method, seconds):
+    rate = count / seconds if seconds > 0 else float('inf')
+    print(f"⚡ {label}: {count} rows via {method} in {seconds:.3f}s "
+          f"({rate:,.0f} rows/s)")
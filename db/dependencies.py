@@ -14,3 +14,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    get_db()'nin async karşılığı (asyncpg). async def route'lar bunu
+    kullanır; sorgu beklerken event loop diğer isteklere devam eder.
+    """
+    from .async_session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """
+    Sadece okuyan route'lar için: DATABASE_READ_URL replica'larından biri
+    (lag eşiğini aşmamışsa), yoksa primary.
+    """
+    from .async_session import AsyncReadSessionLocal
+
+    async with await AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,148 @@
+# db/partitions.py
+"""
+Daily range partitions for metrics, pod_samples and kube_events (PostgreSQL).
+
+Migrations 008 (metrics, kube_events) and 014 (pod_samples) turn these
+tables into RANGE-partitioned parents keyed by their timestamp column,
+with one child table per UTC day (metrics_p20260101, ...) and a DEFAULT
+partition as a safety net.
+
+- ensure_upcoming() creates today's and the next
+  KUBEPOCKET_PARTITION_PRECREATE_DAYS partitions; the collector calls it
+  every cycle, so inserts never land in the default partition.
+- drop_before() enforces retention by detaching and dropping every
+  partition that lies entirely before the cutoff — no row-by-row DELETE,
+  no table bloat.
+
+All functions accept a Session or Connection and are no-ops for tables
+that are not partitioned (SQLite, or a database created by create_all()).
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Tablo → partition anahtarı kolonu
+PARTITIONED_TABLES = {
+    'metrics': 'timestamp',
+    'pod_samples': 'ts',
+    'kube_events': 'created_at',
+}
+
+# Bugünden itibaren önceden oluşturulacak gün sayısı
+PRECREATE_DAYS = int(os.getenv('KUBEPOCKET_PARTITION_PRECREATE_DAYS', '7'))
+
+_PARTITION_RE = re.compile(r'^(?P<table>\w+)_p(?P<day>\d{8})$')
+
+
+def partition_name(table, day):
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _dialect_name(conn):
+    # Session → get_bind(), Connection → .dialect
+    bind = conn.get_bind() if hasattr(conn, 'get_bind') else conn
+    return bind.dialect.name
+
+
+def is_partitioned(conn, table):
+    if _dialect_name(conn) != 'postgresql':
+        return False
+    return conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = :table
+    """), {'table': table}).first() is not None
+
+
+def create_partition(conn, table, day):
+    """[day, day+1) aralığı için partition (varsa dokunmaz)."""
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, day)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{day.isoformat()}') "
+        f"TO ('{(day + timedelta(days=1)).isoformat()}')"
+    ))
+
+
+def create_default_partition(conn, table):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+
+def ensure_range(conn, table, start, end):
+    """start..end (dahil) günleri için partition oluştur."""
+    day = start
+    while day <= end:
+        create_partition(conn, table, day)
+        day += timedelta(days=1)
+
+
+def ensure_upcoming(conn, days=PRECREATE_DAYS):
+    """Dün, bugün ve sonraki `days` gün için partition'ları oluştur."""
+    today = datetime.utcnow().date()
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        try:
+            with conn.begin_nested():
+                ensure_range(conn, table, today - timedelta(days=1),
+                             today + timedelta(days=days))
+        except Exception as e:
+            # Ör. default partition'da bu aralığa düşen satır varsa
+            logger.warning(f"Partitions for {table}: create failed: {e}")
+
+
+def list_partitions(conn, table):
+    """Günlük partition'lar: [(isim, gün)] — gün sırasına göre."""
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+    """), {'table': table}).all()
+
+    partitions = []
+    for (name,) in rows:
+        match = _PARTITION_RE.match(name)
+        if match and match.group('table') == table:
+            partitions.append(
+                (name, datetime.strptime(match.group('day'), '%Y%m%d').date()))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def drop_before(conn, table, cutoff):
+    """
+    Tamamen cutoff'tan önce kalan günlük partition'ları detach + drop et.
+    cutoff'u içeren gün kalır; içindeki eski satırlar çağıranın DELETE'ine
+    bırakılır (partition pruning sayesinde tek bir günü tarar).
+    Döndürür: düşürülen partition isimleri.
+    """
+    if not is_partitioned(conn, table):
+        return []
+
+    cutoff_day = cutoff.date() if isinstance(cutoff, datetime) else cutoff
+    dropped = []
+    for name, day in list_partitions(conn, table):
+        # [day, day+1) tamamen cutoff'tan önce mi?
+        if day + timedelta(days=1) > cutoff_day:
+            break
+        try:
+            with conn.begin_nested():
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+        except Exception as e:
+            # Aynı DB'yi paylaşan başka bir collector önce davranmış olabilir
+            logger.warning(f"Partition {name}: drop failed: {e}")
+    return dropped
+
+
+def apply_retention(conn, cutoff):
+    """Tüm partition'lı tablolarda cutoff öncesi günleri düşür."""
+    return {table: drop_before(conn, table, cutoff)
+            for table in PARTITIONED_TABLES}
@@ -1,8 +1,53 @@
 # db/repository.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from .models import Cluster, Metric, Alert
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, insert, or_
+from datetime import datetime, timedelta, timezone
+from .models import (Cluster, Metric, Alert, PodSample, CurrentNamespaceState,
+                     Forecast)
+from . import archive, bulk, running_stats, snapshots
+from .bulk import BULK_INGEST_ENABLED
+from .running_stats import RUNNING_STATS_ENABLED
+from .snapshots import SNAPSHOT_STORAGE_ENABLED
+import os
+
+# save_metrics() pod'ları pod_samples tablosuna da yazar (dual-write)
+POD_SAMPLES_ENABLED = os.getenv(
+    'KUBEPOCKET_POD_SAMPLES', 'true').lower() == 'true'
+
+
+def _parse_created_at(value):
+    """ISO string → naive UTC datetime (DateTime kolonları naive)"""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def pod_sample_rows(cluster_id, namespace, pods, ts):
+    """pod_data sözlüklerini pod_samples satırlarına çevir"""
+    return [{
+        'cluster_id': cluster_id,
+        'namespace': namespace,
+        'pod': pod.get('name', ''),
+        'ts': ts,
+        'status': pod.get('status'),
+        'node_name': pod.get('node_name'),
+        'restart_count': pod.get('restart_count', 0),
+        'cpu_request': pod.get('cpu_request', 0.0),
+        'memory_request': pod.get('memory_request', 0.0),
+        'cpu_limit': pod.get('cpu_limit', 0.0),
+        'memory_limit': pod.get('memory_limit', 0.0),
+        'cpu_actual': pod.get('cpu_actual'),
+        'memory_actual_gib': pod.get('memory_actual_gib'),
+        'cpu_efficiency_pct': pod.get('cpu_efficiency_pct'),
+        'memory_efficiency_pct': pod.get('memory_efficiency_pct'),
+        'ephemeral_storage_gib': pod.get('ephemeral_storage_gib'),
+        'age_hours': pod.get('age_hours', 0.0),
+        'pod_created_at': _parse_created_at(pod.get('created_at')),
+    } for pod in pods]
 
 
 class MetricRepository:
@@ -29,23 +74,108 @@ class MetricRepository:
         return self.db.query(Cluster).order_by(Cluster.name).all()
 
     def save_metrics(self, cluster_id, metrics_data):
-        saved_count = 0
+        # Aynı döngünün Metric ve PodSample satırları aynı timestamp'i taşır
+        now = datetime.utcnow()
+        metric_rows = []
+        samples = []
         for ns_data in metrics_data:
-            metric = Metric(
-                cluster_id=cluster_id,
-                namespace=ns_data['namespace'],
-                pod_data=ns_data['pods'],
-                total_cpu=ns_data['total_cpu_request'],
-                total_memory=ns_data['total_memory_request'],
-                total_restarts=ns_data['total_restarts']
-            )
-            self.db.add(metric)
-            saved_count += 1
+            pods = ns_data['pods']
+            # Kolon bazlı PodTable → JSON için sözlük listesi
+            if hasattr(pods, 'to_dicts'):
+                pods = pods.to_dicts()
+            if POD_SAMPLES_ENABLED:
+                samples.extend(pod_sample_rows(
+                    cluster_id, ns_data['namespace'], pods, now))
+            metric_rows.append({
+                'cluster_id': cluster_id,
+                'namespace': ns_data['namespace'],
+                'timestamp': now,
+                'pod_data': pods,
+                'total_cpu': ns_data['total_cpu_request'],
+                'total_memory': ns_data['total_memory_request'],
+                'total_restarts': ns_data['total_restarts'],
+            })
 
-        self.db.commit()
-        print(f"✅ {saved_count} namespace metrics saved")
+        try:
+            stored_rows = metric_rows
+            if SNAPSHOT_STORAGE_ENABLED:
+                # Pod listesi pod_snapshots'a delta olarak; Metric.pod_data boş
+                snap = snapshots.SnapshotWriter(self.db).write(
+                    cluster_id, now,
+                    {row['namespace']: row['pod_data'] for row in metric_rows})
+                stored_rows = [dict(row, pod_data=None) for row in metric_rows]
+                ratio = snap['raw_bytes'] / snap['bytes'] if snap['bytes'] else 0
+                print(f"🗜  pod snapshots: {snap['key']} key, {snap['delta']} delta, "
+                      f"{snap['skipped']} unchanged — {snap['bytes']} bytes"
+                      + (f" ({ratio:.0f}x)" if ratio else ""))
+
+            if BULK_INGEST_ENABLED:
+                # COPY (PostgreSQL) veya batch executemany — ORM unit of work yok
+                bulk.report('metrics', *bulk.bulk_insert(self.db, Metric, stored_rows))
+                if samples:
+                    bulk.report('pod_samples',
+                                *bulk.bulk_insert(self.db, PodSample, samples))
+            else:
+                self.db.add_all(Metric(**row) for row in stored_rows)
+                if samples:
+                    self.db.execute(insert(PodSample), samples)
+            # Son durum tam pod listesiyle tutulur
+            self.upsert_current_state(cluster_id, metric_rows)
+            if RUNNING_STATS_ENABLED:
+                # Ortalama / std / min / max / eğim durumu — O(1) / örnek
+                running_stats.update(self.db, cluster_id, now, metric_rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            snapshots.invalidate(cluster_id)
+            raise
+
+        saved_count = len(metric_rows)
+        print(f"✅ {saved_count} namespace metrics saved"
+              + (f", {len(samples)} pod samples" if samples else ""))
         return saved_count
 
+    def hydrate_pod_data(self, metrics):
+        """
+        pod_data'sı snapshot deposunda olan Metric satırlarını doldur
+        (oturumu kirletmeden). Döndürür: metrics.
+        """
+        reader = snapshots.SnapshotReader(self.db)
+        for m in metrics:
+            if m.pod_data is None:
+                set_committed_value(m, 'pod_data', reader.at(
+                    m.cluster_id, m.namespace, m.timestamp) or [])
+        return metrics
+
+    def upsert_current_state(self, cluster_id, metric_rows):
+        """
+        Döngünün namespace satırlarını current_namespace_state'e yaz
+        (INSERT ... ON CONFLICT DO UPDATE). Bu döngüde görülmeyen
+        namespace'ler (silinmiş) tablodan çıkarılır. Commit çağıranın işi.
+        """
+        if not metric_rows:
+            return
+        rows = [dict(row, pod_count=len(row['pod_data'] or []))
+                for row in metric_rows]
+
+        bulk.upsert(
+            self.db, CurrentNamespaceState, rows,
+            index_elements=['cluster_id', 'namespace'],
+            set_=lambda new: {col: new[col] for col in
+                              ('timestamp', 'pod_data', 'pod_count', 'total_cpu',
+                               'total_memory', 'total_restarts')},
+        )
+
+        (
+            self.db.query(CurrentNamespaceState)
+            .filter(
+                CurrentNamespaceState.cluster_id == cluster_id,
+                CurrentNamespaceState.namespace.notin_(
+                    [row['namespace'] for row in rows]),
+            )
+            .delete(synchronize_session=False)
+        )
+
     def get_latest_metrics(self, cluster_id=None, namespace=None, hours=24):
         query = self.db.query(Metric)
 
@@ -59,13 +189,31 @@ class MetricRepository:
 
         return query.order_by(Metric.timestamp.desc()).all()
 
-    def get_latest_per_namespace(self, cluster_id=None):
+    def get_latest_per_namespace(self, cluster_id=None, hours=None):
         """
         Returns the most recent metric row per namespace.
         When cluster_id is provided, only that cluster's data is returned.
         When cluster_id is None, returns latest per namespace across ALL clusters
         (used by the exporter when iterating clusters explicitly).
+        With hours, rows older than that are skipped — a cluster whose
+        collector stopped keeps its current_namespace_state rows.
+
+        Reads current_namespace_state (one row per namespace, constant cost);
+        falls back to the max(timestamp) join over metrics while that table
+        is still empty.
         """
+        query = self.db.query(CurrentNamespaceState)
+        if cluster_id is not None:
+            query = query.filter(CurrentNamespaceState.cluster_id == cluster_id)
+        if hours is not None:
+            query = query.filter(CurrentNamespaceState.timestamp >=
+                                 datetime.utcnow() - timedelta(hours=hours))
+        current = query.all()
+        if current:
+            return current
+        return self._latest_per_namespace_from_metrics(cluster_id, hours)
+
+    def _latest_per_namespace_from_metrics(self, cluster_id=None, hours=None):
         subquery = (
             self.db.query(
                 Metric.namespace,
@@ -75,12 +223,15 @@ class MetricRepository:
         )
         if cluster_id is not None:
             subquery = subquery.filter(Metric.cluster_id == cluster_id)
+        if hours is not None:
+            subquery = subquery.filter(
+                Metric.timestamp >= datetime.utcnow() - timedelta(hours=hours))
 
         subquery = subquery.group_by(
             Metric.namespace, Metric.cluster_id
         ).subquery()
 
-        return (
+        return self.hydrate_pod_data(
             self.db.query(Metric)
             .join(
                 subquery,
@@ -91,6 +242,88 @@ class MetricRepository:
             .all()
         )
 
+    def get_latest_pod_samples(self, cluster_id=None, namespace=None,
+                               with_usage=False):
+        """
+        Her (cluster, namespace) için son döngünün pod satırları.
+        with_usage=True → sadece Metrics Server verisi olan pod'lar.
+        """
+        if self.db.query(CurrentNamespaceState.cluster_id).first() is not None:
+            # Son döngü zamanı current_namespace_state'te — geçmişi taramadan eşleş
+            latest = self.db.query(
+                CurrentNamespaceState.cluster_id,
+                CurrentNamespaceState.namespace,
+                CurrentNamespaceState.timestamp.label('max_ts')
+            )
+            if cluster_id is not None:
+                latest = latest.filter(CurrentNamespaceState.cluster_id == cluster_id)
+            if namespace:
+                latest = latest.filter(CurrentNamespaceState.namespace == namespace)
+            latest = latest.subquery()
+        else:
+            latest = self.db.query(
+                PodSample.cluster_id,
+                PodSample.namespace,
+                func.max(PodSample.ts).label('max_ts')
+            )
+            if cluster_id is not None:
+                latest = latest.filter(PodSample.cluster_id == cluster_id)
+            if namespace:
+                latest = latest.filter(PodSample.namespace == namespace)
+            latest = latest.group_by(
+                PodSample.cluster_id, PodSample.namespace
+            ).subquery()
+
+        query = self.db.query(PodSample).join(
+            latest,
+            (PodSample.cluster_id == latest.c.cluster_id) &
+            (PodSample.namespace == latest.c.namespace) &
+            (PodSample.ts == latest.c.max_ts)
+        )
+        if with_usage:
+            query = query.filter(or_(PodSample.cpu_actual.isnot(None),
+                                     PodSample.memory_actual_gib.isnot(None)))
+        return query.all()
+
+    def get_pod_history(self, cluster_id, namespace, pod, hours=24):
+        """
+        Tek bir pod'un zaman serisi (restart geçmişi, kullanım). Arşivlenmiş
+        günler Parquet'ten (kaydedilmemiş PodSample nesneleri olarak) gelir.
+        """
+        since = datetime.utcnow() - timedelta(hours=hours)
+        archived = []
+        days = archive.archived_days('pods') if archive.has_data() else []
+        if days and since < days[-1] + timedelta(days=1):
+            boundary = days[-1] + timedelta(days=1)
+            archived = [PodSample(**row) for row in archive.read_pods(
+                since, boundary, cluster_id=cluster_id, namespace=namespace, pod=pod)]
+            since = boundary
+        return archived + (
+            self.db.query(PodSample)
+            .filter(
+                PodSample.cluster_id == cluster_id,
+                PodSample.namespace == namespace,
+                PodSample.pod == pod,
+                PodSample.ts >= since,
+            )
+            .order_by(PodSample.ts)
+            .all()
+        )
+
+    def get_forecasts(self, cluster_id=None, namespace=None, metric_type=None,
+                      horizon_days=None):
+        """Stats daemon'un hesapladığı forecasts satırları (PK araması)"""
+        query = self.db.query(Forecast)
+        if cluster_id is not None:
+            query = query.filter(Forecast.cluster_id == cluster_id)
+        if namespace:
+            query = query.filter(Forecast.namespace == namespace)
+        if metric_type:
+            query = query.filter(Forecast.metric_type == metric_type)
+        if horizon_days is not None:
+            query = query.filter(Forecast.horizon_days == horizon_days)
+        return query.all()
+
     def create_alert(self, cluster_id, namespace, message, severity='warning'):
         alert = Alert(
             cluster_id=cluster_id,
@@ -0,0 +1,303 @@
+# db/rollups.py
+"""
+Hierarchical metric rollups: raw metrics (5m) → hourly → daily.
+
+Each tier keeps avg/min/max/last of total_cpu, total_memory and
+total_restarts per (cluster, namespace, bucket) plus the number of raw
+samples merged. Maintenance is incremental and driven by a watermark per
+tier (rollup_watermarks):
+
+- hourly: raw metrics rows with watermark <= timestamp < now - lag are
+  aggregated (scalar columns only, pod_data is never loaded) and merged
+  into their hour buckets with a weighted upsert, so a partially filled
+  hour keeps growing correctly across runs.
+- daily: hourly buckets that are completely behind the hourly watermark
+  are merged into day buckets the same way.
+
+Each tier has its own retention (KUBEPOCKET_ROLLUP_*_RETENTION_DAYS);
+raw metrics follow the license retention in run_collector. get_rollups()
+fills the range before the oldest stored bucket from the Parquet archive
+(db/archive.py), so long-range readers need no special casing.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from db import archive, bulk
+from db.models import (Metric, MetricRollupDaily, MetricRollupHourly,
+                       RollupWatermark)
+
+logger = logging.getLogger(__name__)
+
+HOURLY_RETENTION_DAYS = int(
+    os.getenv('KUBEPOCKET_ROLLUP_HOURLY_RETENTION_DAYS', '90'))
+DAILY_RETENTION_DAYS = int(
+    os.getenv('KUBEPOCKET_ROLLUP_DAILY_RETENTION_DAYS', '730'))
+# Commit'i gecikebilecek son döngü satırlarını kaçırmamak için bekleme payı
+ROLLUP_LAG_SECONDS = int(os.getenv('KUBEPOCKET_ROLLUP_LAG_SECONDS', '300'))
+# Tek seferde işlenecek en uzun ham veri aralığı (ilk çalıştırmada backfill)
+MAX_WINDOW = timedelta(days=7)
+
+METRICS = ('cpu', 'memory', 'restarts')
+RAW_COLUMNS = {'cpu': 'total_cpu', 'memory': 'total_memory',
+               'restarts': 'total_restarts'}
+
+
+def floor_hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class _Aggregate:
+    """Bir bucket'ın birleştirilebilir özeti."""
+
+    __slots__ = ('samples', 'last_ts', 'stats')
+
+    def __init__(self):
+        self.samples = 0
+        self.last_ts = None
+        self.stats = {}
+
+    def add(self, samples, last_ts, values):
+        """values: {metric: (avg, min, max, last)}"""
+        total = self.samples + samples
+        for metric, (avg, lo, hi, last) in values.items():
+            if metric not in self.stats:
+                self.stats[metric] = [avg, lo, hi, last]
+                continue
+            cur = self.stats[metric]
+            cur[0] = (cur[0] * self.samples + avg * samples) / total
+            cur[1] = min(cur[1], lo)
+            cur[2] = max(cur[2], hi)
+            if self.last_ts is None or last_ts >= self.last_ts:
+                cur[3] = last
+        if self.last_ts is None or last_ts >= self.last_ts:
+            self.last_ts = last_ts
+        self.samples = total
+
+    def row(self, cluster_id, namespace, bucket):
+        row = {'cluster_id': cluster_id, 'namespace': namespace,
+               'bucket': bucket, 'samples': self.samples,
+               'last_ts': self.last_ts}
+        for metric, (avg, lo, hi, last) in self.stats.items():
+            row.update({f'{metric}_avg': avg, f'{metric}_min': lo,
+                        f'{metric}_max': hi, f'{metric}_last': last})
+        return row
+
+
+def aggregate_raw(rows, floor):
+    """
+    Ham (cluster_id, namespace, ts, cpu, memory, restarts) satırlarını
+    bucket'lara topla: {(cluster_id, namespace, bucket): _Aggregate}
+    """
+    aggregates = {}
+    for cluster_id, namespace, ts, cpu, memory, restarts in rows:
+        key = (cluster_id, namespace, floor(ts))
+        agg = aggregates.get(key)
+        if agg is None:
+            agg = aggregates[key] = _Aggregate()
+        values = {'cpu': cpu or 0.0, 'memory': memory or 0.0,
+                  'restarts': float(restarts or 0)}
+        agg.add(1, ts, {m: (v, v, v, v) for m, v in values.items()})
+    return aggregates
+
+
+def _merge_upsert(db, model, rows):
+    """Satırları mevcut bucket'larla ağırlıklı olarak birleştirerek yaz."""
+    if not rows:
+        return
+    table = model.__table__
+
+    def merged(new):
+        total = table.c.samples + new.samples
+        newer = new.last_ts >= table.c.last_ts
+        set_ = {'samples': total,
+                'last_ts': case((newer, new.last_ts), else_=table.c.last_ts)}
+        for metric in METRICS:
+            avg, lo, hi, last = (f'{metric}_{agg}' for agg in ('avg', 'min', 'max', 'last'))
+            set_[avg] = (table.c[avg] * table.c.samples + new[avg] * new.samples) / total
+            set_[lo] = case((new[lo] < table.c[lo], new[lo]), else_=table.c[lo])
+            set_[hi] = case((new[hi] > table.c[hi], new[hi]), else_=table.c[hi])
+            set_[last] = case((newer, new[last]), else_=table.c[last])
+        return set_
+
+    bulk.upsert(db, model, rows,
+                index_elements=['cluster_id', 'namespace', 'bucket'], set_=merged)
+
+
+def _get_watermark(db, tier):
+    row = db.get(RollupWatermark, tier)
+    return row.processed_until if row else None
+
+
+def _set_watermark(db, tier, until):
+    row = db.get(RollupWatermark, tier)
+    if row is None:
+        db.add(RollupWatermark(tier=tier, processed_until=until))
+    else:
+        row.processed_until = until
+
+
+def rollup_hourly(db, now=None):
+    """Ham metrics → saatlik. Döndürür: işlenen ham satır sayısı."""
+    now = now or datetime.utcnow()
+    upper = now - timedelta(seconds=ROLLUP_LAG_SECONDS)
+    start = _get_watermark(db, 'hourly')
+    if start is None:
+        start = db.query(func.min(Metric.timestamp)).scalar()
+        if start is None:
+            return 0
+    processed = 0
+
+    while start < upper:
+        end = min(upper, start + MAX_WINDOW)
+        rows = (
+            db.query(Metric.cluster_id, Metric.namespace, Metric.timestamp,
+                     Metric.total_cpu, Metric.total_memory, Metric.total_restarts)
+            .filter(Metric.timestamp >= start, Metric.timestamp < end)
+            .yield_per(10000)
+        )
+        aggregates = aggregate_raw(rows, floor_hour)
+        processed += sum(agg.samples for agg in aggregates.values())
+
+        _merge_upsert(db, MetricRollupHourly,
+                      [agg.row(*key) for key, agg in aggregates.items()])
+        _set_watermark(db, 'hourly', end)
+        db.commit()
+        start = end
+    return processed
+
+
+def rollup_daily(db):
+    """Tamamlanmış saatlik bucket'lar → günlük. Döndürür: işlenen saatlik satır."""
+    hourly_until = _get_watermark(db, 'hourly')
+    if hourly_until is None:
+        return 0
+    # Sadece tamamen işlenmiş saatler (bucket + 1h <= hourly watermark)
+    upper = floor_hour(hourly_until)
+    start = _get_watermark(db, 'daily')
+    if start is None:
+        start = db.query(func.min(MetricRollupHourly.bucket)).scalar()
+        if start is None:
+            return 0
+    if start >= upper:
+        return 0
+
+    aggregates = {}
+    rows = (
+        db.query(MetricRollupHourly)
+        .filter(MetricRollupHourly.bucket >= start,
+                MetricRollupHourly.bucket < upper)
+        .yield_per(10000)
+    )
+    processed = 0
+    for h in rows:
+        key = (h.cluster_id, h.namespace, floor_day(h.bucket))
+        agg = aggregates.get(key)
+        if agg is None:
+            agg = aggregates[key] = _Aggregate()
+        agg.add(h.samples, h.last_ts, {
+            m: (getattr(h, f'{m}_avg'), getattr(h, f'{m}_min'),
+                getattr(h, f'{m}_max'), getattr(h, f'{m}_last'))
+            for m in METRICS})
+        processed += 1
+
+    _merge_upsert(db, MetricRollupDaily,
+                  [agg.row(*key) for key, agg in aggregates.items()])
+    _set_watermark(db, 'daily', upper)
+    db.commit()
+    return processed
+
+
+def apply_retention(db, now=None):
+    now = now or datetime.utcnow()
+    hourly = (
+        db.query(MetricRollupHourly)
+        .filter(MetricRollupHourly.bucket < now - timedelta(days=HOURLY_RETENTION_DAYS))
+        .delete(synchronize_session=False)
+    )
+    daily = (
+        db.query(MetricRollupDaily)
+        .filter(MetricRollupDaily.bucket < now - timedelta(days=DAILY_RETENTION_DAYS))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return hourly, daily
+
+
+def maintain(db):
+    """Stats daemon'un her turunda çağrılır."""
+    raw = rollup_hourly(db)
+    hourly = rollup_daily(db)
+    dropped_hourly, dropped_daily = apply_retention(db)
+    logger.info(f"🧮 Rollups: {raw} raw → hourly, {hourly} hourly → daily; "
+                f"retention removed {dropped_hourly} hourly, {dropped_daily} daily")
+
+
+def get_rollups(db, tier, since, cluster_id=None, namespace=None):
+    """
+    tier: 'hourly' | 'daily' — bucket sırasına göre satırlar. Tablodaki en
+    eski bucket'tan önceki kısım arşivden aynı şekilde (kaydedilmemiş model
+    nesneleri olarak) hesaplanır.
+    """
+    model = MetricRollupHourly if tier == 'hourly' else MetricRollupDaily
+    query = db.query(model).filter(model.bucket >= since)
+    if cluster_id is not None:
+        query = query.filter(model.cluster_id == cluster_id)
+    if namespace:
+        query = query.filter(model.namespace == namespace)
+    rows = query.order_by(model.bucket).all()
+
+    oldest = rows[0].bucket if rows else datetime.utcnow()
+    if since < oldest and archive.has_data():
+        floor = floor_hour if tier == 'hourly' else floor_day
+        raw = archive.read_raw(since, oldest, cluster_id=cluster_id,
+                               namespace=namespace)
+        archived = [model(**agg.row(*key))
+                    for key, agg in aggregate_raw(raw, floor).items()]
+        rows = sorted(archived, key=lambda r: r.bucket) + rows
+    return rows
+
+
+def get_hourly_with_recent(db, since, cluster_id=None, namespace=None):
+    """
+    get_rollups('hourly') + hourly watermark'tan sonraki ham metrics
+    (ROLLUP_LAG ve daemon aralığı yüzünden henüz işlenmemiş son saatler;
+    daemon hiç çalışmadıysa tüm aralık) aynı biçimde, kaydedilmemiş model
+    nesneleri olarak. Watermark'ı içeren saat iki satırla gelebilir —
+    örnek ağırlıklı toplayan okuyucu için sonuç aynıdır.
+    """
+    watermark = _get_watermark(db, 'hourly')
+    rows = get_rollups(db, 'hourly', since, cluster_id, namespace) if watermark else []
+
+    query = (
+        db.query(Metric.cluster_id, Metric.namespace, Metric.timestamp,
+                 Metric.total_cpu, Metric.total_memory, Metric.total_restarts)
+        .filter(Metric.timestamp >= max(since, watermark or since))
+    )
+    if cluster_id is not None:
+        query = query.filter(Metric.cluster_id == cluster_id)
+    if namespace:
+        query = query.filter(Metric.namespace == namespace)
+    recent = [MetricRollupHourly(**agg.row(*key))
+              for key, agg in aggregate_raw(query, floor_hour).items()]
+    return rows + sorted(recent, key=lambda r: r.bucket)
+
+
+def daily_series(db, metric, since, cluster_id=None, namespace=None):
+    """
+    Gün başına namespace ortalaması (örnek ağırlıklı):
+    [(gün, ortalama)] — ham metrics'in günlük ortalamasıyla aynı anlam.
+    """
+    totals = {}
+    for r in get_rollups(db, 'daily', floor_day(since), cluster_id, namespace):
+        value = getattr(r, f'{metric}_avg') or 0.0
+        weighted, samples = totals.get(r.bucket, (0.0, 0))
+        totals[r.bucket] = (weighted + value * r.samples, samples + r.samples)
+    return [(day, weighted / samples)
+            for day, (weighted, samples) in sorted(totals.items()) if samples]
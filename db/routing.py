@@ -0,0 +1,180 @@
+# db/routing.py
+"""
+Read/write engine routing.
+
+Writes (collector, stats daemon, API key bookkeeping) always use the
+primary `engine` from db/models.py. Read-only paths — the API's GET routes,
+the Prometheus exporter, reports — take a session from ReadSessionLocal(),
+which binds to one of the replicas listed in DATABASE_READ_URL
+(comma-separated), round-robin.
+
+Replica lag is probed at most every KUBEPOCKET_REPLICA_LAG_CHECK_SECONDS
+per replica. A replica that is unreachable or more than
+KUBEPOCKET_REPLICA_MAX_LAG_SECONDS behind — or whose WAL receiver is not
+streaming, i.e. it has stopped replicating — is skipped; with no usable
+replica, reads fall back to the primary. Without DATABASE_READ_URL every
+session is a primary session, exactly as before.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from .models import ENGINE_OPTIONS, SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+READ_URLS = [url.strip() for url in os.getenv('DATABASE_READ_URL', '').split(',')
+             if url.strip()]
+# Bu kadar geride kalan replica'ya okuma gönderilmez
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('KUBEPOCKET_REPLICA_MAX_LAG_SECONDS', '30'))
+# Lag ölçümü cache süresi (replica başına)
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('KUBEPOCKET_REPLICA_LAG_CHECK_SECONDS', '10'))
+
+# Primary'de 0; WAL receiver stream etmiyorsa NULL (bağlantı kopmuşken
+# alınan = oynatılan LSN eşitliği de sağlanır, lag 0 görünürdü); replica'da
+# WAL alınan = oynatılan ise 0 (boşta primary replay timestamp'ini eskitir),
+# değilse son oynatılan işlemin yaşı. pg_read_all_stats yetkisi olmayan
+# rol status'u NULL görür — o durumda receiver satırının varlığı yeterli.
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver
+                         WHERE COALESCE(status, 'streaming') = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicationStopped(Exception):
+    """Replica'nın WAL receiver'ı stream etmiyor — lag ölçülemez."""
+
+
+def measure_lag(conn):
+    """Bağlantının replica gecikmesi (saniye); PostgreSQL dışında 0."""
+    if conn.dialect.name != 'postgresql':
+        return 0.0
+    lag = conn.execute(LAG_SQL).scalar()
+    if lag is None:
+        raise ReplicationStopped("WAL receiver not streaming")
+    return float(lag)
+
+
+class Replica:
+    """Bir replica'nın engine'i ve son lag ölçümü."""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.lag = None          # saniye; None = ölçülmedi / ulaşılamadı
+        self.error = None
+        self.checked_at = 0.0
+
+    @property
+    def stale(self):
+        return time.monotonic() - self.checked_at >= REPLICA_LAG_CHECK_SECONDS
+
+    @property
+    def usable(self):
+        return self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECONDS
+
+    def record(self, lag=None, error=None):
+        was_usable = self.usable
+        self.lag, self.error = lag, error
+        self.checked_at = time.monotonic()
+        if was_usable and not self.usable:
+            reason = error or f"lag {lag:.1f}s > {REPLICA_MAX_LAG_SECONDS:.0f}s"
+            logger.warning(f"Replica {self.name} skipped: {reason}")
+        elif self.usable and not was_usable:
+            logger.info(f"Replica {self.name} back in rotation (lag {lag:.1f}s)")
+
+
+class ReplicaSet:
+    """
+    Round-robin replica seçimi. Probe işi çağırana bırakılır; sync (bu
+    modül) ve async (db/async_session.py) engine setleri aynı sınıfı kullanır.
+    """
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._cycle = itertools.cycle(range(len(replicas))) if replicas else None
+        self._lock = threading.Lock()
+
+    def candidates(self):
+        """Sıradaki replica'dan başlayarak hepsi (round-robin)."""
+        if not self.replicas:
+            return []
+        with self._lock:
+            start = next(self._cycle)
+        return self.replicas[start:] + self.replicas[:start]
+
+
+def replica_name(index):
+    return f"replica-{index}"
+
+
+_replicas = ReplicaSet([
+    Replica(replica_name(i), create_engine(url, **ENGINE_OPTIONS))
+    for i, url in enumerate(READ_URLS)
+])
+
+
+def _probe(replica):
+    try:
+        with replica.engine.connect() as conn:
+            replica.record(lag=measure_lag(conn))
+    except Exception as e:
+        replica.record(error=str(e).splitlines()[0])
+
+
+def read_engine():
+    """Okuma için engine: lag'i kabul edilebilir ilk replica, yoksa primary."""
+    for replica in _replicas.candidates():
+        if replica.stale:
+            _probe(replica)
+        if replica.usable:
+            return replica.engine
+    return engine
+
+
+def ReadSessionLocal():
+    """SessionLocal() gibi, ama read_engine()'e bağlı. Sadece okuma için."""
+    return SessionLocal(bind=read_engine())
+
+
+def replica_status(replica_set=None):
+    """[{name, lag_seconds, usable, error}] — metrikler ve /health/db için."""
+    replica_set = replica_set or _replicas
+    return [{'name': r.name, 'lag_seconds': r.lag, 'usable': r.usable,
+             'error': r.error} for r in replica_set.replicas]
+
+
+def pool_stats(named_engines):
+    """
+    {isim: engine} → engine başına pool durumu. QueuePool dışındaki
+    pool'lar (SQLite) sayaç vermez, boş sözlük döner.
+    """
+    stats = {}
+    for name, eng in named_engines.items():
+        pool = getattr(eng, 'sync_engine', eng).pool
+        if not hasattr(pool, 'checkedout'):
+            stats[name] = {}
+            continue
+        stats[name] = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+        }
+    return stats
+
+
+def sync_engines():
+    """Bu süreçteki sync engine'ler: {'primary': engine, 'replica-0': ...}"""
+    named = {'primary': engine}
+    named.update((r.name, r.engine) for r in _replicas.replicas)
+    return named
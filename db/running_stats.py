@@ -0,0 +1,233 @@
+# db/running_stats.py
+"""
+Ingest-time running statistics.
+
+save_metrics() merges every cycle's namespace totals into one
+running_statistics row per (cluster, namespace, metric, UTC day): sample
+count, Welford mean / M2, min / max and the least-squares sums Σt, Σt², Σty
+(t = hours since the bucket start). The merge is a single upsert whose SET
+clause is the parallel (Chan et al.) combination of two summaries, so each
+sample costs O(1) and nothing is ever rescanned.
+
+The statistics window (KUBEPOCKET_STATS_WINDOW_DAYS) is a bucketed expiry:
+window() merges the day buckets that start inside it and expire() deletes
+the older ones. StatisticsCalculator.calculate_statistics() turns the
+merged summaries into Statistics rows.
+"""
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from db import bulk
+from db.models import RunningStatistic
+
+logger = logging.getLogger(__name__)
+
+# save_metrics() running_statistics'i günceller
+RUNNING_STATS_ENABLED = os.getenv(
+    'KUBEPOCKET_RUNNING_STATS', 'true').lower() == 'true'
+# İstatistik penceresi (gün bucket'ları)
+STATS_WINDOW_DAYS = int(os.getenv('KUBEPOCKET_STATS_WINDOW_DAYS', '7'))
+
+METRICS = {'cpu': 'total_cpu', 'memory': 'total_memory'}
+
+
+def floor_day(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _hours(ts, origin):
+    return (ts - origin).total_seconds() / 3600.0
+
+
+class Summary:
+    """Birleştirilebilir özet: Welford + en küçük kareler toplamları."""
+
+    __slots__ = ('samples', 'mean', 'm2', 'min_value', 'max_value',
+                 'sum_t', 'sum_tt', 'sum_ty', 'last_ts')
+
+    def __init__(self):
+        self.samples = 0
+        self.mean = self.m2 = 0.0
+        self.min_value = self.max_value = None
+        self.sum_t = self.sum_tt = self.sum_ty = 0.0
+        self.last_ts = None
+
+    @classmethod
+    def from_row(cls, row):
+        summary = cls()
+        for name in cls.__slots__:
+            setattr(summary, name, getattr(row, name))
+        return summary
+
+    def add(self, value, t, ts=None):
+        """Tek örnek (Welford)"""
+        self.samples += 1
+        delta = value - self.mean
+        self.mean += delta / self.samples
+        self.m2 += delta * (value - self.mean)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_ty += t * value
+        if ts is not None and (self.last_ts is None or ts > self.last_ts):
+            self.last_ts = ts
+
+    def merge(self, other, offset=0.0):
+        """other'ı ekle; other'ın t ekseni bu özetinkinden offset saat ileride."""
+        if not other.samples:
+            return self
+        n_a, n_b = self.samples, other.samples
+        total = n_a + n_b
+        delta = other.mean - self.mean
+        # Zaman eksenini kaydır: Σ(t+o), Σ(t+o)², Σ(t+o)y
+        sum_y = other.samples * other.mean
+        sum_t = other.sum_t + n_b * offset
+        sum_tt = other.sum_tt + 2 * offset * other.sum_t + n_b * offset * offset
+        sum_ty = other.sum_ty + offset * sum_y
+
+        self.mean += delta * n_b / total
+        self.m2 += other.m2 + delta * delta * n_a * n_b / total
+        self.min_value = (other.min_value if self.min_value is None
+                          else min(self.min_value, other.min_value))
+        self.max_value = (other.max_value if self.max_value is None
+                          else max(self.max_value, other.max_value))
+        self.sum_t += sum_t
+        self.sum_tt += sum_tt
+        self.sum_ty += sum_ty
+        if other.last_ts is not None and (self.last_ts is None or other.last_ts > self.last_ts):
+            self.last_ts = other.last_ts
+        self.samples = total
+        return self
+
+    @property
+    def std_dev(self):
+        """Popülasyon std (np.std ile aynı)"""
+        if self.samples < 1:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / self.samples)
+
+    @property
+    def slope(self):
+        """En küçük kareler eğimi, birim / saniye (eski sklearn trend_slope'u)"""
+        if self.samples < 2:
+            return 0.0
+        sxx = self.sum_tt - self.sum_t * self.sum_t / self.samples
+        if sxx <= 1e-12:
+            return 0.0
+        sxy = self.sum_ty - self.sum_t * self.mean
+        return sxy / sxx / 3600.0
+
+    def row(self, cluster_id, namespace, metric_type, bucket):
+        row = {'cluster_id': cluster_id, 'namespace': namespace,
+               'metric_type': metric_type, 'bucket': bucket}
+        row.update((name, getattr(self, name)) for name in self.__slots__)
+        return row
+
+
+def _merge_upsert(db, rows):
+    """Özet satırlarını mevcut bucket'larla paralel Welford formülüyle birleştir."""
+    if not rows:
+        return
+    cur = RunningStatistic.__table__.c
+
+    def merged(new):
+        total = cur.samples + new.samples
+        delta = new.mean - cur.mean
+        return {
+            'samples': total,
+            'mean': cur.mean + delta * new.samples / total,
+            'm2': cur.m2 + new.m2 + delta * delta * cur.samples * new.samples / total,
+            'min_value': case((new.min_value < cur.min_value, new.min_value),
+                              else_=cur.min_value),
+            'max_value': case((new.max_value > cur.max_value, new.max_value),
+                              else_=cur.max_value),
+            # Aynı bucket → aynı t ekseni, toplamlar doğrudan eklenir
+            'sum_t': cur.sum_t + new.sum_t,
+            'sum_tt': cur.sum_tt + new.sum_tt,
+            'sum_ty': cur.sum_ty + new.sum_ty,
+            'last_ts': case((new.last_ts > cur.last_ts, new.last_ts),
+                            else_=cur.last_ts),
+        }
+
+    bulk.upsert(db, RunningStatistic, rows,
+                index_elements=['cluster_id', 'namespace', 'metric_type', 'bucket'],
+                set_=merged)
+
+
+def update(db, cluster_id, ts, metric_rows):
+    """
+    Bir toplama döngüsünün namespace satırlarını (save_metrics'in
+    metric_rows'u) running_statistics'e ekle. Commit çağıranın işi.
+    """
+    bucket = floor_day(ts)
+    t = _hours(ts, bucket)
+    rows = []
+    for row in metric_rows:
+        for metric_type, column in METRICS.items():
+            summary = Summary()
+            summary.add(float(row[column] or 0.0), t, ts)
+            rows.append(summary.row(cluster_id, row['namespace'], metric_type, bucket))
+    _merge_upsert(db, rows)
+
+
+def window(db, since, cluster_id=None):
+    """
+    since'ten itibaren başlayan gün bucket'larının birleşimi:
+    {(cluster_id, namespace, metric_type): Summary}. t ekseni pencerenin
+    ilk gününden başlar (eğim birimi etkilenmez).
+    """
+    origin = floor_day(since)
+    query = db.query(RunningStatistic).filter(RunningStatistic.bucket >= origin)
+    if cluster_id is not None:
+        query = query.filter(RunningStatistic.cluster_id == cluster_id)
+
+    merged = {}
+    for r in query.order_by(RunningStatistic.bucket):
+        key = (r.cluster_id, r.namespace, r.metric_type)
+        summary = merged.get(key)
+        if summary is None:
+            summary = merged[key] = Summary()
+        summary.merge(Summary.from_row(r), offset=_hours(r.bucket, origin))
+    return merged
+
+
+def expire(db, now=None):
+    """Pencere dışına düşen gün bucket'larını sil. Döndürür: silinen satır."""
+    now = now or datetime.utcnow()
+    cutoff = floor_day(now - timedelta(days=STATS_WINDOW_DAYS))
+    removed = (
+        db.query(RunningStatistic)
+        .filter(RunningStatistic.bucket < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+
+def is_empty(db, since):
+    return db.query(
+        func.count(RunningStatistic.bucket)
+    ).filter(RunningStatistic.bucket >= floor_day(since)).scalar() == 0
+
+
+def backfill(db, since, until=None):
+    """
+    running_statistics henüz yokken (ilk kurulum / yükseltme) pencereyi
+    metrics'ten bir kez doldur — gün bucket'ları tek grouped SQL sorgusuyla
+    (db/stats_sql.py), pod_data yüklenmez. Döndürür: işlenen ham satır sayısı.
+    """
+    from db import stats_sql
+
+    until = until or datetime.utcnow()
+    summaries = stats_sql.day_summaries(db, since, until)
+    _merge_upsert(db, [s.row(*key) for key, s in summaries.items()])
+    db.commit()
+    processed = sum(s.samples for (_, _, metric_type, _), s in summaries.items()
+                    if metric_type == 'cpu')
+    logger.info(f"🧮 Running statistics backfilled from {processed} metric rows")
+    return processed
@@ -0,0 +1,281 @@
+# db/seasonal.py
+"""
+Seasonal (hour-of-week) baselines and Holt-Winters state.
+
+Workloads follow daily and weekly cycles, so a namespace's "normal" value
+depends on the hour of the week. For every (cluster, namespace, metric)
+and for each cluster total (namespace = CLUSTER_SCOPE) a seasonal_profiles
+row keeps additive Holt-Winters state over hourly values:
+
+    level, trend (per hour)
+    season[168]    offset of each hour-of-week slot from the level
+    variance[168]  EWMA of the squared one-step error per slot
+    counts[168]    observations per slot (warm-up)
+
+maintain() feeds the hourly rollup buckets completed since the 'seasonal'
+watermark into the state, so each hour of data is touched once and
+history is never rescanned (the first run bootstraps from the last
+KUBEPOCKET_SEASONAL_BOOTSTRAP_DAYS of hourly rollups). A profile is ready
+after KUBEPOCKET_SEASONAL_MIN_WEEKS weeks of hours, but an hour-of-week
+slot only scores anomalies once it has MIN_SLOT_OBSERVATIONS values and a
+non-zero error variance, and forecasts need every slot in that state
+(about three weeks). Until then callers fall back to the linear statistics.
+"""
+import logging
+import math
+import os
+from array import array
+from datetime import datetime, timedelta
+
+from db import bulk
+from db.models import CLUSTER_SCOPE, MetricRollupHourly, RollupWatermark, SeasonalProfile
+from db.rollups import floor_hour
+
+logger = logging.getLogger(__name__)
+
+SEASON_LENGTH = 168          # saat / hafta
+HW_ALPHA = float(os.getenv('KUBEPOCKET_HW_ALPHA', '0.1'))    # level
+HW_BETA = float(os.getenv('KUBEPOCKET_HW_BETA', '0.01'))     # trend
+HW_GAMMA = float(os.getenv('KUBEPOCKET_HW_GAMMA', '0.3'))    # mevsimsel slot + varyans
+SEASONAL_MIN_WEEKS = float(os.getenv('KUBEPOCKET_SEASONAL_MIN_WEEKS', '1'))
+SEASONAL_BOOTSTRAP_DAYS = int(os.getenv('KUBEPOCKET_SEASONAL_BOOTSTRAP_DAYS', '28'))
+# Bu kadar güncellenmeyen profil (silinmiş namespace) kaldırılır
+SEASONAL_STALE_DAYS = int(os.getenv('KUBEPOCKET_SEASONAL_STALE_DAYS', '14'))
+# z-score paydası için alt sınır: beklenen değerin bu oranı
+MIN_STD_RATIO = 0.01
+PREDICTION_Z = 1.96
+# Slot'un z-score / tahmin aralığı için gereken en az gözlem (ilki varyans vermez)
+MIN_SLOT_OBSERVATIONS = 3
+
+METRICS = ('cpu', 'memory')
+_CHUNK = timedelta(days=7)
+
+
+def slot(ts):
+    """Haftanın saati (0 = Pazartesi 00:00 UTC)"""
+    return ts.weekday() * 24 + ts.hour
+
+
+class Profile:
+    """Bir serinin Holt-Winters durumu (seasonal_profiles satırının açılmış hali)."""
+
+    __slots__ = ('level', 'trend', 'season', 'variance', 'counts',
+                 'observations', 'last_bucket')
+
+    def __init__(self):
+        self.level = self.trend = 0.0
+        self.season = [0.0] * SEASON_LENGTH
+        self.variance = [0.0] * SEASON_LENGTH
+        self.counts = [0] * SEASON_LENGTH
+        self.observations = 0
+        self.last_bucket = None
+
+    @classmethod
+    def from_row(cls, row):
+        profile = cls()
+        profile.level, profile.trend = row.level, row.trend
+        profile.season = array('f', row.season).tolist()
+        profile.variance = array('f', row.variance).tolist()
+        profile.counts = array('H', row.counts).tolist()
+        profile.observations, profile.last_bucket = row.observations, row.last_bucket
+        return profile
+
+    def row(self, cluster_id, namespace, metric_type):
+        return {
+            'cluster_id': cluster_id, 'namespace': namespace,
+            'metric_type': metric_type, 'level': self.level, 'trend': self.trend,
+            'season': array('f', self.season).tobytes(),
+            'variance': array('f', self.variance).tobytes(),
+            'counts': array('H', (min(c, 65535) for c in self.counts)).tobytes(),
+            'observations': self.observations, 'last_bucket': self.last_bucket,
+        }
+
+    def observe(self, bucket, value):
+        """Bir saatlik değer ekle (bucket'lar artan sırada gelir)."""
+        h = slot(bucket)
+        if self.last_bucket is None:
+            self.level, self.trend = value, 0.0
+            self.season[h], self.counts[h] = 0.0, 1
+            self.observations, self.last_bucket = 1, bucket
+            return
+        if bucket <= self.last_bucket:
+            return
+
+        # Eksik saatler: level trend boyunca ilerler
+        gap = (bucket - self.last_bucket).total_seconds() / 3600.0
+        predicted_level = self.level + self.trend * gap
+        if self.counts[h] == 0:
+            self.season[h] = value - predicted_level
+        error = value - (predicted_level + self.season[h])
+
+        level = HW_ALPHA * (value - self.season[h]) + (1 - HW_ALPHA) * predicted_level
+        self.trend = HW_BETA * (level - self.level) / gap + (1 - HW_BETA) * self.trend
+        self.season[h] = HW_GAMMA * (value - level) + (1 - HW_GAMMA) * self.season[h]
+        if self.counts[h] == 1:
+            self.variance[h] = error * error
+        elif self.counts[h] > 1:
+            self.variance[h] = HW_GAMMA * error * error + (1 - HW_GAMMA) * self.variance[h]
+        self.level = level
+        self.counts[h] += 1
+        self.observations += 1
+        self.last_bucket = bucket
+
+    @property
+    def ready(self):
+        return self.observations >= SEASON_LENGTH * SEASONAL_MIN_WEEKS
+
+    def slot_ready(self, ts):
+        """ts'nin slot'u için yeterli gözlem ve sıfırdan büyük hata varyansı var mı"""
+        h = slot(ts)
+        return self.counts[h] >= MIN_SLOT_OBSERVATIONS and self.variance[h] > 0
+
+    @property
+    def forecast_ready(self):
+        """Tüm slot'lar hazır — tahmin aralığı hiçbir saatte sıfır genişlikte değil"""
+        return self.ready and all(
+            c >= MIN_SLOT_OBSERVATIONS and v > 0
+            for c, v in zip(self.counts, self.variance))
+
+    def expected(self, ts):
+        """ts saatinde beklenen değer (level + trend + mevsimsel ofset)"""
+        hours = (floor_hour(ts) - self.last_bucket).total_seconds() / 3600.0
+        return self.level + self.trend * max(hours, 0.0) + self.season[slot(ts)]
+
+    def std(self, ts):
+        h = slot(ts)
+        return max(math.sqrt(self.variance[h]), MIN_STD_RATIO * abs(self.expected(ts)), 1e-6)
+
+    def zscore(self, value, ts):
+        """(beklenen, z) — slot hazır değilse (slot_ready) z = None"""
+        expected = self.expected(ts)
+        if not self.slot_ready(ts):
+            return expected, None
+        return expected, (value - expected) / self.std(ts)
+
+    def forecast_days(self, days):
+        """
+        Son bucket'tan sonraki her gün için (ortalama, alt, üst): o günün
+        24 saatlik mevsimsel tahminlerinin ortalaması.
+        """
+        result = []
+        for day in range(days):
+            values, spreads = [], []
+            for k in range(day * 24 + 1, day * 24 + 25):
+                ts = self.last_bucket + timedelta(hours=k)
+                values.append(self.level + self.trend * k + self.season[slot(ts)])
+                spreads.append(math.sqrt(self.variance[slot(ts)]))
+            mean = sum(values) / 24
+            half = PREDICTION_Z * sum(spreads) / 24
+            result.append((mean, mean - half, mean + half))
+        return result
+
+    @property
+    def confidence(self):
+        """1 - tipik hata / level, [0, 1] (linear forecast'taki tanımın karşılığı)"""
+        seen = [v for v, c in zip(self.variance, self.counts) if c > 1]
+        if not seen:
+            return 0.0
+        rmse = math.sqrt(sum(seen) / len(seen))
+        return max(0.0, min(1.0, 1 - rmse / (abs(self.level) + 0.01)))
+
+
+def load(db, cluster_id=None):
+    """{(cluster_id, namespace, metric_type): Profile}"""
+    query = db.query(SeasonalProfile)
+    if cluster_id is not None:
+        query = query.filter(SeasonalProfile.cluster_id == cluster_id)
+    return {(r.cluster_id, r.namespace, r.metric_type): Profile.from_row(r)
+            for r in query}
+
+
+def load_one(db, cluster_id, namespace, metric_type):
+    """Tek profil (primary key araması) ya da None"""
+    row = db.get(SeasonalProfile, (cluster_id, namespace, metric_type))
+    return Profile.from_row(row) if row is not None else None
+
+
+def _save(db, profiles):
+    if not profiles:
+        return
+    rows = [p.row(*key) for key, p in profiles.items()]
+    bulk.upsert(
+        db, SeasonalProfile, rows,
+        index_elements=['cluster_id', 'namespace', 'metric_type'],
+        set_=lambda new: {col: new[col] for col in
+                          ('level', 'trend', 'season', 'variance', 'counts',
+                           'observations', 'last_bucket')},
+    )
+
+
+def _feed(profiles, rows):
+    """Saatlik rollup satırlarını (bucket sırasıyla) profillere uygula."""
+    cluster_totals = {}
+    for r in rows:
+        if not r.samples:
+            continue
+        for metric_type in METRICS:
+            value = float(getattr(r, f'{metric_type}_avg') or 0.0)
+            key = (r.cluster_id, r.namespace, metric_type)
+            profile = profiles.get(key)
+            if profile is None:
+                profile = profiles[key] = Profile()
+            profile.observe(r.bucket, value)
+            total = (r.cluster_id, r.bucket, metric_type)
+            cluster_totals[total] = cluster_totals.get(total, 0.0) + value
+    # Cluster toplamı: saatin namespace ortalamalarının toplamı
+    for (cluster_id, bucket, metric_type), value in sorted(
+            cluster_totals.items(), key=lambda item: item[0][1]):
+        key = (cluster_id, CLUSTER_SCOPE, metric_type)
+        profile = profiles.get(key)
+        if profile is None:
+            profile = profiles[key] = Profile()
+        profile.observe(bucket, value)
+
+
+def maintain(db, now=None):
+    """
+    Tamamlanmış saatlik bucket'ları Holt-Winters durumuna işle, bayat
+    profilleri sil. Döndürür: işlenen saatlik satır sayısı.
+    """
+    now = now or datetime.utcnow()
+    hourly = db.get(RollupWatermark, 'hourly')
+    if hourly is None:
+        return 0
+    # Sadece tamamen kapanmış saatler (bucket + 1h <= hourly watermark)
+    upper = floor_hour(hourly.processed_until)
+    watermark = db.get(RollupWatermark, 'seasonal')
+    # İlk çalıştırma: son SEASONAL_BOOTSTRAP_DAYS günün saatlik rollup'ları
+    start = (watermark.processed_until if watermark
+             else upper - timedelta(days=SEASONAL_BOOTSTRAP_DAYS))
+
+    profiles = load(db)
+    processed = 0
+    while start < upper:
+        end = min(upper, start + _CHUNK)
+        rows = (
+            db.query(MetricRollupHourly)
+            .filter(MetricRollupHourly.bucket >= start, MetricRollupHourly.bucket < end)
+            .order_by(MetricRollupHourly.bucket)
+            .all()
+        )
+        _feed(profiles, rows)
+        processed += len(rows)
+        start = end
+
+    if processed:
+        _save(db, profiles)
+    if watermark is None:
+        db.add(RollupWatermark(tier='seasonal', processed_until=max(start, upper)))
+    else:
+        watermark.processed_until = max(start, upper)
+
+    stale = (
+        db.query(SeasonalProfile)
+        .filter(SeasonalProfile.last_bucket < now - timedelta(days=SEASONAL_STALE_DAYS))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    ready = sum(1 for p in profiles.values() if p.forecast_ready)
+    logger.info(f"🌊 Seasonal profiles: {processed} hourly rows applied, "
+                f"{ready}/{len(profiles)} ready, {stale} stale removed")
+    return processed
@@ -0,0 +1,510 @@
+# db/snapshots.py
+"""
+Delta-encoded, compressed pod_data storage (pod_snapshots).
+
+Per (cluster, namespace) the pod list is stored as a chain of rows:
+
+- key:   the full pod list; written every KUBEPOCKET_SNAPSHOT_KEYFRAME_INTERVAL
+         stored cycles or when the chain's keyframe is older than
+         KUBEPOCKET_SNAPSHOT_KEYFRAME_MAX_AGE_HOURS, and whenever the
+         previous state is unknown.
+- delta: pods added, pods removed and the changed / unset fields of the
+         remaining pods, relative to the previous stored row.
+
+A cycle whose pod list is identical to the previous one (same digest) is
+not stored at all — readers return the latest row at or before the
+requested time — unless the keyframe is due by age, so even an unchanged
+namespace gets a fresh keyframe inside every retention window. age_hours
+is not stored either: it changes every cycle and is re-derived from
+created_at on read.
+
+Payloads are canonical JSON, compressed with zstd and a per-cluster
+dictionary trained on the cluster's pod entries (pod-name prefixes, field
+names, common values). Without the zstandard package the same dictionary
+is used as a zlib preset (zdict). The first payload byte records the codec.
+"""
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func
+
+from db.models import PodSnapshot, SnapshotDictionary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Kapatılırsa save_metrics() pod listesini eskisi gibi Metric.pod_data'ya yazar
+SNAPSHOT_STORAGE_ENABLED = os.getenv(
+    'KUBEPOCKET_SNAPSHOT_STORAGE', 'true').lower() == 'true'
+# Kaç kayıtlı döngüde bir tam liste (5 dk döngüde 288 ≈ 1 gün)
+KEYFRAME_INTERVAL = int(os.getenv('KUBEPOCKET_SNAPSHOT_KEYFRAME_INTERVAL', '288'))
+# Keyframe bu yaşı geçince (değişiklik olmasa da) yenisi yazılır
+KEYFRAME_MAX_AGE = timedelta(hours=float(
+    os.getenv('KUBEPOCKET_SNAPSHOT_KEYFRAME_MAX_AGE_HOURS', '24')))
+# Sözlük bu yaştan eskiyse bir sonraki keyframe'de yeniden eğitilir
+DICT_MAX_AGE_DAYS = int(os.getenv('KUBEPOCKET_SNAPSHOT_DICT_MAX_AGE_DAYS', '7'))
+
+DICT_SIZE = 16 * 1024
+ZSTD_LEVEL = 9
+# zstd eğitimi için gereken en az örnek; altında ham içerik sözlüğü kullanılır
+MIN_TRAINING_SAMPLES = 64
+
+CODEC = 'zstd' if zstandard is not None else 'zlib'
+_CODEC_BYTE = {'zstd': b'Z', 'zlib': b'z'}
+_BYTE_CODEC = {v: k for k, v in _CODEC_BYTE.items()}
+
+# Her döngüde değişen, diğer alanlardan türetilen alanlar — saklanmaz
+DERIVED_FIELDS = ('age_hours',)
+
+_MISSING = object()
+
+
+# ── Encoding ──────────────────────────────────────────────────
+
+def _canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _stored(pod):
+    return {k: v for k, v in pod.items() if k not in DERIVED_FIELDS}
+
+
+def _with_derived(pod, ts):
+    from db.repository import _parse_created_at
+
+    created = _parse_created_at(pod.get('created_at'))
+    age = (ts - created).total_seconds() / 3600 if created else 0.0
+    return dict(pod, age_hours=max(age, 0.0))
+
+
+def _by_name(pods):
+    return {pod.get('name') or '': _stored(pod) for pod in pods}
+
+
+def digest(state):
+    """{name: pod} durumunun sıradan bağımsız özeti."""
+    return hashlib.sha1(
+        _canonical([state[name] for name in sorted(state)])).hexdigest()
+
+
+def diff(old, new):
+    """İki {name: pod} durumu arasındaki delta."""
+    changed, unset = {}, {}
+    for name in new.keys() & old.keys():
+        before, after = old[name], new[name]
+        if before == after:
+            continue
+        fields = {k: v for k, v in after.items() if before.get(k, _MISSING) != v}
+        if fields:
+            changed[name] = fields
+        gone = sorted(before.keys() - after.keys())
+        if gone:
+            unset[name] = gone
+    return {
+        'added': [new[name] for name in sorted(new.keys() - old.keys())],
+        'removed': sorted(old.keys() - new.keys()),
+        'changed': changed,
+        'unset': unset,
+    }
+
+
+def apply_delta(state, delta):
+    """diff()'in tersi: state'in kopyasına delta'yı uygula."""
+    state = dict(state)
+    for name in delta['removed']:
+        state.pop(name, None)
+    for name, fields in delta['changed'].items():
+        state[name] = dict(state[name], **fields)
+    for name, gone in delta['unset'].items():
+        state[name] = {k: v for k, v in state[name].items() if k not in gone}
+    for pod in delta['added']:
+        state[pod.get('name') or ''] = pod
+    return state
+
+
+# ── Dictionaries ──────────────────────────────────────────────
+
+def _name_prefix(name):
+    """web-7d9f8c-x2x4z → web, db-0 → db (workload adı)"""
+    parts = name.split('-')
+    if len(parts) >= 3:
+        return '-'.join(parts[:-2])
+    if len(parts) == 2:
+        return parts[0]
+    return name
+
+
+def build_dictionary(pods):
+    """
+    Kümenin pod'larından sıkıştırma sözlüğü. zstd varsa ve örnek yeterliyse
+    eğitilmiş sözlük, değilse pod adı önekleri + her önekten örnek bir pod
+    (alan adları, tipik değerler) içeren ham içerik sözlüğü.
+    """
+    samples = [_canonical(_stored(pod)) for pod in pods]
+    if zstandard is not None and len(samples) >= MIN_TRAINING_SAMPLES:
+        try:
+            return zstandard.train_dictionary(DICT_SIZE, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.debug(f"zstd dictionary training failed, using raw: {e}")
+
+    examples = {}
+    for pod, sample in zip(pods, samples):
+        examples.setdefault(_name_prefix(pod.get('name') or ''), sample)
+    # Ham sözlükte sona yakın içerik daha kısa mesafeyle eşleşir, bu yüzden
+    # uzun kesilirse baştan kırpılır
+    raw = '\n'.join(sorted(examples)).encode('utf-8') + b'\n' + b'\n'.join(
+        examples[prefix] for prefix in sorted(examples))
+    return raw[-DICT_SIZE:] or b'{}'
+
+
+class _Codec:
+    def __init__(self, codec, data):
+        self.codec = codec
+        self.data = data
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError(
+                    "pod snapshot was written with zstd; install 'zstandard' to read it")
+            zdict = zstandard.ZstdCompressionDict(data)
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zdict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    def compress(self, raw):
+        if self.codec == 'zstd':
+            body = self._compressor.compress(raw)
+        else:
+            compressor = zlib.compressobj(9, zdict=self.data)
+            body = compressor.compress(raw) + compressor.flush()
+        return _CODEC_BYTE[self.codec] + body
+
+    def decompress(self, payload):
+        codec, body = _BYTE_CODEC[payload[:1]], payload[1:]
+        if codec != self.codec:
+            raise ValueError(f"payload codec {codec} != dictionary codec {self.codec}")
+        if codec == 'zstd':
+            return self._decompressor.decompress(body)
+        decompressor = zlib.decompressobj(zdict=self.data)
+        return decompressor.decompress(body) + decompressor.flush()
+
+
+# dict_id → _Codec (sözlükler değişmez, süreç boyunca cache'lenir)
+_codecs = {}
+
+
+def _get_codec(db, dict_id):
+    codec = _codecs.get(dict_id)
+    if codec is None:
+        row = db.get(SnapshotDictionary, dict_id)
+        if row is None:
+            raise LookupError(f"snapshot dictionary {dict_id} not found")
+        codec = _codecs[dict_id] = _Codec(row.codec, bytes(row.data))
+    return codec
+
+
+# ── Writer ────────────────────────────────────────────────────
+
+class _Chain:
+    """Bir (cluster, namespace) zincirinin son kaydedilmiş hali."""
+
+    __slots__ = ('keyframe_id', 'keyframe_ts', 'length', 'digest', 'state')
+
+    def __init__(self, keyframe_id, keyframe_ts, length, digest, state):
+        self.keyframe_id = keyframe_id
+        self.keyframe_ts = keyframe_ts
+        self.length = length
+        self.digest = digest
+        self.state = state
+
+    def keyframe_due(self, ts):
+        return (self.length >= KEYFRAME_INTERVAL
+                or ts - self.keyframe_ts >= KEYFRAME_MAX_AGE)
+
+
+# (cluster_id, namespace) → _Chain; bir cluster'ı tek collector yazar
+_chains = {}
+# cluster_id → (dict_id, created_at)
+_dictionaries = {}
+
+
+class SnapshotWriter:
+    def __init__(self, db):
+        self.db = db
+
+    def write(self, cluster_id, ts, namespaces):
+        """
+        namespaces: {namespace: pod sözlükleri listesi}. Satırlar oturuma
+        eklenir; commit çağıranın işi.
+        Döndürür: {'key': n, 'delta': n, 'skipped': n, 'bytes': n, 'raw_bytes': n}
+        """
+        stats = {'key': 0, 'delta': 0, 'skipped': 0, 'bytes': 0, 'raw_bytes': 0}
+        dict_id = None
+        pending = []
+
+        for namespace, pods in namespaces.items():
+            state = _by_name(pods or [])
+            state_digest = digest(state)
+            raw_size = len(_canonical(list(state.values())))
+            stats['raw_bytes'] += raw_size
+
+            key = (cluster_id, namespace)
+            chain = _chains.get(key)
+            if chain is None:
+                chain = _chains[key] = self._load_chain(cluster_id, namespace)
+
+            keyframe_due = chain is None or chain.keyframe_due(ts)
+            if not keyframe_due and chain.digest == state_digest:
+                stats['skipped'] += 1
+                continue
+
+            if dict_id is None:
+                dict_id = self._dictionary(cluster_id, ts, namespaces)
+            codec = _get_codec(self.db, dict_id)
+
+            if keyframe_due:
+                kind, body = 'key', [state[name] for name in sorted(state)]
+            else:
+                kind, body = 'delta', diff(chain.state, state)
+
+            row = PodSnapshot(
+                cluster_id=cluster_id, namespace=namespace, ts=ts, kind=kind,
+                keyframe_id=chain.keyframe_id if kind == 'delta' else None,
+                digest=state_digest, dict_id=dict_id, pod_count=len(state),
+                payload=codec.compress(_canonical(body)),
+            )
+            self.db.add(row)
+            pending.append((key, row, state))
+            stats[kind] += 1
+            stats['bytes'] += len(row.payload)
+
+        # Keyframe id'leri için tek flush (insertmanyvalues ile toplu INSERT)
+        self.db.flush()
+        for key, row, state in pending:
+            if row.kind == 'key':
+                _chains[key] = _Chain(row.id, row.ts, 1, row.digest, state)
+            else:
+                chain = _chains[key]
+                _chains[key] = _Chain(chain.keyframe_id, chain.keyframe_ts,
+                                      chain.length + 1, row.digest, state)
+        return stats
+
+    def _dictionary(self, cluster_id, ts, namespaces):
+        cached = _dictionaries.get(cluster_id)
+        max_age = timedelta(days=DICT_MAX_AGE_DAYS)
+        if cached is None:
+            row = (
+                self.db.query(SnapshotDictionary)
+                .filter(SnapshotDictionary.cluster_id == cluster_id,
+                        SnapshotDictionary.codec == CODEC)
+                .order_by(SnapshotDictionary.id.desc())
+                .first()
+            )
+            if row is not None:
+                cached = _dictionaries[cluster_id] = (row.id, row.created_at)
+        if cached is not None and ts - cached[1] < max_age:
+            return cached[0]
+
+        pods = [pod for ns_pods in namespaces.values() for pod in ns_pods or []]
+        row = SnapshotDictionary(cluster_id=cluster_id, codec=CODEC,
+                                 data=build_dictionary(pods), created_at=ts)
+        self.db.add(row)
+        self.db.flush()
+        _dictionaries[cluster_id] = (row.id, row.created_at)
+        logger.info(f"Snapshot dictionary {row.id} ({CODEC}, {len(row.data)} bytes) "
+                    f"trained for cluster {cluster_id} on {len(pods)} pods")
+        return row.id
+
+    def _load_chain(self, cluster_id, namespace):
+        """Cache'te yoksa (collector yeniden başladı) zinciri DB'den kur."""
+        latest = (
+            self.db.query(PodSnapshot)
+            .filter(PodSnapshot.cluster_id == cluster_id,
+                    PodSnapshot.namespace == namespace)
+            .order_by(PodSnapshot.ts.desc(), PodSnapshot.id.desc())
+            .first()
+        )
+        if latest is None:
+            return None
+        rows = SnapshotReader(self.db)._chain_rows(latest)
+        state = _replay(self.db, rows)
+        return _Chain(rows[0].id, rows[0].ts, len(rows), latest.digest, state)
+
+
+# ── Reader ────────────────────────────────────────────────────
+
+def _apply_row(db, state, row):
+    body = json.loads(_get_codec(db, row.dict_id).decompress(bytes(row.payload)))
+    if row.kind == 'key':
+        return {pod.get('name') or '': pod for pod in body}
+    return apply_delta(state, body)
+
+
+def _replay(db, rows):
+    """Keyframe + delta satırlarından {name: pod} durumu."""
+    state = {}
+    for row in rows:
+        state = _apply_row(db, state, row)
+    return state
+
+
+class SnapshotReader:
+    def __init__(self, db):
+        self.db = db
+
+    def at(self, cluster_id, namespace, ts):
+        """
+        ts anındaki pod listesi (ts'ye kadar kaydedilmiş son durum);
+        o zamana kadar hiç snapshot yoksa None.
+        """
+        latest = (
+            self.db.query(PodSnapshot)
+            .filter(PodSnapshot.cluster_id == cluster_id,
+                    PodSnapshot.namespace == namespace,
+                    PodSnapshot.ts <= ts)
+            .order_by(PodSnapshot.ts.desc(), PodSnapshot.id.desc())
+            .first()
+        )
+        if latest is None:
+            return None
+        state = _replay(self.db, self._chain_rows(latest))
+        return [_with_derived(state[name], ts) for name in sorted(state)]
+
+    def history(self, cluster_id, namespace, since, until=None):
+        """
+        since..until arasında kaydedilmiş her durum: [(ts, pods)].
+        Atlanan (aynı) döngüler listede yer almaz.
+        """
+        until = until or datetime.utcnow()
+        first = (
+            self.db.query(PodSnapshot)
+            .filter(PodSnapshot.cluster_id == cluster_id,
+                    PodSnapshot.namespace == namespace,
+                    PodSnapshot.ts <= since)
+            .order_by(PodSnapshot.ts.desc(), PodSnapshot.id.desc())
+            .first()
+        )
+        query = (
+            self.db.query(PodSnapshot)
+            .filter(PodSnapshot.cluster_id == cluster_id,
+                    PodSnapshot.namespace == namespace,
+                    PodSnapshot.ts <= until)
+            .order_by(PodSnapshot.ts, PodSnapshot.id)
+        )
+        if first is not None:
+            # since'i kapsayan zincirin keyframe'inden başla
+            start = first if first.kind == 'key' else self.db.get(PodSnapshot, first.keyframe_id)
+            query = query.filter(PodSnapshot.ts >= start.ts)
+        else:
+            query = query.filter(PodSnapshot.ts > since)
+
+        result = []
+        state = {}
+        for row in query.yield_per(500):
+            state = _apply_row(self.db, state, row)
+            if row.ts >= since:
+                result.append((row.ts, [_with_derived(state[name], row.ts)
+                                        for name in sorted(state)]))
+        return result
+
+    def _chain_rows(self, latest):
+        """latest'e kadar (dahil) zincirin satırları, keyframe'den başlayarak."""
+        if latest.kind == 'key':
+            return [latest]
+        keyframe = self.db.get(PodSnapshot, latest.keyframe_id)
+        if keyframe is None:
+            raise LookupError(f"keyframe {latest.keyframe_id} of snapshot "
+                              f"{latest.id} not found")
+        deltas = (
+            self.db.query(PodSnapshot)
+            .filter(PodSnapshot.cluster_id == latest.cluster_id,
+                    PodSnapshot.namespace == latest.namespace,
+                    PodSnapshot.keyframe_id == keyframe.id,
+                    PodSnapshot.ts <= latest.ts,
+                    PodSnapshot.id <= latest.id)
+            .order_by(PodSnapshot.ts, PodSnapshot.id)
+            .all()
+        )
+        return [keyframe] + deltas
+
+
+# ── Retention ─────────────────────────────────────────────────
+
+def apply_retention(db, cutoff, cluster_id=None):
+    """
+    cutoff'tan eski snapshot'ları sil. Tutulanlar:
+    - cutoff sonrasındaki delta'ların dayandığı zincirler,
+    - her (cluster, namespace) için cutoff öncesi son satırın zinciri —
+      değişmeyen bir namespace'in cutoff'ta geçerli durumu bu satırdır
+      (aynı döngüler yazılmaz).
+    Hiçbir satırın kullanmadığı eski sözlükler de silinir. Writer cache'i
+    dokunulmaz: her namespace'in son zinciri ve en yeni sözlük zaten
+    tutulur. Commit çağıranın işi. Döndürür: silinen snapshot sayısı.
+    """
+    scope = [PodSnapshot.cluster_id == cluster_id] if cluster_id is not None else []
+    needed = (
+        db.query(PodSnapshot.keyframe_id)
+        .filter(PodSnapshot.ts >= cutoff, PodSnapshot.kind == 'delta', *scope)
+        .distinct()
+    )
+    last_before = (
+        db.query(PodSnapshot.cluster_id, PodSnapshot.namespace,
+                 func.max(PodSnapshot.ts).label('ts'))
+        .filter(PodSnapshot.ts < cutoff, *scope)
+        .group_by(PodSnapshot.cluster_id, PodSnapshot.namespace)
+        .subquery()
+    )
+    # O satırın keyframe'i (keyframe satırı için kendi id'si)
+    anchored = (
+        db.query(func.coalesce(PodSnapshot.keyframe_id, PodSnapshot.id))
+        .join(last_before, and_(PodSnapshot.cluster_id == last_before.c.cluster_id,
+                                PodSnapshot.namespace == last_before.c.namespace,
+                                PodSnapshot.ts == last_before.c.ts))
+        .distinct()
+    )
+    deleted = (
+        db.query(PodSnapshot)
+        .filter(
+            PodSnapshot.ts < cutoff, *scope,
+            PodSnapshot.id.notin_(needed),
+            PodSnapshot.id.notin_(anchored),
+            (PodSnapshot.keyframe_id.is_(None))
+            | (PodSnapshot.keyframe_id.notin_(needed)
+               & PodSnapshot.keyframe_id.notin_(anchored)),
+        )
+        .delete(synchronize_session=False)
+    )
+
+    in_use = db.query(PodSnapshot.dict_id).filter(
+        PodSnapshot.dict_id.isnot(None)).distinct()
+    newest = db.query(func.max(SnapshotDictionary.id)).group_by(
+        SnapshotDictionary.cluster_id, SnapshotDictionary.codec)
+    dict_scope = ([SnapshotDictionary.cluster_id == cluster_id]
+                  if cluster_id is not None else [])
+    (
+        db.query(SnapshotDictionary)
+        .filter(SnapshotDictionary.created_at < cutoff, *dict_scope,
+                SnapshotDictionary.id.notin_(in_use),
+                SnapshotDictionary.id.notin_(newest))
+        .delete(synchronize_session=False)
+    )
+    return deleted
+
+
+def invalidate(cluster_id=None):
+    """
+    Yazım geri alındıysa (rollback) cluster'ın (None: tüm cluster'ların)
+    cache'ini unut.
+    """
+    for key in [key for key in _chains if cluster_id is None or key[0] == cluster_id]:
+        del _chains[key]
+    if cluster_id is None:
+        _dictionaries.clear()
+    else:
+        _dictionaries.pop(cluster_id, None)
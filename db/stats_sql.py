@@ -0,0 +1,130 @@
+# db/stats_sql.py
+"""
+Namespace statistics computed inside the database.
+
+One grouped query over the scalar metrics columns (pod_data is never
+selected) returns, per (cluster, namespace[, day]) and per metric, the
+sample count, mean, population variance, min, max and the regression
+moments of value against time. On PostgreSQL these are the native
+aggregates avg / var_pop / min / max / regr_avgx / regr_sxx / regr_sxy
+(regr_slope = regr_sxy / regr_sxx) with date_trunc('day') buckets; other
+dialects (SQLite in development) get the same numbers from sums of powers.
+
+Results are db.running_stats.Summary objects, so callers use the same
+mean / std_dev / slope accessors whether statistics come from the
+ingest-time state or from this query:
+
+- window_statistics(): the whole window per namespace — the
+  calculate_statistics path when KUBEPOCKET_RUNNING_STATS=false.
+- day_summaries(): per-day summaries used to seed running_statistics.
+"""
+from datetime import datetime
+
+from sqlalchemy import extract, func, literal_column
+
+from db.models import Metric
+from db.running_stats import METRICS, Summary, floor_day
+
+
+def _time_hours(dialect, since, by_day):
+    """Satırın zamanı, saat: gün başından (by_day) veya since'ten itibaren."""
+    ts = Metric.timestamp
+    if dialect == 'postgresql':
+        origin = _day_bucket(dialect) if by_day else since
+        return extract('epoch', ts - origin) / 3600.0
+    origin = func.julianday(func.date(ts)) if by_day else func.julianday(since)
+    return (func.julianday(ts) - origin) * 24.0
+
+
+# Bind parametresi değil: SELECT ve GROUP BY'daki ifade birebir aynı olmalı
+_DAY = literal_column("'day'")
+
+
+def _day_bucket(dialect):
+    if dialect == 'postgresql':
+        return func.date_trunc(_DAY, Metric.timestamp)
+    return func.date(Metric.timestamp)
+
+
+def _aggregates(dialect, column, t):
+    """(n, ortalama, var_pop, min, max, t ortalaması, sxx, sxy) ifadeleri"""
+    y = getattr(Metric, column)
+    if dialect == 'postgresql':
+        return [func.count(y), func.avg(y), func.var_pop(y), func.min(y), func.max(y),
+                func.regr_avgx(y, t), func.regr_sxx(y, t), func.regr_sxy(y, t)]
+    # Kuvvet toplamları; varyans ve momentler Python'da türetilir
+    return [func.count(y), func.sum(y), func.sum(y * y), func.min(y), func.max(y),
+            func.sum(t), func.sum(t * t), func.sum(t * y)]
+
+
+def _summary(dialect, values):
+    n, a, b, lo, hi, c, d, e = values
+    summary = Summary()
+    if not n:
+        return summary
+    n = int(n)
+    if dialect == 'postgresql':
+        mean, var, avg_t, sxx, sxy = (float(v or 0.0) for v in (a, b, c, d, e))
+    else:
+        sum_y, sum_yy, sum_t, sum_tt, sum_ty = (float(v or 0.0) for v in (a, b, c, d, e))
+        mean, avg_t = sum_y / n, sum_t / n
+        var = max(sum_yy / n - mean * mean, 0.0)
+        sxx = sum_tt - n * avg_t * avg_t
+        sxy = sum_ty - n * avg_t * mean
+
+    summary.samples = n
+    summary.mean = mean
+    summary.m2 = var * n
+    summary.min_value, summary.max_value = float(lo), float(hi)
+    # Summary'nin Σt, Σt², Σty alanlarına geri çevir
+    summary.sum_t = n * avg_t
+    summary.sum_tt = sxx + n * avg_t * avg_t
+    summary.sum_ty = sxy + n * avg_t * mean
+    return summary
+
+
+def _grouped(db, since, until, by_day, cluster_id=None):
+    dialect = db.get_bind().dialect.name
+    t = _time_hours(dialect, since, by_day)
+    keys = [Metric.cluster_id, Metric.namespace]
+    if by_day:
+        keys.append(_day_bucket(dialect).label('day'))
+
+    columns = list(keys) + [func.max(Metric.timestamp)]
+    for column in METRICS.values():
+        columns.extend(_aggregates(dialect, column, t))
+
+    query = (
+        db.query(*columns)
+        .filter(Metric.timestamp >= since, Metric.timestamp < until,
+                Metric.cluster_id.isnot(None))
+    )
+    if cluster_id is not None:
+        query = query.filter(Metric.cluster_id == cluster_id)
+
+    width = len(keys)
+    for row in query.group_by(*keys):
+        key, last_ts, values = tuple(row[:width]), row[width], row[width + 1:]
+        for i, metric_type in enumerate(METRICS):
+            summary = _summary(dialect, values[i * 8:(i + 1) * 8])
+            summary.last_ts = last_ts
+            yield key, metric_type, summary
+
+
+def window_statistics(db, since, until, cluster_id=None):
+    """{(cluster_id, namespace, metric_type): Summary} — tek grouped sorgu"""
+    return {(cid, ns, metric_type): summary
+            for (cid, ns), metric_type, summary
+            in _grouped(db, since, until, False, cluster_id)}
+
+
+def day_summaries(db, since, until, cluster_id=None):
+    """{(cluster_id, namespace, metric_type, gün): Summary}, t = gün başından saat"""
+    result = {}
+    for (cid, ns, day), metric_type, summary in _grouped(
+            db, floor_day(since), until, True, cluster_id):
+        # SQLite date() string döner
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d')
+        result[(cid, ns, metric_type, day)] = summary
+    return result
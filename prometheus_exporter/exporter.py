@@ -3,10 +3,13 @@
 from sqlalchemy import func
 from prometheus_client import REGISTRY
 from prometheus_client.core import GaugeMetricFamily
-from collector.k8s_client import K8sClient
+from collector.k8s_client import get_shared_client
+from collector.async_engine import AsyncCollectionEngine
 from collector.cost import calculate_relative_cost, detect_waste
 from db.repository import MetricRepository
-from db.models import Statistics, KubeEvent, SessionLocal
+from db.models import CLUSTER_SCOPE, Statistics, KubeEvent
+from db import routing
+from db.routing import ReadSessionLocal
 import sys
 import os
 import logging
@@ -24,7 +27,8 @@ CLUSTER_NAME = os.getenv('CLUSTER_NAME', 'default')
 class KubePocketCollector:
 
     def collect(self):
-        db = SessionLocal()
+        # Sadece okuma: DATABASE_READ_URL replica'sı (lag uygunsa) ya da primary
+        db = ReadSessionLocal()
         try:
             logger.info('Scraping metrics...')
             repo = MetricRepository(db)
@@ -50,6 +54,10 @@ class KubePocketCollector:
                                            'Namespace anomaly score (0-100)',           labels=['namespace', 'metric_type', 'cluster'])
             ns_forecast = GaugeMetricFamily('kubepocket_forecast_cpu_7d',
                                             'CPU forecast 7 days',                       labels=['namespace', 'cluster'])
+            ns_forecast_mem = GaugeMetricFamily('kubepocket_forecast_memory_7d',
+                                                'Memory forecast 7 days (GiB)',              labels=['namespace', 'cluster'])
+            cl_forecast = GaugeMetricFamily('kubepocket_cluster_forecast',
+                                            'Cluster total forecast per horizon',        labels=['cluster', 'metric_type', 'horizon_days'])
             pod_cpu = GaugeMetricFamily('kubepocket_pod_cpu_cores',              'CPU request per pod',
                                         labels=['pod', 'namespace', 'cluster'])
             pod_memory = GaugeMetricFamily('kubepocket_pod_memory_gib',             'Memory request per pod',                    labels=[
@@ -142,6 +150,20 @@ class KubePocketCollector:
 
                 logger.info(f"  cluster={cname}: {len(metrics)} namespaces")
 
+                # Pod satırları pod_samples'tan (pod_data JSON'u gezilmez)
+                samples_by_ns = {}
+                for sample in repo.get_latest_pod_samples(cluster_id=cluster.id):
+                    samples_by_ns.setdefault(sample.namespace, []).append(sample)
+
+                # Stats daemon'un önceden hesapladığı tahminler — namespace başına sözlük araması
+                forecasts = {}
+                for f in repo.get_forecasts(cluster_id=cluster.id):
+                    if f.namespace == CLUSTER_SCOPE:
+                        cl_forecast.add_metric(
+                            [cname, f.metric_type, str(f.horizon_days)], f.value)
+                    elif f.horizon_days == 7:
+                        forecasts[(f.namespace, f.metric_type)] = f.value
+
                 _waste_pre = detect_waste(metrics)
                 waste_rec_map = {
                     (wp['pod'], wp['namespace']): wp.get('recommendation', '')
@@ -169,31 +191,33 @@ class KubePocketCollector:
                             m.total_cpu - stats.avg_value) / stats.std_dev
                         ns_anomaly.add_metric(
                             [m.namespace, 'cpu', cname], min(100.0, z_score * 20))
-                        forecast_value = stats.avg_value + \
-                            (stats.trend_slope * 7)
-                        ns_forecast.add_metric(
-                            ns_labels, max(0.0, forecast_value))
-
-                    ns_avg_cpu = m.total_cpu / max(len(m.pod_data), 1)
-
-                    for pod in m.pod_data:
-                        pod_name = pod.get('name', '')
-                        pod_ns = pod.get('namespace', m.namespace)
+                    if (m.namespace, 'cpu') in forecasts:
+                        ns_forecast.add_metric(ns_labels, forecasts[(m.namespace, 'cpu')])
+                    if (m.namespace, 'memory') in forecasts:
+                        ns_forecast_mem.add_metric(
+                            ns_labels, forecasts[(m.namespace, 'memory')])
+
+                    ns_pods = samples_by_ns.get(m.namespace, [])
+                    ns_avg_cpu = m.total_cpu / max(len(ns_pods), 1)
+
+                    for pod in ns_pods:
+                        pod_name = pod.pod
+                        pod_ns = pod.namespace
                         plabels = [pod_name, pod_ns, cname]
-                        cpu_req = pod.get('cpu_request', 0)
-                        restarts = pod.get('restart_count', 0)
-                        status = pod.get('status', 'Unknown')
+                        cpu_req = pod.cpu_request or 0
+                        restarts = pod.restart_count or 0
+                        status = pod.status or 'Unknown'
 
                         pod_cpu.add_metric(plabels, cpu_req)
                         pod_memory.add_metric(
-                            plabels, pod.get('memory_request', 0))
+                            plabels, pod.memory_request or 0)
                         pod_restarts.add_metric(plabels, restarts)
-                        pod_age.add_metric(plabels, pod.get('age_hours', 0))
+                        pod_age.add_metric(plabels, pod.age_hours or 0)
 
-                        cpu_act = pod.get('cpu_actual')
-                        mem_act = pod.get('memory_actual_gib')
-                        cpu_eff = pod.get('cpu_efficiency_pct')
-                        mem_eff = pod.get('memory_efficiency_pct')
+                        cpu_act = pod.cpu_actual
+                        mem_act = pod.memory_actual_gib
+                        cpu_eff = pod.cpu_efficiency_pct
+                        mem_eff = pod.memory_efficiency_pct
                         if cpu_act is not None:
                             pod_cpu_act.add_metric(plabels, cpu_act)
                         if mem_act is not None:
@@ -241,7 +265,7 @@ class KubePocketCollector:
                     ns_mem_pct.add_metric(nl, ns_data['memory_pct'])
 
                 # Waste
-                waste_data = detect_waste(metrics)
+                waste_data = _waste_pre
                 for wp in waste_data.get('waste_pods', []):
                     rec = wp.get('recommendation', 'No recommendation')
                     pod_waste_sc.add_metric(
@@ -261,8 +285,10 @@ class KubePocketCollector:
                 # PVC — only for the current (local) cluster
                 if cname == CLUSTER_NAME:
                     try:
-                        k8s = K8sClient()
-                        pvc_data = k8s.collect_pvc_metrics()
+                        # PVC ve node listeleri paralel çekilir
+                        local = AsyncCollectionEngine({cname: get_shared_client()}).run(
+                            parts=('pvcs', 'nodes')).get(cname, {})
+                        pvc_data = local.get('pvcs') or []
                         for pv in pvc_data:
                             pl = [pv['namespace'], pv['name'],
                                   pv['storage_class'], cname]
@@ -275,7 +301,7 @@ class KubePocketCollector:
 
                     # Node metrics — only for local cluster
                     try:
-                        node_data = k8s.collect_node_metrics()
+                        node_data = local.get('nodes') or []
                         for nd in node_data:
                             nl = [nd['name'], cname]
                             nd_cpu_cap.add_metric(nl, nd['cpu_capacity'])
@@ -350,6 +376,8 @@ class KubePocketCollector:
             yield ns_restarts
             yield ns_anomaly
             yield ns_forecast
+            yield ns_forecast_mem
+            yield cl_forecast
             yield pod_cpu
             yield pod_memory
             yield pod_restarts
@@ -390,6 +418,7 @@ class KubePocketCollector:
             yield pod_mem_eff
             yield alert_metric
             yield alert_detail
+            yield from self._db_metrics()
             yield GaugeMetricFamily('kubepocket_up', 'KubePocket exporter status', value=1)
 
         except Exception as e:
@@ -399,6 +428,27 @@ class KubePocketCollector:
             db.close()
 
 
+    def _db_metrics(self):
+        """Bu sürecin engine pool'ları ve replica gecikmeleri."""
+        pool = GaugeMetricFamily('kubepocket_db_pool_connections',
+                                 'DB connection pool state per engine',      labels=['engine', 'state'])
+        for name, stats in routing.pool_stats(routing.sync_engines()).items():
+            for state, value in stats.items():
+                pool.add_metric([name, state], value)
+
+        lag = GaugeMetricFamily('kubepocket_db_replica_lag_seconds',
+                                'Read replica replication lag',              labels=['engine'])
+        usable = GaugeMetricFamily('kubepocket_db_replica_usable',
+                                   'Read replica in rotation (1) or skipped (0)', labels=['engine'])
+        for replica in routing.replica_status():
+            if replica['lag_seconds'] is not None:
+                lag.add_metric([replica['name']], replica['lag_seconds'])
+            usable.add_metric([replica['name']], 1.0 if replica['usable'] else 0.0)
+        yield pool
+        yield lag
+        yield usable
+
+
 def start_exporter(port: int = 8001):
     from prometheus_client import make_wsgi_app
     from wsgiref.simple_server import make_server
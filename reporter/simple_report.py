@@ -4,18 +4,25 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from db.routing import ReadSessionLocal
 from db.repository import MetricRepository
+from db import rollups
 from datetime import datetime, timedelta
 from collections import defaultdict
 
 def print_report(hours=24):
     """Son X saat için rapor yazdır"""
     
-    repo = MetricRepository()
-    metrics = repo.get_latest_metrics(hours=hours)
+    db = ReadSessionLocal()
+    repo = MetricRepository(db)
+    # Saatlik rollup'lar + henüz rollup'lanmamış son saatler ham metrics'ten
+    # (pod_data yüklenmez)
+    since = rollups.floor_hour(datetime.utcnow() - timedelta(hours=hours))
+    rows = rollups.get_hourly_with_recent(db, since)
     
-    if not metrics:
+    if not rows:
         print("❌ Hiç metrik bulunamadı!")
+        db.close()
         return
     
     print(f"\n{'='*60}")
@@ -23,17 +30,18 @@ def print_report(hours=24):
     print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print('='*60)
     
-    # Namespace bazlı özet
+    # Namespace bazlı özet (örnek ağırlıklı ortalama; restart sayaçları
+    # kümülatif olduğundan aralıktaki en yüksek değer)
     ns_summary = defaultdict(lambda: {
         'cpu': 0, 'memory': 0, 'restarts': 0, 'samples': 0
     })
     
-    for m in metrics:
-        ns = m.namespace
-        ns_summary[ns]['cpu'] += m.total_cpu
-        ns_summary[ns]['memory'] += m.total_memory
-        ns_summary[ns]['restarts'] += m.total_restarts
-        ns_summary[ns]['samples'] += 1
+    for r in rows:
+        ns = r.namespace
+        ns_summary[ns]['cpu'] += (r.cpu_avg or 0) * r.samples
+        ns_summary[ns]['memory'] += (r.memory_avg or 0) * r.samples
+        ns_summary[ns]['restarts'] = max(ns_summary[ns]['restarts'], int(r.restarts_max or 0))
+        ns_summary[ns]['samples'] += r.samples
     
     print(f"\n📁 Namespace Özeti:")
     print(f"{'Namespace':<20} {'CPU (cores)':>12} {'Memory (Gi)':>12} {'Restarts':>10}")
@@ -52,7 +60,7 @@ def print_report(hours=24):
             print(f"   • {alert.message} [{alert.severity}]")
     
     print('='*60)
-    repo.close()
+    db.close()
 
 if __name__ == "__main__":
     # Son 24 saat
@@ -0,0 +1,12 @@
+# tests/conftest.py
+"""
+db.models creates its engine at import time from DATABASE_URL; point it at
+SQLite so the tests never need a PostgreSQL server. Tests that touch the
+database build their own in-memory engine.
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    'DATABASE_URL',
+    'sqlite:///' + os.path.join(tempfile.gettempdir(), 'kubepocket-tests.db'))
@@ -0,0 +1,128 @@
+# tests/test_running_stats.py
+"""
+db/running_stats.py and db/stats_sql.py against numpy on in-memory SQLite.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db import running_stats, stats_sql
+from db.models import Base, Metric
+from db.running_stats import Summary
+
+T0 = datetime(2026, 9, 1)
+
+
+def _samples(n=60, seed=7):
+    """(ts, cpu, memory) — 40 dakika aralıklı, trendli ve gürültülü"""
+    rng = np.random.default_rng(seed)
+    result = []
+    for i in range(n):
+        ts = T0 + timedelta(minutes=40 * i + int(rng.integers(0, 5)))
+        result.append((ts, 2.0 + 0.01 * i + rng.normal(0, 0.3),
+                       8.0 - 0.02 * i + rng.normal(0, 0.5)))
+    return result
+
+
+def _expected(ts, values):
+    """numpy karşılıkları: ortalama, popülasyon std, min, max, eğim (birim/saniye)"""
+    seconds = np.array([(t - T0).total_seconds() for t in ts])
+    y = np.array(values)
+    return {'samples': len(y), 'mean': y.mean(), 'std_dev': y.std(),
+            'min_value': y.min(), 'max_value': y.max(),
+            'slope': np.polyfit(seconds, y, 1)[0]}
+
+
+def _assert_matches(summary, expected):
+    assert summary.samples == expected['samples']
+    for name in ('mean', 'std_dev', 'min_value', 'max_value', 'slope'):
+        assert getattr(summary, name) == pytest.approx(expected[name], rel=1e-6, abs=1e-12), name
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_summary_add_matches_numpy():
+    samples = _samples()
+    summary = Summary()
+    for ts, cpu, _ in samples:
+        summary.add(cpu, running_stats._hours(ts, T0), ts)
+    _assert_matches(summary, _expected([s[0] for s in samples], [s[1] for s in samples]))
+    assert summary.last_ts == samples[-1][0]
+
+
+def test_summary_merge_with_offset_matches_numpy():
+    samples = _samples()
+    # Üç parça, her biri kendi gün başına göre t ekseniyle
+    parts = {}
+    for ts, cpu, _ in samples:
+        origin = running_stats.floor_day(ts)
+        parts.setdefault(origin, Summary()).add(cpu, running_stats._hours(ts, origin), ts)
+    assert len(parts) >= 2
+
+    merged = Summary()
+    for origin in sorted(parts, reverse=True):
+        merged.merge(parts[origin], offset=running_stats._hours(origin, T0))
+    _assert_matches(merged, _expected([s[0] for s in samples], [s[1] for s in samples]))
+    # Boş özetle birleştirme etkisiz
+    assert merged.merge(Summary()).samples == len(samples)
+
+
+def test_update_and_window_match_numpy(db):
+    samples = _samples()
+    for ts, cpu, memory in samples:
+        running_stats.update(db, 1, ts, [
+            {'namespace': 'web', 'total_cpu': cpu, 'total_memory': memory},
+            {'namespace': 'db', 'total_cpu': 1.0, 'total_memory': None},
+        ])
+    db.commit()
+
+    window = running_stats.window(db, T0)
+    ts = [s[0] for s in samples]
+    _assert_matches(window[(1, 'web', 'cpu')], _expected(ts, [s[1] for s in samples]))
+    _assert_matches(window[(1, 'web', 'memory')], _expected(ts, [s[2] for s in samples]))
+    # Sabit seri: std ve eğim 0, NULL değer 0 sayılır
+    constant = window[(1, 'db', 'cpu')]
+    assert (constant.mean, constant.std_dev, constant.slope) == (1.0, 0.0, 0.0)
+    assert window[(1, 'db', 'memory')].max_value == 0.0
+
+    # Pencere başlangıcı sonraki günse önceki gün bucket'ı dahil edilmez
+    later = running_stats.window(db, T0 + timedelta(days=1))
+    rest = [s for s in samples if s[0] >= T0 + timedelta(days=1)]
+    _assert_matches(later[(1, 'web', 'cpu')],
+                    _expected([s[0] for s in rest], [s[1] for s in rest]))
+
+
+def test_window_statistics_matches_numpy(db):
+    samples = _samples()
+    db.add_all(Metric(cluster_id=1, namespace='web', timestamp=ts, total_cpu=cpu,
+                      total_memory=memory, total_restarts=0)
+               for ts, cpu, memory in samples)
+    db.add(Metric(cluster_id=2, namespace='web', timestamp=T0, total_cpu=50.0,
+                  total_memory=50.0, total_restarts=0))
+    db.commit()
+
+    until = samples[-1][0] + timedelta(seconds=1)
+    stats = stats_sql.window_statistics(db, T0, until, cluster_id=1)
+    assert set(stats) == {(1, 'web', 'cpu'), (1, 'web', 'memory')}
+    ts = [s[0] for s in samples]
+    _assert_matches(stats[(1, 'web', 'cpu')], _expected(ts, [s[1] for s in samples]))
+    _assert_matches(stats[(1, 'web', 'memory')], _expected(ts, [s[2] for s in samples]))
+    assert stats[(1, 'web', 'cpu')].last_ts == samples[-1][0]
+
+    # Gün özetleri birleştirilince pencerenin tamamıyla aynı
+    days = stats_sql.day_summaries(db, T0, until, cluster_id=1)
+    merged = Summary()
+    for (_, _, metric_type, day), summary in sorted(days.items(), key=lambda item: item[0][3]):
+        if metric_type == 'cpu':
+            merged.merge(summary, offset=running_stats._hours(day, T0))
+    _assert_matches(merged, _expected(ts, [s[1] for s in samples]))
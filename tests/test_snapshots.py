@@ -0,0 +1,144 @@
+# tests/test_snapshots.py
+"""
+db/snapshots.py: delta encoding, reader and retention on in-memory SQLite.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db import snapshots
+from db.models import Base, PodSnapshot
+from db.snapshots import SnapshotReader, SnapshotWriter, apply_delta, diff
+
+T0 = datetime(2026, 9, 1)
+CREATED = '2026-08-31T00:00:00+00:00'
+
+
+def _pod(name, **fields):
+    return dict({'name': name, 'status': 'Running', 'restart_count': 0,
+                 'cpu_request': 0.1, 'memory_request': 0.25,
+                 'node_name': 'node-1', 'created_at': CREATED}, **fields)
+
+
+def _strip(pods):
+    """Okunan pod'lardan türetilmiş alanı çıkar."""
+    return [{k: v for k, v in pod.items() if k != 'age_hours'} for pod in pods]
+
+
+def _sorted(pods):
+    return sorted(pods, key=lambda pod: pod['name'])
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    # Süreç geneli cache'ler id'ye bağlı: her test kendi veritabanıyla başlar
+    snapshots._chains.clear()
+    snapshots._dictionaries.clear()
+    snapshots._codecs.clear()
+    with Session(engine) as session:
+        yield session
+    snapshots._chains.clear()
+    snapshots._dictionaries.clear()
+    snapshots._codecs.clear()
+    engine.dispose()
+
+
+def test_diff_apply_delta_round_trip():
+    old = snapshots._by_name([
+        _pod('web-1'),
+        _pod('web-2', restart_count=3),
+        _pod('db-0', node_name='node-2', reason='Evicted'),
+    ])
+    new = snapshots._by_name([
+        _pod('web-1'),
+        _pod('web-2', restart_count=4, status='CrashLoopBackOff'),
+        _pod('db-0', node_name='node-3'),
+        _pod('web-3'),
+    ])
+    new.pop('web-1')
+
+    delta = diff(old, new)
+    assert delta['added'] == [new['web-3']]
+    assert delta['removed'] == ['web-1']
+    assert delta['changed']['web-2'] == {'restart_count': 4, 'status': 'CrashLoopBackOff'}
+    assert delta['unset'] == {'db-0': ['reason']}
+    assert apply_delta(old, delta) == new
+    # apply_delta girdiyi değiştirmez
+    assert 'web-1' in old and 'reason' in old['db-0']
+
+    unchanged = diff(new, new)
+    assert unchanged == {'added': [], 'removed': [], 'changed': {}, 'unset': {}}
+    assert apply_delta(new, unchanged) == new
+
+
+def test_reader_at_and_history(db):
+    cycles = [
+        [_pod('web-1'), _pod('web-2')],
+        [_pod('web-1'), _pod('web-2')],                      # aynı → yazılmaz
+        [_pod('web-1', restart_count=1), _pod('web-2')],
+        [_pod('web-1', restart_count=1), _pod('web-3')],
+    ]
+    writer = SnapshotWriter(db)
+    stats = [writer.write(1, T0 + timedelta(hours=i), {'ns': pods})
+             for i, pods in enumerate(cycles)]
+    db.commit()
+    assert [(s['key'], s['delta'], s['skipped']) for s in stats] == [
+        (1, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1, 0)]
+
+    reader = SnapshotReader(db)
+    assert reader.at(1, 'ns', T0 - timedelta(minutes=1)) is None
+    for i, pods in enumerate(cycles):
+        ts = T0 + timedelta(hours=i, minutes=30)
+        state = reader.at(1, 'ns', ts)
+        assert _strip(state) == _sorted(pods)
+        # age_hours okuma anında created_at'ten türetilir
+        assert state[0]['age_hours'] == pytest.approx(24 + i + 0.5)
+
+    history = reader.history(1, 'ns', T0 + timedelta(minutes=30), T0 + timedelta(hours=3))
+    assert [ts for ts, _ in history] == [T0 + timedelta(hours=2), T0 + timedelta(hours=3)]
+    assert [_strip(pods) for _, pods in history] == [_sorted(cycles[2]), _sorted(cycles[3])]
+
+    # Başka cluster / namespace karışmaz
+    assert reader.at(2, 'ns', T0 + timedelta(hours=5)) is None
+    assert reader.history(1, 'other', T0, T0 + timedelta(hours=5)) == []
+
+
+def test_retention_keeps_anchored_chain(db, monkeypatch):
+    monkeypatch.setattr(snapshots, 'KEYFRAME_INTERVAL', 3)
+    monkeypatch.setattr(snapshots, 'KEYFRAME_MAX_AGE', timedelta(days=365))
+
+    idle = [_pod('idle-0')]
+    busy = [[_pod('busy-0', restart_count=i)] for i in range(10)]
+    writer = SnapshotWriter(db)
+    for i, pods in enumerate(busy):
+        writer.write(1, T0 + timedelta(hours=i), {'busy': pods, 'idle': idle})
+    db.commit()
+    # busy: key@0 d1 d2 key@3 d4 d5 key@6 d7 d8 key@9; idle: tek keyframe @0
+    kinds = [kind for kind, in db.query(PodSnapshot.kind)
+             .filter(PodSnapshot.namespace == 'busy').order_by(PodSnapshot.ts)]
+    assert kinds == ['key', 'delta', 'delta'] * 3 + ['key']
+
+    cutoff = T0 + timedelta(hours=7, minutes=30)
+    deleted = snapshots.apply_retention(db, cutoff)
+    db.commit()
+    assert deleted == 6
+
+    reader = SnapshotReader(db)
+    # cutoff'ta geçerli durumlar okunabilir: busy key@6 + d7, idle'ın tek satırı
+    assert _strip(reader.at(1, 'busy', cutoff)) == busy[7]
+    assert _strip(reader.at(1, 'idle', T0 + timedelta(hours=9))) == idle
+    assert [ts for ts, _ in reader.history(1, 'busy', cutoff, T0 + timedelta(hours=9))] == [
+        T0 + timedelta(hours=8), T0 + timedelta(hours=9)]
+
+    # Writer cache'i geçerli kalır; yeniden başlayan writer da zinciri DB'den kurar
+    nxt = [_pod('busy-0', restart_count=10)]
+    writer.write(1, T0 + timedelta(hours=10), {'busy': nxt, 'idle': idle})
+    snapshots.invalidate()
+    restarted = SnapshotWriter(db).write(1, T0 + timedelta(hours=11), {'busy': nxt, 'idle': idle})
+    db.commit()
+    assert restarted['skipped'] == 2
+    assert _strip(reader.at(1, 'busy', T0 + timedelta(hours=11))) == nxt